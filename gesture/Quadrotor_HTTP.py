@@ -1,40 +1,160 @@
 #!/usr/bin/env python3
 import requests
+import collections
 import json
 import time
 import threading
 
+from requests.adapters import HTTPAdapter
+
 # 服务地址配置
 HOST = 'http://vd4856bb.natappfree.cc'
 BASE_URL = HOST
 
-# 后台请求函数
-def _async_send_move(x, y, z, t):
-    url = f"{BASE_URL}/move"
-    payload = {
-        'x': x,
-        'y': y,
-        'z': z,
-        't': t
-    }
-    headers = {'Content-Type': 'application/json'}
-    try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=5)
-        resp.raise_for_status()
-        result = resp.json()
-        print(f"[MOVE] x={x}, y={y}, z={z}, t={t} => Response: {result}")
-    except Exception as e:
-        print(f"[MOVE] Request failed: {e}")
+
+class HTTPTransport:
+    """
+    HTTP 命令发送：一个常驻工作线程 + 保持连接的连接池（requests.Session），不再每条命令新建线程与 TCP 连接
+
+    mode 为 'serialize' 时按顺序发送每条命令（队列最多 max_pending 条，满时丢弃最旧的）；
+    为 'coalesce' 时只保留最新一条，新命令覆盖尚未发送的旧命令；
+    batch 为 True 时（仅 serialize 模式）把队列中积压的多条命令合成一次 /move_batch 请求，按顺序执行的定时设定点
+
+    与 WebSocketControl 的 CommandMailbox 相同：普通命令入队超过 max_age 秒仍未发出（链路慢或断开）则过期丢弃，
+    不会执行过时的速度命令；必达命令（急停）进入优先队列，丢弃比它更早的普通命令、插队发送，不会被覆盖、挤出也不过期
+    """
+
+    def __init__(self, base_url=BASE_URL, mode='serialize', batch=False, max_batch=16, max_pending=64, timeout=5,
+                 verbose=True, max_age=0.5):
+        self.base_url = base_url
+        self.mode = mode
+        self.batch = batch and mode == 'serialize'
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.verbose = verbose
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.headers['Content-Type'] = 'application/json'
+        self.max_age = max_age
+        self._pending = collections.deque(maxlen=1 if mode == 'coalesce' else max_pending)
+        self._priority = collections.deque()  # 不设上限：必达命令（急停）很少，不能因队列满被挤出
+        self._condition = threading.Condition()
+        self._worker = None
+        self._stopped = False
+        self._in_flight = 0
+        # 统计
+        self.requests = 0       # 已完成的 HTTP 请求数
+        self.commands = 0       # 已发送的命令数（批量请求包含多条）
+        self.failed = 0
+        self.replaced = 0       # 覆盖或挤出队列、没有发送的命令数
+        self.expired = 0        # 超过 max_age 没有发出而丢弃的命令数
+        self.latencies = collections.deque(maxlen=4096)  # 命令入队到收到响应的时间（秒）
+
+    def send_move(self, x, y, z, t, must_deliver=False):
+        """命令入队后立即返回；must_deliver 为 True 的命令不会被覆盖、挤出或过期"""
+        item = (time.perf_counter(), {'x': x, 'y': y, 'z': z, 't': t})
+        with self._condition:
+            if must_deliver:
+                self.replaced += len(self._pending)
+                self._pending.clear()
+                self._priority.append(item)
+            else:
+                if len(self._pending) == self._pending.maxlen:
+                    self.replaced += 1
+                self._pending.append(item)
+            self._condition.notify()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='http-sender', daemon=True)
+                self._worker.start()
+
+    def _take(self):
+        """取出下一次请求要发送的命令（必达命令在前），跳过过期的普通命令；停止时返回 None"""
+        limit = self.max_batch if self.batch else 1
+        with self._condition:
+            while True:
+                self._condition.wait_for(lambda: self._pending or self._priority or self._stopped)
+                if self._stopped and not self._pending and not self._priority:
+                    return None
+                items = [self._priority.popleft() for _ in range(min(len(self._priority), limit))]
+                now = time.perf_counter()
+                while self._pending and len(items) < limit:
+                    queued, payload = self._pending.popleft()
+                    if self.max_age is not None and now - queued > self.max_age:
+                        self.expired += 1
+                        continue
+                    items.append((queued, payload))
+                if items:
+                    self._in_flight = len(items)
+                    return items
+                self._condition.notify_all()  # 队列里只有过期命令，flush() 可能在等待
+
+    def _run(self):
+        while True:
+            items = self._take()
+            if items is None:
+                break
+            try:
+                self._post(items)
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self._condition.notify_all()
+
+    def _post(self, items):
+        try:
+            if len(items) == 1:
+                resp = self.session.post(f"{self.base_url}/move", json=items[0][1], timeout=self.timeout)
+            else:
+                resp = self.session.post(f"{self.base_url}/move_batch",
+                                         json={'setpoints': [payload for _, payload in items]}, timeout=self.timeout)
+            resp.raise_for_status()
+            result = resp.json()
+        except Exception as e:
+            self.failed += len(items)
+            print(f"[MOVE] Request failed: {e}")
+            return
+        done = time.perf_counter()
+        self.requests += 1
+        self.commands += len(items)
+        self.latencies.extend(done - queued for queued, _ in items)
+        if self.verbose:
+            print(f"[MOVE] {len(items)} command(s) => Response: {result}")
+
+    def pending(self):
+        with self._condition:
+            return len(self._pending) + len(self._priority)
+
+    def flush(self, timeout=None):
+        """等待队列中的命令全部发出或过期（用于测试与退出前），超时返回 False"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._priority and not self._in_flight,
+                                            timeout)
+
+    def close(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._worker is not None:
+            self._worker.join(self.timeout)
+        self.session.close()
+
+
+_transport = None
+
+
+def get_transport():
+    """模块级函数共用的传输对象（首次使用时创建）"""
+    global _transport
+    if _transport is None:
+        _transport = HTTPTransport(BASE_URL)
+    return _transport
+
 
 # 公共非阻塞调用函数
-def send_move(x, y, z, t):
+def send_move(x, y, z, t, must_deliver=False):
     print(f"x:{x} y:{y} z:{z} t={t} => Sending" )
-    thread = threading.Thread(
-        target=_async_send_move,
-        args=(x, y, z, t),
-        daemon=True
-    )
-    thread.start()
+    get_transport().send_move(x, y, z, t, must_deliver)
 
 # 各动作封装函数
 def action_Thumbs_Up(V=1.0, T=0.5):
@@ -66,5 +186,5 @@ def action_OK():
     print("[INFO] Motor enabled (假设已启动)")
 
 def action_Pause():
-    """暂停动作（可以用 t=0 表示）"""
-    send_move(0, 0, 0, 0)
\ No newline at end of file
+    """暂停动作（可以用 t=0 表示），必达命令：插队发送，不会被后续命令覆盖"""
+    send_move(0, 0, 0, 0, must_deliver=True)
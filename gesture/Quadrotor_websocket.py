@@ -1,18 +1,155 @@
 import websocket
+import collections
+import contextlib
 import json
 import threading
 import time
 
+from command_protocol import (ACK_EACH, FLAG_TRACE, MSG_ACK, MSG_TRACE, PROTOCOL_BINARY, PROTOCOL_JSON, decode_ack,
+                              decode_trace, encode_command, hello_message, message_type)
+from latency_trace import PUBLISH, SEND, SERVER_RECEIVE, SET_COMMAND
+
+
+class CommandMailbox:
+    """
+    发送信箱：普通命令只保留最新一条（新命令覆盖尚未发送的旧命令），
+    必达命令（例如急停）进入优先队列，插队到普通命令之前并丢弃比它更早的普通命令
+    普通命令超过 max_age 秒仍未发出（例如断线期间）则过期丢弃，重连后不会发送过时的运动命令；必达命令不过期
+    """
+
+    def __init__(self, priority_size=16, max_age=0.5):
+        self._latest = None
+        self._priority = collections.deque()
+        self._priority_size = priority_size
+        self.max_age = max_age
+        self._condition = threading.Condition()
+        self.coalesced = 0   # 被更新的命令覆盖、没有发送的命令数
+        self.dropped = 0     # 优先队列已满时丢弃的命令数
+        self.expired = 0     # 过期丢弃的命令数
+
+    def put(self, command, must_deliver=False):
+        with self._condition:
+            if must_deliver:
+                if self._latest is not None:
+                    self._latest = None
+                    self.coalesced += 1
+                if len(self._priority) >= self._priority_size:
+                    self._priority.popleft()
+                    self.dropped += 1
+                self._priority.append(command)
+            else:
+                if self._latest is not None:
+                    self.coalesced += 1
+                self._latest = (time.monotonic(), command)
+            self._condition.notify()
+
+    def requeue(self, command):
+        """发送失败的必达命令放回优先队列最前面"""
+        with self._condition:
+            self._priority.appendleft(command)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        取出下一条要发送的命令，超时返回 None
+        :return: (命令, 是否必达)
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._priority or self._latest is not None, timeout):
+                return None
+            if self._priority:
+                return self._priority.popleft(), True
+            (queued, command), self._latest = self._latest, None
+            if self.max_age is not None and time.monotonic() - queued > self.max_age:
+                self.expired += 1
+                return None
+            return command, False
+
+    def __len__(self):
+        with self._condition:
+            return len(self._priority) + (self._latest is not None)
+
+
 class WebSocketControl:
-    def __init__(self, ws_url):
+    def __init__(self, ws_url, protocol=PROTOCOL_JSON, tracker=None, max_age=0.5,
+                 ping_interval=2.0, ping_timeout=1.0, min_backoff=0.05, max_backoff=5.0, ack_mode=ACK_EACH,
+                 ack_interval=None, drone=None):
+        """
+        :param protocol: 希望使用的协议，默认 JSON；为 PROTOCOL_BINARY 时连接后协商，服务端不支持则继续使用 JSON
+                         （不支持握手的旧服务端每次连接会记录一条错误）
+        :param ack_mode: 请求的应答方式（ACK_EACH / ACK_NONE / ACK_CUMULATIVE），累计应答间隔为 ack_interval 秒
+        :param drone: 要控制的无人机编号（服务端控制多架无人机时），默认为服务端的默认无人机
+        :param tracker: LatencyTracker（可选），设置后命令请求服务端回传追踪时间戳，用于统计各阶段延迟
+        :param max_age: 普通命令的最长等待时间（秒），超时未发出则丢弃
+        :param ping_interval: 心跳间隔（秒），ping_timeout 内没有收到 pong 即认为连接已断开并重连
+        :param min_backoff: 断线后第一次重连前的等待时间（秒），之后每次失败翻倍，最长 max_backoff
+        """
         self.ws_url = ws_url
+        self.preferred_protocol = protocol
+        self.protocol = PROTOCOL_JSON  # 当前使用的协议，协商成功后切换
+        self.requested_ack = ack_mode
+        self.ack_interval = ack_interval
+        self.drone = drone
+        self.ack_mode = ACK_EACH  # 服务端实际采用的应答方式
+        self.acked_seq = None  # 最近一次应答的序号
+        self._hello_pending = False  # 已发送握手、还没有收到回复
+        self._seq = 0
         self.ws = None
         self.ws_lock = threading.Lock()
         self.ws_connected = threading.Event()  # 用于等待连接建立完成
+        # 所有命令由一个常驻发送线程发出，不再每条命令创建一个线程
+        self.mailbox = CommandMailbox(max_age=max_age)
+        self.sent = 0
+        self.send_failed = 0
+        self._sender = None
+        self._stopped = threading.Event()
+        self.tracker = tracker
+        self._trace_local = threading.local()
+        # 连接监管：断线后按指数退避自动重连
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._supervisor = None
+        self.opens = 0
+        self.reconnects = 0
+        self.last_reconnect_time = None  # 最近一次从断线到重新连上的用时（秒）
+        self._disconnected_at = None
 
     def on_message(self, wsapp, message):
         try:
+            if isinstance(message, bytes):
+                if message_type(message) == MSG_TRACE:
+                    seq, server_receive, set_command, publish = decode_trace(message)
+                    self._complete_trace(seq, server_receive, set_command, publish)
+                elif message_type(message) == MSG_ACK:
+                    seq, client_timestamp, server_timestamp = decode_ack(message)
+                    self.acked_seq = seq
+                    print(f"[WS] 收到响应: seq={seq}")
+                return
             data = json.loads(message)
+            if 'trace' in data:
+                trace = data['trace']
+                self._complete_trace(trace['seq'], trace[SERVER_RECEIVE], trace[SET_COMMAND], trace[PUBLISH])
+                return
+            if 'ack' in data and isinstance(data['ack'], dict):
+                # 累计应答
+                self.acked_seq = data['ack']['seq']
+                print(f"[WS] 收到累计应答: {data['ack']}")
+                return
+            if 'protocol' in data:
+                self._hello_pending = False
+                self.protocol = data['protocol']
+                self.ack_mode = data.get('ack', ACK_EACH)
+                print(f"[WS] 协商使用协议: {self.protocol}，应答方式: {self.ack_mode}，无人机: {data.get('drone', '/')}")
+                return
+            if 'error' in data and (data.get('hello') or self._hello_pending):
+                self._hello_pending = False
+                if data.get('hello'):
+                    print(f"[WS] 握手被拒绝: {data['error']}，继续使用 JSON")
+                else:
+                    print("[WS] 服务端不支持握手，继续使用 JSON")
+                return
             print(f"[WS] 收到响应: {data}")
         except Exception as e:
             print(f"[WS] 消息解析失败: {e}, 原始消息: {message}")
@@ -22,40 +159,156 @@ class WebSocketControl:
 
     def on_close(self, wsapp, close_status_code, close_msg):
         print(f"[WS] 连接关闭: {close_status_code}, {close_msg}")
+        self._mark_disconnected()
+
+    def _mark_disconnected(self):
         self.ws_connected.clear()
+        self._hello_pending = False
+        self.protocol = PROTOCOL_JSON
+        self.ack_mode = ACK_EACH
+        if self._disconnected_at is None and self.opens:
+            self._disconnected_at = time.monotonic()
 
     def on_open(self, wsapp):
-        print("[WS] 已连接到服务器")
+        self.opens += 1
+        if self._disconnected_at is not None:
+            self.reconnects += 1
+            self.last_reconnect_time = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+            print(f"[WS] 已重新连接到服务器，断线 {self.last_reconnect_time * 1000:.0f}ms，待发送 {len(self.mailbox)} 条")
+        else:
+            print("[WS] 已连接到服务器")
+        if self.preferred_protocol != PROTOCOL_JSON or self.requested_ack != ACK_EACH or self.drone is not None:
+            # 协商完成前的命令仍以 JSON 发送，服务端两种格式都接受
+            self._hello_pending = True
+            with self.ws_lock:
+                wsapp.send(hello_message((self.preferred_protocol, PROTOCOL_JSON), self.requested_ack,
+                                         self.ack_interval, self.drone))
         self.ws_connected.set()
 
     def init_ws_connection(self):
-        """初始化 WebSocket 连接并启动线程"""
-        self.ws = websocket.WebSocketApp(
-            self.ws_url,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close
-        )
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
-
-    def send_move(self, x, y, z, r, t):
-        """发送控制命令，包括线速度 (x,y,z)、角速度 r（绕 Z 轴）和持续时间 t"""
-
-        def _send():
-            if not self.ws_connected.wait(timeout=5):  # 最多等待 5 秒连接
-                print("[MOVE] 等待连接超时，未发送命令")
-                return
-            # 构造包含 r 的消息
-            msg = {"x": x, "y": y, "z": z, "r": r, "t": t}
+        """初始化 WebSocket 连接并启动线程（连接监管线程与发送线程）"""
+        if self._supervisor is None:
+            self._supervisor = threading.Thread(target=self._supervise, name='ws-supervisor', daemon=True)
+            self._supervisor.start()
+        self._start_sender()
+
+    def _supervise(self):
+        """
+        连接监管：run_forever 返回（连接断开、心跳超时或连接失败）后按指数退避重连，
+        连接成功后退避时间恢复为 min_backoff
+        """
+        backoff = self.min_backoff
+        while not self._stopped.is_set():
+            opens = self.opens
+            self.ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self.on_open,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close
+            )
+            self.ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_timeout)
+            self._mark_disconnected()
+            if self.opens != opens:
+                # 本次连接成功过：从最短等待开始重连
+                backoff = self.min_backoff
+            if self._stopped.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _start_sender(self):
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_loop, name='ws-sender', daemon=True)
+            self._sender.start()
+
+    def _send_loop(self):
+        """发送线程：等待连接后依次发出信箱中的命令；等待期间新命令会覆盖旧命令，不会积压"""
+        while not self._stopped.is_set():
+            if not self.ws_connected.wait(timeout=0.5):
+                continue
+            item = self.mailbox.get(timeout=0.5)
+            if item is None:
+                continue
+            (msg, trace), must_deliver = item
             with self.ws_lock:
                 try:
-                    self.ws.send(json.dumps(msg))
+                    self._seq += 1
+                    now = time.time()
+                    if self.protocol == PROTOCOL_BINARY:
+                        frame = encode_command(self._seq, now, msg["x"], msg["y"], msg["z"], msg["r"], msg["t"],
+                                               FLAG_TRACE if trace is not None else 0)
+                        self.ws.send(frame, opcode=websocket.ABNF.OPCODE_BINARY)
+                    elif trace is not None:
+                        self.ws.send(json.dumps(dict(msg, seq=self._seq, trace=True)))
+                    elif self.ack_mode != ACK_EACH:
+                        # 不逐条应答时带上序号，累计应答与错误回复按序号对应
+                        self.ws.send(json.dumps(dict(msg, seq=self._seq)))
+                    else:
+                        self.ws.send(json.dumps(msg))
+                    if trace is not None:
+                        trace[SEND] = now
+                        self.tracker.start(self._seq, trace)
+                    self.sent += 1
                     print(f"[MOVE] 已发送命令: {msg}")
-                except Exception as e:frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                print(f"[MOVE] WebSocket 发送失败: {e}")
+                except Exception as e:
+                    if must_deliver:
+                        # 必达命令重连后重新发送
+                        self.mailbox.requeue((msg, trace))
+                    else:
+                        self.send_failed += 1
+                    print(f"[MOVE] WebSocket 发送失败: {e}")
+
+    def send_move(self, x, y, z, r, t, must_deliver=False):
+        """
+        发送控制命令，包括线速度 (x,y,z)、角速度 r（绕 Z 轴）和持续时间 t
+        命令放入信箱后立即返回；must_deliver 为 True 的命令不会被后续命令覆盖
+        """
+        # 构造包含 r 的消息
+        trace = getattr(self._trace_local, 'trace', None) if self.tracker is not None else None
+        if trace is not None:
+            trace = dict(trace)
+        self.mailbox.put(({"x": x, "y": y, "z": z, "r": r, "t": t}, trace), must_deliver)
+        self._start_sender()
+
+    @contextlib.contextmanager
+    def traced(self, trace):
+        """
+        在 with 块内发出的命令带上追踪上下文 trace（{时间戳名: time.time()}，例如采集、推理、识别完成时间）
+        未设置 tracker 时不做任何事
+        """
+        self._trace_local.trace = trace
+        try:
+            yield
+        finally:
+            self._trace_local.trace = None
+
+    def _complete_trace(self, seq, server_receive, set_command, publish):
+        if self.tracker is not None:
+            self.tracker.complete(seq, {SERVER_RECEIVE: server_receive, SET_COMMAND: set_command, PUBLISH: publish})
+
+    def stats(self):
+        """
+        发送与连接指标：已发送、被覆盖合并、丢弃（优先队列溢出与发送失败）、过期、待发送（队列深度）、
+        是否已连接、重连次数、最近一次重连用时（毫秒）、应答方式与最近一次应答的序号
+        """
+        return {
+            'sent': self.sent,
+            'coalesced': self.mailbox.coalesced,
+            'dropped': self.mailbox.dropped + self.send_failed,
+            'expired': self.mailbox.expired,
+            'pending': len(self.mailbox),
+            'connected': self.ws_connected.is_set(),
+            'reconnects': self.reconnects,
+            'last_reconnect_ms': None if self.last_reconnect_time is None else round(self.last_reconnect_time * 1000, 1),
+            'ack_mode': self.ack_mode,
+            'acked_seq': self.acked_seq,
+        }
 
-        threading.Thread(target=_send, daemon=True).start()
+    def close(self):
+        self._stopped.set()
+        if self.ws is not None:
+            self.ws.close()
 
     def action_palm(self, X, Y, V, R=0, T=0.5):
         self.send_move(X, Y, V, R, T)
@@ -84,8 +337,8 @@ class WebSocketControl:
         print("[INFO] 电机已启用（模拟）")
 
     def action_Pause(self):
-        # 立即停止所有运动
-        self.send_move(0, 0, 0, 0.0, 0.0)
+        # 立即停止所有运动（必达命令，插队发送）
+        self.send_move(0, 0, 0, 0.0, 0.0, must_deliver=True)
 
     def action_Rotate(self, R=-1.0, T=0.02):
         self.send_move(0, 0, 0, R, T)
@@ -0,0 +1,391 @@
+"""
+基于 asyncio 的无人机控制客户端
+
+一个事件循环可以同时驱动多条连接（多机场景），不再为每条命令创建线程：
+  - AsyncDroneClient：与 WebSocketControl 相同的 action_* 接口，命令进入异步发送队列，
+    每个 action_* 返回一个可 await 的 Future，在收到服务端对应的应答（{"status": "ok", ...} 或二进制应答帧）时完成；
+    使用累计应答时一次应答完成序号不大于它的所有 Future，关闭应答时 Future 在命令发出后即完成
+  - SyncDroneClient：给现有 OpenCV 循环使用的同步外观，所有连接共用一个后台事件循环线程
+连接断开时所有未完成的 Future 以 ConnectionError 结束，断线期间的新命令直接失败，后台按指数退避重连
+"""
+import asyncio
+import collections
+import contextlib
+import json
+import threading
+import time
+
+import websockets
+
+from command_protocol import (ACK_EACH, ACK_NONE, MSG_ACK, PROTOCOL_BINARY, PROTOCOL_JSON, decode_ack, encode_command,
+                              hello_message, message_type)
+
+
+class HandshakeRejected(ConnectionError):
+    """服务端拒绝握手（例如未知的无人机编号），重试也不会成功"""
+
+
+class AsyncDroneClient:
+    def __init__(self, url, protocol=PROTOCOL_JSON, queue_size=64, hello_timeout=1.0, ack_mode=ACK_EACH,
+                 ack_interval=None, drone=None, min_backoff=0.05, max_backoff=5.0):
+        """
+        :param protocol: 希望使用的协议，默认 JSON；为 PROTOCOL_BINARY 时连接时协商，服务端不支持则使用 JSON
+                         （不支持握手的旧服务端每次连接会记录一条错误）
+        :param queue_size: 发送队列长度，满时丢弃最旧的普通命令（必达命令不丢弃）；队列全是必达命令时新命令失败
+        :param ack_mode: 请求的应答方式（ACK_EACH / ACK_NONE / ACK_CUMULATIVE），服务端不支持则逐条应答
+        :param drone: 要控制的无人机编号（服务端控制多架无人机时），每架无人机使用一个客户端
+        :param min_backoff: 断线后第一次重连前的等待时间（秒），之后每次失败翻倍，最长 max_backoff
+        """
+        self.url = url
+        self.preferred_protocol = protocol
+        self.protocol = PROTOCOL_JSON
+        self.requested_ack = ack_mode
+        self.ack_interval = ack_interval
+        self.drone = drone
+        self.ack_mode = ACK_EACH
+        self._hello_pending = False  # 握手回复超时未到，之后收到的第一条回复是它而不是命令应答
+        self.queue_size = queue_size
+        self.hello_timeout = hello_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.ws = None
+        self._queue = collections.deque()
+        self._queue_ready = None
+        self._seq = 0
+        self._unacked = collections.OrderedDict()  # 序号 -> 等待应答的 Future，按发送顺序
+        self._supervisor = None
+        self._closed = False
+        self.sent = 0
+        self.acked = 0
+        self.dropped = 0
+        self.rejected = 0  # 未连接或队列已满而直接失败的命令数
+        self.opens = 0
+        self.reconnects = 0
+
+    async def connect(self):
+        """
+        连接服务端并启动连接监管：连接断开后按指数退避自动重连
+        第一次连接因网络错误失败时同样在后台重试（期间的命令直接失败）；握手被拒绝时抛出 HandshakeRejected
+        """
+        self._closed = False
+        self._queue_ready = asyncio.Event()
+        try:
+            await self._open()
+        except HandshakeRejected:
+            raise
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+            print(f"[WS] 连接失败: {e}，后台重试")
+        self._supervisor = asyncio.ensure_future(self._supervise())
+        return self
+
+    async def _open(self):
+        """建立一条连接并完成握手"""
+        ws = await websockets.connect(self.url)
+        protocol, ack_mode = PROTOCOL_JSON, ACK_EACH
+        self._hello_pending = False
+        if self.preferred_protocol != PROTOCOL_JSON or self.requested_ack != ACK_EACH or self.drone is not None:
+            await ws.send(hello_message((self.preferred_protocol, PROTOCOL_JSON), self.requested_ack,
+                                        self.ack_interval, self.drone))
+            try:
+                reply = json.loads(await asyncio.wait_for(ws.recv(), self.hello_timeout))
+                if 'error' in reply and reply.get('hello'):
+                    await ws.close()
+                    raise HandshakeRejected(f"握手失败: {reply['error']}")
+                # 不支持握手的旧服务端拒绝握手（回复不带 hello 的错误），回复中没有 protocol 与 ack 字段
+                protocol = reply.get('protocol', PROTOCOL_JSON)
+                ack_mode = reply.get('ack', ACK_EACH)
+            except asyncio.TimeoutError:
+                # 先按 JSON 逐条应答发送；服务端按顺序回复，回复到达后由 _receive_loop 处理
+                self._hello_pending = True
+                print(f"[WS] {self.hello_timeout}s 内没有收到握手回复，先使用 JSON")
+        self.ws, self.protocol, self.ack_mode = ws, protocol, ack_mode
+        self.opens += 1
+        print(f"[WS] 已连接到服务器 {self.url}，协议 {self.protocol}，应答方式 {self.ack_mode}"
+              + (f"，无人机 {self.drone}" if self.drone is not None else ""))
+
+    async def _supervise(self):
+        """连接监管：连接断开后从 min_backoff 开始按指数退避重连，连接成功后退避时间恢复"""
+        backoff = self.min_backoff
+        while not self._closed:
+            if self.ws is None:
+                await asyncio.sleep(backoff)
+                try:
+                    await self._open()
+                except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                    backoff = min(backoff * 2, self.max_backoff)
+                    print(f"[WS] 重连失败: {e}，{backoff:.2f}s 后重试")
+                    continue
+                if self.opens > 1:
+                    self.reconnects += 1
+                backoff = self.min_backoff
+            await self._serve_connection(self.ws)
+
+    async def _serve_connection(self, ws):
+        """运行一条连接的发送与接收任务，任意一个结束（连接断开）后让等待中的命令全部失败"""
+        tasks = [asyncio.ensure_future(self._send_loop(ws)), asyncio.ensure_future(self._receive_loop(ws))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception) and not isinstance(result, websockets.ConnectionClosed):
+                    print(f"[WS] 连接任务异常: {result!r}")
+            self.ws = None
+            self.protocol, self.ack_mode = PROTOCOL_JSON, ACK_EACH
+            self._fail_pending(ConnectionError("连接已关闭"))
+            await ws.close()
+        if not self._closed:
+            print(f"[WS] 连接已断开，{self.min_backoff}s 后重连")
+
+    def send_move(self, x, y, z, r, t, must_deliver=False):
+        """
+        命令放入发送队列后立即返回（需在事件循环线程中调用）
+        :return: 收到应答时完成的 Future，结果为应答内容；未连接或队列已满时 Future 直接以异常完成
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._closed or self.ws is None:
+            self.rejected += 1
+            future.set_exception(ConnectionError("客户端已关闭" if self._closed else "未连接到服务器，命令未发送"))
+            return future
+        if len(self._queue) >= self.queue_size and not self._drop_oldest():
+            self.rejected += 1
+            future.set_exception(OverflowError(f"发送队列已满（{len(self._queue)} 条必达命令等待发送）"))
+            return future
+        self._queue.append(((x, y, z, r, t), must_deliver, future))
+        self._queue_ready.set()
+        return future
+
+    def _drop_oldest(self):
+        """丢弃最旧的普通命令，队列中全是必达命令时返回 False"""
+        for i, (_, must_deliver, future) in enumerate(self._queue):
+            if not must_deliver:
+                del self._queue[i]
+                future.cancel()
+                self.dropped += 1
+                return True
+        return False
+
+    async def _send_loop(self, ws):
+        while True:
+            if not self._queue:
+                self._queue_ready.clear()
+                await self._queue_ready.wait()
+                continue
+            (x, y, z, r, t), _, future = self._queue.popleft()
+            if future.cancelled():
+                continue
+            self._seq += 1
+            if self.ack_mode != ACK_NONE:
+                self._unacked[self._seq] = future
+            try:
+                if self.protocol == PROTOCOL_BINARY:
+                    await ws.send(encode_command(self._seq, time.time(), x, y, z, r, t))
+                elif self.ack_mode == ACK_EACH:
+                    await ws.send(json.dumps({"x": x, "y": y, "z": z, "r": r, "t": t}))
+                else:
+                    await ws.send(json.dumps({"x": x, "y": y, "z": z, "r": r, "t": t, "seq": self._seq}))
+            except websockets.ConnectionClosed:
+                self._unacked.pop(self._seq, None)
+                if not future.done():
+                    future.set_exception(ConnectionError("连接已关闭，命令未发送"))
+                return
+            self.sent += 1
+            if self.ack_mode == ACK_NONE and not future.done():
+                future.set_result({"status": "sent", "seq": self._seq})
+
+    async def _receive_loop(self, ws):
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    if message_type(message) == MSG_ACK:
+                        # 服务端按顺序执行，应答某个序号即表示之前的命令都已执行（逐条应答时之前的已完成）
+                        seq, _, server_timestamp = decode_ack(message)
+                        self._resolve_through(seq, {"status": "ok", "seq": seq, "server_timestamp": server_timestamp})
+                    continue
+                data = json.loads(message)
+                if self._hello_pending:
+                    # 超时后到达的握手回复：连接上的第一条回复，不能当作第一条未应答命令的应答
+                    self._hello_pending = False
+                    await self._late_hello(ws, data)
+                    continue
+                if isinstance(data.get('ack'), dict):
+                    ack = data['ack']
+                    if ack.get('seq') is not None:
+                        self._resolve_through(ack['seq'], {"status": "ok", **ack})
+                    else:
+                        for seq in list(self._unacked)[:ack.get('count', 0)]:
+                            self._resolve(seq, {"status": "ok", **ack})
+                elif 'error' in data and 'seq' in data:
+                    self._resolve(data['seq'], data)
+                elif 'status' in data or 'error' in data:
+                    # JSON 应答不带序号，服务端按顺序逐条应答
+                    self._resolve(next(iter(self._unacked), None), data)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _late_hello(self, ws, reply):
+        """
+        处理超时后到达的握手回复：服务端此时已按握手处理之后收到的命令，切换到协商结果；
+        服务端不再逐条应答时，已发出、等待逐条应答的命令不会再收到应答，视为已发送
+        """
+        if 'error' in reply and reply.get('hello'):
+            # 握手被拒绝，之前的命令已发给默认无人机；断开连接，由连接监管重连
+            print(f"[WS] 握手被拒绝: {reply['error']}，断开连接")
+            await ws.close()
+            return
+        self.protocol = reply.get('protocol', PROTOCOL_JSON)
+        self.ack_mode = reply.get('ack', ACK_EACH)
+        print(f"[WS] 收到超时的握手回复，协议 {self.protocol}，应答方式 {self.ack_mode}")
+        if self.ack_mode == ACK_NONE:
+            for seq, future in self._unacked.items():
+                if not future.done():
+                    future.set_result({"status": "sent", "seq": seq})
+            self._unacked.clear()
+
+    def _resolve(self, seq, reply):
+        future = self._unacked.pop(seq, None)
+        if future is None or future.done():
+            return
+        self.acked += 1
+        if 'error' in reply:
+            future.set_exception(RuntimeError(reply['error']))
+        else:
+            future.set_result(reply)
+
+    def _resolve_through(self, seq, reply):
+        while self._unacked and next(iter(self._unacked)) <= seq:
+            self._resolve(next(iter(self._unacked)), reply)
+
+    def _fail_pending(self, error):
+        for future in list(self._unacked.values()) + [future for _, _, future in self._queue]:
+            if not future.done():
+                future.set_exception(error)
+        self._unacked.clear()
+        self._queue.clear()
+
+    def stats(self):
+        return {'sent': self.sent, 'acked': self.acked, 'dropped': self.dropped, 'rejected': self.rejected,
+                'pending': len(self._queue), 'unacked': len(self._unacked), 'ack_mode': self.ack_mode,
+                'connected': self.ws is not None, 'reconnects': self.reconnects}
+
+    async def close(self):
+        self._closed = True
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._supervisor
+        if self.ws is not None:
+            await self.ws.close()
+        self._fail_pending(ConnectionError("客户端已关闭"))
+
+    def action_palm(self, X, Y, V, R=0, T=0.5):
+        return self.send_move(X, Y, V, R, T)
+
+    # 各动作封装函数（与 WebSocketControl 相同）
+    def action_Thumbs_Up(self, V=2.0, T=0.05):
+        return self.send_move(0, 0, V, 0.0, T)
+
+    def action_Thumbs_Down(self, V=2.0, T=0.05):
+        return self.send_move(0, 0, -V, 0.0, T)
+
+    def action_Forward(self, V=2.0, T=0.05):
+        return self.send_move(-V, 0, 0, 0.0, T)
+
+    def action_Backward(self, V=2.0, T=0.05):
+        return self.send_move(V, 0, 0, 0.0, T)
+
+    def action_Right(self, V=2.0, T=0.05):
+        return self.send_move(0, V, 0, 0.0, T)
+
+    def action_Left(self, V=2.0, T=0.05):
+        return self.send_move(0, -V, 0, 0.0, T)
+
+    def action_OK(self):
+        print("[INFO] 电机已启用（模拟）")
+
+    def action_Pause(self):
+        # 立即停止所有运动（必达命令，队列满时也不会被丢弃）
+        return self.send_move(0, 0, 0, 0.0, 0.0, must_deliver=True)
+
+    def action_Rotate(self, R=-1.0, T=0.02):
+        return self.send_move(0, 0, 0, R, T)
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def shared_event_loop():
+    """所有 SyncDroneClient 共用的后台事件循环"""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=loop.run_forever, name='drone-event-loop', daemon=True)
+            _loop_thread.loop = loop
+            _loop_thread.start()
+    return _loop_thread.loop
+
+
+class SyncDroneClient:
+    """
+    AsyncDroneClient 的同步外观，可直接替换 WebSocketControl：
+    action_* 立即返回 concurrent.futures.Future（需要时调用 .result() 等待应答）
+    """
+
+    def __init__(self, ws_url, loop=None, **options):
+        self.loop = loop or shared_event_loop()
+        self.client = AsyncDroneClient(ws_url, **options)
+
+    def init_ws_connection(self, timeout=5.0):
+        asyncio.run_coroutine_threadsafe(self.client.connect(), self.loop).result(timeout)
+
+    def _call(self, method, *args, **kwargs):
+        async def call():
+            return await getattr(self.client, method)(*args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(call(), self.loop)
+
+    def send_move(self, x, y, z, r, t, must_deliver=False):
+        return self._call('send_move', x, y, z, r, t, must_deliver)
+
+    def stats(self):
+        return self.client.stats()
+
+    @contextlib.contextmanager
+    def traced(self, trace):
+        """延迟追踪只由 WebSocketControl 支持，这里不做任何事"""
+        yield
+
+    def close(self, timeout=5.0):
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result(timeout)
+
+    def action_palm(self, X, Y, V, R=0, T=0.5):
+        return self.send_move(X, Y, V, R, T)
+
+    def action_Thumbs_Up(self, V=2.0, T=0.05):
+        return self._call('action_Thumbs_Up', V, T)
+
+    def action_Thumbs_Down(self, V=2.0, T=0.05):
+        return self._call('action_Thumbs_Down', V, T)
+
+    def action_Forward(self, V=2.0, T=0.05):
+        return self._call('action_Forward', V, T)
+
+    def action_Backward(self, V=2.0, T=0.05):
+        return self._call('action_Backward', V, T)
+
+    def action_Right(self, V=2.0, T=0.05):
+        return self._call('action_Right', V, T)
+
+    def action_Left(self, V=2.0, T=0.05):
+        return self._call('action_Left', V, T)
+
+    def action_OK(self):
+        self.client.action_OK()
+
+    def action_Pause(self):
+        return self._call('action_Pause')
+
+    def action_Rotate(self, R=-1.0, T=0.02):
+        return self._call('action_Rotate', R, T)
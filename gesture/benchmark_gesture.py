@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+手势分类热路径基准测试（无需摄像头与 MediaPipe）
+
+在合成或录制的关键点数据上测量：
+  - compute_angle / compute_hand_features / detect_all_finger_state / 各 judge_* 的单次耗时（ns/call）
+  - detect_all_finger_state + detect_hand_state 完整链路的帧率（frames/s）
+  - classify_batch 的批量帧率
+结果可写入 JSON 文件，并可与上一版本的结果文件对比，发现分类器变慢
+
+用法：
+  python benchmark_gesture.py --output bench.json
+  python benchmark_gesture.py --fixture session.lms --baseline bench_prev.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+import gesture_judgment
+from landmark_session import SESSION_SUFFIX, SessionReplay
+
+JUDGE_NAMES = ('OK', 'Return', 'Left', 'Right', 'Thumbs_up', 'Rotation', 'Thumbs_Down', 'Palm_No_Thumb')
+
+# 合成手部骨架：五根手指的初始方向（弧度，-π/2 为竖直向上）与每节指骨长度（像素）
+_FINGER_BASE_ANGLES = np.array([-2.3, -1.9, -1.6, -1.35, -1.1])
+_FINGER_SEGMENT_LENGTHS = np.array([
+    [40, 35, 30, 25],
+    [90, 45, 28, 22],
+    [88, 50, 32, 24],
+    [84, 45, 30, 22],
+    [80, 35, 22, 20],
+], dtype=np.float64)
+
+
+def synthetic_landmarks(count, seed=0):
+    """
+    生成 count 帧合成关键点 (count, 21, 2)，像素坐标已取整，与 gesture_match 中的输入一致
+    每根手指随机伸直 / 半弯 / 握起，再叠加随机旋转、缩放、平移、镜像与噪声，能覆盖各类手势
+    """
+    rng = np.random.default_rng(seed)
+    landmarks = np.empty((count, 21, 2))
+    for k in range(count):
+        points = [np.zeros(2)]
+        for finger in range(5):
+            angle = _FINGER_BASE_ANGLES[finger]
+            position = np.zeros(2)
+            curl = rng.choice([0.0, rng.uniform(0, 1.6), 1.4])
+            for joint in range(4):
+                if joint > 0:
+                    # 大拇指向另一侧弯曲
+                    angle += curl * rng.uniform(0.5, 1.2) * (1 if finger > 0 else -0.6)
+                position = position + _FINGER_SEGMENT_LENGTHS[finger, joint] * np.array([np.cos(angle), np.sin(angle)])
+                points.append(position)
+        points = np.array(points)
+
+        rotation = rng.uniform(-np.pi, np.pi) if rng.random() < 0.5 else rng.normal(0, 0.4)
+        c, s = np.cos(rotation), np.sin(rotation)
+        points = points @ np.array([[c, -s], [s, c]]).T * rng.uniform(0.5, 2.0)
+        points += rng.uniform(100, 500, 2) + rng.normal(0, 3, (21, 2))
+        if rng.random() < 0.5:
+            points[:, 0] = 600 - points[:, 0]
+        landmarks[k] = np.trunc(points)
+    return landmarks
+
+
+def load_fixture(path):
+    """
+    读取录制的关键点：.lms 为 landmark_session 录制文件（取第一只手），
+    .npy 为 (N, 21, 2) 数组，.npz 读取其中的 landmarks 数组
+    """
+    if path.endswith(SESSION_SUFFIX):
+        return SessionReplay(path).pixel_landmarks()[0]
+    data = np.load(path)
+    if isinstance(data, np.lib.npyio.NpzFile):
+        data = data['landmarks']
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim != 3 or data.shape[1:] != (21, 2):
+        raise ValueError(f"{path}: 关键点形状应为 (N, 21, 2)，实际为 {data.shape}")
+    return data
+
+
+def _time_per_call(func, args_list, repeat):
+    """对 args_list 中的每组参数各调用一次，重复 repeat 轮取最快一轮，返回平均 ns/call"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for args in args_list:
+            func(*args)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(args_list)
+
+
+def run_benchmark(landmarks, repeat=5):
+    """在给定关键点上运行全部基准，返回结果字典"""
+    frames = [np.asarray(points, dtype=np.float64) for points in landmarks]
+    features = [gesture_judgment.compute_hand_features(points) for points in frames]
+    states = [gesture_judgment.detect_all_finger_state(feature) for feature in features]
+    state_args = [(feature, bend, straighten) for feature, (bend, straighten) in zip(features, states)]
+    # compute_angle 的标量输入：食指弯曲角，与旧代码中的调用方式相同
+    angle_args = [tuple(points[[0, 5, 6, 8]].ravel().tolist()) for points in frames]
+
+    ns_per_call = {
+        'compute_angle': _time_per_call(gesture_judgment.compute_angle, angle_args, repeat),
+        'compute_hand_features': _time_per_call(gesture_judgment.compute_hand_features, [(points,) for points in frames], repeat),
+        'detect_all_finger_state': _time_per_call(gesture_judgment.detect_all_finger_state, [(feature,) for feature in features], repeat),
+        'detect_hand_state': _time_per_call(gesture_judgment.detect_hand_state, state_args, repeat),
+    }
+    for name in JUDGE_NAMES:
+        ns_per_call[f'judge_{name}'] = _time_per_call(getattr(gesture_judgment, f'judge_{name}'), state_args, repeat)
+
+    def chain(points):
+        feature = gesture_judgment.compute_hand_features(points)
+        bend_states, straighten_states = gesture_judgment.detect_all_finger_state(feature)
+        return gesture_judgment.detect_hand_state(feature, bend_states, straighten_states)
+
+    chain_ns = _time_per_call(chain, [(points,) for points in frames], repeat)
+    batch_ns = _time_per_call(gesture_judgment.classify_batch, [(np.asarray(landmarks, dtype=np.float64),)], repeat) / len(frames)
+
+    labels = [gesture_judgment.detect_hand_state(*args) for args in state_args]
+    return {
+        'ns_per_call': {name: round(value, 1) for name, value in ns_per_call.items()},
+        'frames_per_second': {
+            'chain': round(1e9 / chain_ns, 1),
+            'classify_batch': round(1e9 / batch_ns, 1),
+        },
+        'label_counts': {label: labels.count(label) for label in sorted(set(labels))},
+    }
+
+
+def compare_results(current, baseline, tolerance):
+    """对比两次结果，返回变慢超过 tolerance（比例）的条目列表"""
+    regressions = []
+    for name, value in current['ns_per_call'].items():
+        old = baseline.get('ns_per_call', {}).get(name)
+        if old and value > old * (1 + tolerance):
+            regressions.append(f"{name}: {old:.1f} -> {value:.1f} ns/call (+{(value / old - 1) * 100:.0f}%)")
+    for name, value in current['frames_per_second'].items():
+        old = baseline.get('frames_per_second', {}).get(name)
+        if old and value < old * (1 - tolerance):
+            regressions.append(f"{name}: {old:.0f} -> {value:.0f} frames/s ({(value / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="手势分类热路径基准测试")
+    parser.add_argument('--fixture', action='append', default=[], help="录制的关键点文件（.lms / .npy / .npz），可重复指定")
+    parser.add_argument('--synthetic', type=int, default=2000, help="合成关键点帧数，0 表示不使用合成数据")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据随机种子")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复轮数，取最快一轮")
+    parser.add_argument('--output', help="结果写入的 JSON 文件")
+    parser.add_argument('--baseline', help="上一版本的结果 JSON，用于对比")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="判定为变慢的比例阈值")
+    args = parser.parse_args(argv)
+
+    fixtures = {}
+    if args.synthetic > 0:
+        fixtures['synthetic'] = synthetic_landmarks(args.synthetic, args.seed)
+    for path in args.fixture:
+        fixtures[path] = load_fixture(path)
+    if not fixtures:
+        parser.error("没有可用的关键点数据")
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+        },
+        'fixtures': {},
+    }
+    for name, landmarks in fixtures.items():
+        result = run_benchmark(landmarks, args.repeat)
+        result['frames'] = len(landmarks)
+        results['fixtures'][name] = result
+
+        print(f"== {name} ({len(landmarks)} 帧)")
+        for func, value in result['ns_per_call'].items():
+            print(f"  {func:<26} {value:>12.1f} ns/call")
+        for chain, value in result['frames_per_second'].items():
+            print(f"  {chain:<26} {value:>12.0f} frames/s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, result in results['fixtures'].items():
+            if name in baseline.get('fixtures', {}):
+                regressions += [f"[{name}] {line}" for line in
+                                compare_results(result, baseline['fixtures'][name], args.tolerance)]
+        if regressions:
+            print("性能回退：")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("与基准相比无性能回退")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
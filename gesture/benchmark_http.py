@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+HTTP 命令发送基准测试：在本机启动一个替身服务（实现 /move 与 /move_batch），对比
+  - legacy：旧实现，每条命令一个线程 + 不带 Session 的 requests.post（每次新建 TCP 连接）
+  - serialize：HTTPTransport 单工作线程 + 连接池，逐条发送
+  - coalesce：HTTPTransport 只发送最新一条命令
+  - batch：HTTPTransport 把积压的命令合并为一次 /move_batch 请求
+输出请求数/s、送达命令数/s 与命令延迟（入队到收到响应）的 p50/p95
+
+用法：
+  python benchmark_http.py --commands 500 --rate 0
+  python benchmark_http.py --serve --port 8080     # 只启动替身服务
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from Quadrotor_HTTP import HTTPTransport
+
+MODES = ('legacy', 'serialize', 'coalesce', 'batch')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """无人机 HTTP 服务的替身：解析命令并立即回复"""
+    protocol_version = 'HTTP/1.1'  # 支持保持连接
+    # 响应头与响应体分两次写出，保持连接时 Nagle 算法与延迟确认会让每个请求多等约 40ms
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        data = json.loads(body)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.path == '/move':
+            reply = {'status': 'ok', **data}
+        elif self.path == '/move_batch':
+            reply = {'status': 'ok', 'count': len(data['setpoints'])}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server(port=0, delay=0.0):
+    """在后台线程启动替身服务，返回 (server, base_url)"""
+    handler = type('Handler', (StandInHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _legacy_send_move(base_url, x, y, z, t, latencies):
+    """旧实现：每条命令一个线程，不使用 Session"""
+    queued = time.perf_counter()
+
+    def _send():
+        try:
+            resp = requests.post(f"{base_url}/move", headers={'Content-Type': 'application/json'},
+                                 json={'x': x, 'y': y, 'z': z, 't': t}, timeout=5)
+            resp.raise_for_status()
+            resp.json()
+            latencies.append(time.perf_counter() - queued)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=_send, daemon=True)
+    thread.start()
+    return thread
+
+
+def run_mode(mode, base_url, commands, rate):
+    """以 rate 条/s（0 表示不限速）发送 commands 条命令，返回统计结果"""
+    interval = 1.0 / rate if rate > 0 else 0.0
+    latencies = []
+    threads = []
+    transport = None
+    if mode != 'legacy':
+        transport = HTTPTransport(base_url, mode='coalesce' if mode == 'coalesce' else 'serialize',
+                                  batch=mode == 'batch', max_pending=commands, max_age=None, verbose=False)
+
+    start = time.perf_counter()
+    for i in range(commands):
+        if interval:
+            time.sleep(max(0.0, start + i * interval - time.perf_counter()))
+        if transport is None:
+            threads.append(_legacy_send_move(base_url, i * 0.01, 0, 0, 0.05, latencies))
+        else:
+            transport.send_move(i * 0.01, 0, 0, 0.05)
+
+    if transport is None:
+        for thread in threads:
+            thread.join()
+        request_count = delivered = len(latencies)
+    else:
+        transport.flush()
+        latencies = list(transport.latencies)
+        request_count, delivered = transport.requests, transport.commands
+        transport.close()
+    elapsed = time.perf_counter() - start
+
+    p50, p95 = np.percentile(latencies, (50, 95)) * 1000 if latencies else (float('nan'),) * 2
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': request_count,
+        'delivered': delivered,
+        'requests_per_s': round(request_count / elapsed, 1),
+        'commands_per_s': round(delivered / elapsed, 1),
+        'latency_p50_ms': round(float(p50), 2),
+        'latency_p95_ms': round(float(p95), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP 命令发送基准测试")
+    parser.add_argument('--commands', type=int, default=500, help="每种方式发送的命令数")
+    parser.add_argument('--rate', type=float, default=0.0, help="发送速率（条/s），0 表示不限速")
+    parser.add_argument('--mode', action='append', choices=MODES, help="只测试指定方式，可重复指定")
+    parser.add_argument('--server-delay', type=float, default=0.0, help="替身服务每个请求的处理时间（秒）")
+    parser.add_argument('--url', help="使用已有的服务而不是启动替身服务")
+    parser.add_argument('--serve', action='store_true', help="只启动替身服务")
+    parser.add_argument('--port', type=int, default=8080, help="--serve 时的监听端口")
+    parser.add_argument('--output', help="结果写入的 JSON 文件")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        server, base_url = start_stand_in_server(args.port, args.server_delay)
+        print(f"替身服务已启动：{base_url}（Ctrl+C 退出）")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    base_url = args.url
+    if base_url is None:
+        _, base_url = start_stand_in_server(delay=args.server_delay)
+
+    results = {}
+    for mode in args.mode or MODES:
+        results[mode] = result = run_mode(mode, base_url, args.commands, args.rate)
+        print(f"{mode:<10} {result['requests_per_s']:>8.1f} req/s {result['commands_per_s']:>8.1f} cmd/s "
+              f"送达 {result['delivered']:>5}  p50 {result['latency_p50_ms']:>8.2f}ms  p95 {result['latency_p95_ms']:>8.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'commands': args.commands, 'rate': args.rate, 'results': results}, f, indent=2)
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+控制命令的二进制协议（客户端 gesture/ 与服务端 simulation/control/ 各有一份相同的副本）
+
+连接建立后客户端发送 JSON 握手 {"hello": {"protocols": [...]}, "t": "hello"}，服务端回复
+{"status": "ok", "protocol": 选中的协议}；握手失败（例如未知的无人机）时回复 {"error": ..., "hello": true}
+握手中的 "t" 不是数字：不支持握手的旧服务端把握手当作命令解析时出错并回复 {"error": ...}（不带 hello），
+不会执行成一条零速度命令（否则每次连接 / 重连都会让无人机停下）；客户端收到这样的回复后继续使用 JSON
+
+握手中可以带应答方式 "ack"（服务端在回复中给出实际采用的方式，没有 ack 字段即为 each）：
+  - each：每条命令回复一次（默认，与旧服务端相同）
+  - none：不回复（出错时仍回复 {"error": ...}）
+  - cumulative：每隔 "ack_interval" 秒（有新命令时）回复一次累计应答，带最后一条已执行命令的序号，
+    表示该序号及之前的命令都已执行：二进制应答帧带 FLAG_CUMULATIVE，JSON 为 {"ack": {"seq": ..., "count": 条数}}
+  不逐条应答时 JSON 命令应带 "seq"
+
+多机：握手中的 "drone" 选择本连接控制的无人机（编号即 ROS 命名空间，回复中给出实际选中的 "drone"）；
+JSON 命令可以带 "drone" 临时指定其他无人机。握手中的 "drones": [...] 请求为这些无人机分配槽位，
+回复 "drones": {编号: 槽位}，二进制命令帧的保留字段填槽位即发给对应无人机（0 表示本连接选中的无人机）
+
+二进制命令帧（小端，36 字节）：
+  类型 u8 | 标志 u8 | 无人机槽位 u16 | 序号 u32 | 客户端时间戳 f64 | x y z r t f32
+二进制应答帧（小端，24 字节）：
+  类型 u8 | 标志 u8 | 保留 u16 | 序号 u32 | 客户端时间戳 f64（原样回传）| 服务端接收时间戳 f64
+二进制追踪帧（小端，32 字节，命令带 FLAG_TRACE 时在首次发布 /cmd_vel 后发送）：
+  类型 u8 | 标志 u8 | 保留 u16 | 序号 u32 | 服务端接收 f64 | set_command f64 | 首次发布 f64
+
+JSON 命令中带 "seq" 与 "trace": true 时，服务端同样在首次发布后回复
+{"trace": {"seq": ..., "server_receive": ..., "set_command": ..., "publish": ...}}
+"""
+import json
+import struct
+
+PROTOCOL_JSON = 'json'
+PROTOCOL_BINARY = 'bin1'
+SUPPORTED_PROTOCOLS = (PROTOCOL_BINARY, PROTOCOL_JSON)
+
+MSG_COMMAND = 1
+MSG_ACK = 2
+MSG_TRACE = 3
+
+FLAG_TRACE = 0x01  # 请求服务端回传追踪时间戳
+FLAG_CUMULATIVE = 0x02  # 应答帧：累计应答，序号及之前的命令都已执行
+
+ACK_EACH = 'each'
+ACK_NONE = 'none'
+ACK_CUMULATIVE = 'cumulative'
+ACK_MODES = (ACK_EACH, ACK_NONE, ACK_CUMULATIVE)
+DEFAULT_ACK_INTERVAL = 0.1
+
+COMMAND_STRUCT = struct.Struct('<BBHId5f')
+ACK_STRUCT = struct.Struct('<BBHIdd')
+TRACE_STRUCT = struct.Struct('<BBHIddd')
+DRONE_SLOT_STRUCT = struct.Struct('<H')
+
+
+def encode_command(seq, timestamp, x, y, z, r, t, flags=0, drone_slot=0):
+    return COMMAND_STRUCT.pack(MSG_COMMAND, flags, drone_slot, seq & 0xFFFFFFFF, timestamp, x, y, z, r, t)
+
+
+def decode_command(data):
+    """:return: (序号, 标志, 客户端时间戳, x, y, z, r, t)"""
+    if len(data) != COMMAND_STRUCT.size or data[0] != MSG_COMMAND:
+        raise ValueError(f"无效的二进制命令帧（{len(data)} 字节）")
+    _, flags, _, seq, timestamp, x, y, z, r, t = COMMAND_STRUCT.unpack(data)
+    return seq, flags, timestamp, x, y, z, r, t
+
+
+def command_drone_slot(data):
+    """二进制命令帧中的无人机槽位（0 表示连接默认的无人机）"""
+    return DRONE_SLOT_STRUCT.unpack_from(data, 2)[0]
+
+
+def encode_ack(seq, client_timestamp, server_timestamp, flags=0):
+    return ACK_STRUCT.pack(MSG_ACK, flags, 0, seq & 0xFFFFFFFF, client_timestamp, server_timestamp)
+
+
+def decode_ack(data):
+    """:return: (序号, 客户端时间戳, 服务端接收时间戳)"""
+    if len(data) != ACK_STRUCT.size or data[0] != MSG_ACK:
+        raise ValueError(f"无效的二进制应答帧（{len(data)} 字节）")
+    _, _, _, seq, client_timestamp, server_timestamp = ACK_STRUCT.unpack(data)
+    return seq, client_timestamp, server_timestamp
+
+
+def encode_trace(seq, server_receive, set_command, publish):
+    return TRACE_STRUCT.pack(MSG_TRACE, 0, 0, seq & 0xFFFFFFFF, server_receive, set_command, publish)
+
+
+def decode_trace(data):
+    """:return: (序号, 服务端接收, set_command, 首次发布)"""
+    if len(data) != TRACE_STRUCT.size or data[0] != MSG_TRACE:
+        raise ValueError(f"无效的二进制追踪帧（{len(data)} 字节）")
+    _, _, _, seq, server_receive, set_command, publish = TRACE_STRUCT.unpack(data)
+    return seq, server_receive, set_command, publish
+
+
+def message_type(data):
+    """二进制帧的类型"""
+    return data[0] if data else None
+
+
+def hello_message(protocols=SUPPORTED_PROTOCOLS, ack=ACK_EACH, ack_interval=None, drone=None, drones=None):
+    hello = {"protocols": list(protocols)}
+    if ack != ACK_EACH:
+        hello["ack"] = ack
+    if ack_interval is not None:
+        hello["ack_interval"] = ack_interval
+    if drone is not None:
+        hello["drone"] = drone
+    if drones:
+        hello["drones"] = list(drones)
+    # 非数字的持续时间使旧服务端拒绝这条消息，而不是当作停止命令执行
+    return json.dumps({"hello": hello, "t": "hello"})
+
+
+def choose_protocol(offered):
+    """按客户端给出的优先顺序选出双方都支持的协议"""
+    for protocol in offered:
+        if protocol in SUPPORTED_PROTOCOLS:
+            return protocol
+    return PROTOCOL_JSON
+
+
+def choose_ack(hello):
+    """:return: (应答方式, 累计应答间隔秒数)，不认识的方式按 each 处理"""
+    ack = hello.get("ack", ACK_EACH)
+    if ack not in ACK_MODES:
+        ack = ACK_EACH
+    return ack, max(float(hello.get("ack_interval", DEFAULT_ACK_INTERVAL)), 0.01)
@@ -0,0 +1,137 @@
+"""
+手掌位置连续控制：由一只手的关键点计算油门、水平位置、横滚、俯仰与急停
+
+- 关键点拷贝进预分配的 float32 数组，手掌中心、食指方向与拇指开合在一次向量化计算中得到
+- 滤波状态保存在 ContinuousController 实例中（浮点精度），每只手 / 每架无人机各用一个实例即可并行运行
+- 用 One-Euro 自适应低通滤波代替固定系数：手静止时截止频率低、抑制抖动，手快速移动时截止频率升高、减小滞后
+"""
+import math
+import time
+
+import numpy as np
+
+# MediaPipe 关键点下标
+WRIST = 0
+THUMB_MCP = 2
+THUMB_TIP = 4
+INDEX_FINGER_TIP = 8
+
+THROTTLE_DEADZONE = 0.15  # 油门死区（原0.1→0.15）
+DEADZONE_X = 0.15  # 水平方向死区
+ROLL_DEADZONE = 0.1  # 横滚死区（原0.05→0.1）
+PITCH_DEADZONE = 0.1  # 俯仰死区（原0.05→0.1）
+EMERGENCY_STOP_DISTANCE = 0.05  # 握拳急停阈值
+
+# 控制量通道及各自的死区与满量程
+CHANNELS = ('throttle', 'throttle_x', 'roll', 'pitch')
+_DEADZONES = np.array([THROTTLE_DEADZONE, DEADZONE_X, ROLL_DEADZONE, PITCH_DEADZONE], dtype=np.float32)
+_SCALES = np.array([100, 100, 50, 50], dtype=np.float32)  # 油门 / 水平 -100~100，横滚 / 俯仰 -50~50
+
+# 一次取出两组向量：食指指尖 - 手腕（方向）、拇指指尖 - 拇指根部（握拳检测）
+_VECTOR_TIPS = np.array([INDEX_FINGER_TIP, THUMB_TIP])
+_VECTOR_BASES = np.array([WRIST, THUMB_MCP])
+
+
+class OneEuroFilter:
+    """
+    向量化的 One-Euro 滤波器：所有通道共用时间戳，一次更新
+    截止频率 = min_cutoff + beta * |滤波后的变化速度|
+    """
+
+    def __init__(self, size, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        """
+        :param min_cutoff: 静止时的截止频率（Hz），越小越平滑
+        :param beta: 速度系数，越大快速移动时滞后越小
+        :param d_cutoff: 变化速度本身的截止频率（Hz）
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = np.zeros(size, dtype=np.float64)
+        self.derivative = np.zeros(size, dtype=np.float64)
+        self.timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, values, timestamp):
+        """:return: 滤波后的值（内部数组，调用方不应修改）"""
+        if self.timestamp is None:
+            self.value[:] = values
+            self.derivative[:] = 0.0
+            self.timestamp = timestamp
+            return self.value
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+        derivative = (values - self.value) / dt
+        self.derivative += self._alpha(self.d_cutoff, dt) * (derivative - self.derivative)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        self.value += self._alpha(cutoff, dt) * (values - self.value)
+        return self.value
+
+    def reset(self):
+        self.timestamp = None
+
+
+class ContinuousController:
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, clock=time.monotonic):
+        """
+        :param min_cutoff: One-Euro 静止时的截止频率（Hz）
+        :param beta: One-Euro 速度系数（控制量单位 / 秒）
+        :param clock: 未给出时间戳时使用的时钟
+        """
+        self.clock = clock
+        self.filter = OneEuroFilter(len(CHANNELS), min_cutoff, beta, d_cutoff)
+        self._points = np.empty((21, 2), dtype=np.float32)
+        self._raw = np.empty(len(CHANNELS), dtype=np.float32)
+
+    def update(self, landmarks, timestamp=None):
+        """
+        :param landmarks: (21, 2) 控制画面方向的归一化关键点，None 表示没有检测到手
+        :param timestamp: 关键点的时间（秒），None 时取 clock()；回放时传录制时间戳使结果可复现
+        :return: 控制指令字典（浮点数）
+        """
+        # 默认控制指令
+        control = {
+            'throttle': 0.0,  # 垂直方向：-100~100
+            'throttle_x': 0.0,  # 水平位置：用来判断是否旋转
+            'roll': 0.0,  # 左右方向：-50~50
+            'pitch': 0.0,  # 前后方向：-50~50
+            'emergency_stop': False  # 急停标志
+        }
+        if landmarks is None:
+            return control
+
+        points = self._points
+        np.copyto(points, landmarks, casting='unsafe')
+        center = points.mean(axis=0)
+        vectors = points[_VECTOR_TIPS] - points[_VECTOR_BASES]
+        (dx, dy), thumb = vectors
+
+        # 握拳急停：拇指尖端与根部距离过小，所有控制量归零（不更新滤波状态）
+        if math.hypot(thumb[0], thumb[1]) < EMERGENCY_STOP_DISTANCE:
+            control['emergency_stop'] = True
+            return control
+
+        # 手掌中心映射到 [-1, 1]：上移为正；食指相对手腕的方向给出横滚与俯仰（负号修复方向）
+        norm = math.hypot(dx, dy)
+        raw = self._raw
+        raw[0] = (0.5 - center[1]) * 2
+        raw[1] = (center[0] - 0.5) * 2
+        raw[2] = -dy / norm if norm else 0.0   # -sin(angle)
+        raw[3] = -dx / norm if norm else -1.0  # -cos(angle)
+        # 死区内归零，之后换算到控制量范围
+        raw[np.abs(raw) <= _DEADZONES] = 0.0
+        raw *= _SCALES
+
+        filtered = self.filter(raw, self.clock() if timestamp is None else timestamp)
+        for name, value in zip(CHANNELS, filtered.tolist()):
+            control[name] = value
+        return control
+
+    def reset(self):
+        self.filter.reset()
@@ -0,0 +1,86 @@
+"""
+推理频率与命令发送频率解耦
+
+- RateGate：按固定频率放行（推理只在需要时运行，其余帧只抓取不解码）
+- PeriodicSender：独立线程按固定频率发送最新的控制估计，与摄像头帧率无关；
+  估计过旧（推理停滞）时不发送，让服务端的命令保持时间自然到期
+"""
+import threading
+import time
+
+
+class RateGate:
+    def __init__(self, rate):
+        """:param rate: 放行频率（Hz），0 表示每次都放行"""
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = None
+
+    def ready(self, now):
+        """到达下一次放行时间时返回 True 并安排下一次（按固定节拍，不累积误差；落后超过一个周期时重新对齐）"""
+        if self._next is not None and now < self._next:
+            return False
+        if self._next is None or now - self._next >= self.interval:
+            self._next = now + self.interval
+        else:
+            self._next += self.interval
+        return True
+
+
+class PeriodicSender(threading.Thread):
+    def __init__(self, send, rate=20, stale_after=0.5, clock=time.monotonic):
+        """
+        :param send: send(value)，在发送线程中调用
+        :param rate: 发送频率（Hz）
+        :param stale_after: 估计超过该时间（秒）没有更新时不再发送
+        """
+        super().__init__(name='control-sender', daemon=True)
+        self.send = send
+        self.interval = 1.0 / rate
+        self.stale_after = stale_after
+        self.clock = clock
+        self._latest = None  # (值, 更新时间)，整体替换
+        self._last_sent = None  # 最近一次发送的 _latest
+        self._stopped = threading.Event()
+        self.updates = 0
+        self.sent = 0
+        self.skipped = 0  # 没有估计或估计过旧而跳过的发送周期
+
+    def update(self, value):
+        self._latest = (value, self.clock())
+        self.updates += 1
+
+    def run(self):
+        next_tick = self.clock()
+        while not self._stopped.is_set():
+            latest = self._latest
+            if latest is None or self.clock() - latest[1] > self.stale_after:
+                self.skipped += 1
+            else:
+                self._send(latest)
+            next_tick += self.interval
+            delay = next_tick - self.clock()
+            if delay < 0:
+                next_tick = self.clock()  # 发送耗时超过周期时不追赶
+                delay = 0
+            self._stopped.wait(delay)
+
+    def _send(self, latest):
+        try:
+            self.send(latest[0])
+            self.sent += 1
+        except Exception as e:
+            print(f"[SEND] 发送失败: {e}")
+        self._last_sent = latest
+
+    def stop(self, timeout=1.0, flush=True):
+        """
+        停止发送线程
+        :param flush: 最新的估计还没有发送过（且没有过旧）时在返回前发送，最后一次推理的结果不会丢失
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+        latest = self._latest
+        if (flush and not self.is_alive() and latest is not None and latest is not self._last_sent
+                and self.clock() - latest[1] <= self.stale_after):
+            self._send(latest)
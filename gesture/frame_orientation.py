@@ -0,0 +1,123 @@
+"""
+画面方向处理：不再旋转 / 翻转整帧图像，而是让 MediaPipe 处理摄像头原始方向的画面，
+再把旋转、镜像作为坐标变换作用在 21 个关键点上
+
+只有需要显示画面时才生成旋转后的图像；颜色转换写入复用的预分配缓冲区
+"""
+import cv2
+import numpy as np
+
+from landmark_session import HANDEDNESS_LEFT, HANDEDNESS_RIGHT
+
+ROTATE_NONE = None
+ROTATE_90_CLOCKWISE = cv2.ROTATE_90_CLOCKWISE
+ROTATE_90_COUNTERCLOCKWISE = cv2.ROTATE_90_COUNTERCLOCKWISE
+ROTATE_180 = cv2.ROTATE_180
+
+# MediaPipe 手部关键点连线
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+
+def _rotation_matrix(rotate):
+    """归一化坐标 (u, v, 1) 的旋转变换矩阵"""
+    if rotate == ROTATE_90_CLOCKWISE:
+        return np.array([[0, -1, 1], [1, 0, 0], [0, 0, 1]], dtype=np.float64)   # u' = 1 - v, v' = u
+    if rotate == ROTATE_90_COUNTERCLOCKWISE:
+        return np.array([[0, 1, 0], [-1, 0, 1], [0, 0, 1]], dtype=np.float64)   # u' = v, v' = 1 - u
+    if rotate == ROTATE_180:
+        return np.array([[-1, 0, 1], [0, -1, 1], [0, 0, 1]], dtype=np.float64)  # u' = 1 - u, v' = 1 - v
+    return np.eye(3)
+
+
+_MIRROR = np.array([[-1, 0, 1], [0, 1, 0], [0, 0, 1]], dtype=np.float64)  # u' = 1 - u
+
+# 组合变换（线性部分）对应的单次 OpenCV 操作，显示时只需复制一次图像
+_SINGLE_OPERATIONS = {
+    ((1, 0), (0, 1)): lambda frame: frame,
+    ((-1, 0), (0, 1)): lambda frame: cv2.flip(frame, 1),
+    ((1, 0), (0, -1)): lambda frame: cv2.flip(frame, 0),
+    ((-1, 0), (0, -1)): lambda frame: cv2.flip(frame, -1),
+    ((0, 1), (1, 0)): cv2.transpose,
+    ((0, -1), (1, 0)): lambda frame: cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE),
+    ((0, 1), (-1, 0)): lambda frame: cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE),
+}
+
+
+class FrameOrientation:
+    """
+    原始画面到显示方向的变换，steps 为依次执行的操作：'mirror' 或 cv2.ROTATE_* 常量
+    例如 gesture_match 的“先顺时针旋转 90° 再水平镜像”为 (ROTATE_90_CLOCKWISE, 'mirror')
+    """
+
+    def __init__(self, *steps):
+        self.steps = steps
+        matrix = np.eye(3)
+        self.mirrored = False
+        for step in steps:
+            if step == 'mirror':
+                matrix = _MIRROR @ matrix
+                self.mirrored = not self.mirrored
+            else:
+                matrix = _rotation_matrix(step) @ matrix
+        self._linear = matrix[:2, :2].T.copy()
+        self._frame_operation = _SINGLE_OPERATIONS.get(tuple(map(tuple, matrix[:2, :2].astype(int).tolist())))
+        self._offset = matrix[:2, 2].copy()
+        self._swap_size = any(step in (ROTATE_90_CLOCKWISE, ROTATE_90_COUNTERCLOCKWISE) for step in steps)
+        self._rgb = None
+
+    def oriented_size(self, w, h):
+        """变换后的画面尺寸 (w, h)"""
+        return (h, w) if self._swap_size else (w, h)
+
+    def transform_points(self, points):
+        """(..., 21, 2) 原始方向的归一化关键点 -> 显示方向的归一化关键点"""
+        return np.asarray(points) @ self._linear + self._offset
+
+    def transform_hands(self, hands):
+        """
+        对 [(左右手编码, 关键点), ...] 做坐标变换
+        镜像会改变手的左右，MediaPipe 在未镜像画面上给出的左右手标记要对调
+        """
+        transformed = []
+        for handedness, points in hands:
+            if self.mirrored:
+                handedness = {HANDEDNESS_LEFT: HANDEDNESS_RIGHT, HANDEDNESS_RIGHT: HANDEDNESS_LEFT}.get(handedness, handedness)
+            transformed.append((handedness, self.transform_points(points)))
+        return transformed
+
+    def to_rgb(self, frame):
+        """BGR -> RGB，结果写入复用的缓冲区（下一次调用会覆盖）"""
+        if self._rgb is None or self._rgb.shape != frame.shape:
+            self._rgb = np.empty_like(frame)
+        self._rgb.flags.writeable = True
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        # 只读图像可以让 MediaPipe 直接引用而不复制
+        self._rgb.flags.writeable = False
+        return self._rgb
+
+    def apply_to_frame(self, frame):
+        """
+        生成显示方向的画面（只在需要显示时调用）
+        多个步骤能合并为一次操作时只复制一次，例如“旋转 90° + 镜像”等价于转置
+        """
+        if self._frame_operation is not None:
+            return self._frame_operation(frame)
+        for step in self.steps:
+            frame = cv2.flip(frame, 1) if step == 'mirror' else cv2.rotate(frame, step)
+        return frame
+
+
+def draw_hand(frame, points, point_color=(0, 255, 0), line_color=(255, 0, 0)):
+    """在画面上绘制一只手的关键点与连线，points 为该画面方向下的 (21, 2) 归一化关键点"""
+    h, w = frame.shape[:2]
+    pixels = (np.asarray(points) * (w, h)).astype(int).tolist()
+    for start, end in HAND_CONNECTIONS:
+        cv2.line(frame, tuple(pixels[start]), tuple(pixels[end]), line_color, 2)
+    for pixel in pixels:
+        cv2.circle(frame, tuple(pixel), 4, point_color, -1)
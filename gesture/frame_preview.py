@@ -0,0 +1,72 @@
+"""
+画面预览：窗口显示或无界面（headless）运行
+
+无界面模式下不做任何绘制与 GUI 轮询（imshow / waitKey），CPU 留给推理；
+可选每隔 N 帧把一帧调试画面写入磁盘，便于在没有显示器的设备上查看
+"""
+import os
+
+import cv2
+
+
+class FramePreview:
+    def __init__(self, window_name, headless=False, debug_path=None, debug_every=30):
+        """
+        :param window_name: 窗口模式下的窗口名
+        :param headless: 为 True 时不打开窗口
+        :param debug_path: 无界面模式下调试画面的保存路径；包含 {} 时按帧序号生成多个文件（例如 preview_{:06d}.jpg），
+                           否则每次覆盖同一个文件
+        :param debug_every: 每隔多少帧保存一次调试画面
+        """
+        self.window_name = window_name
+        self.headless = headless
+        self.debug_path = debug_path
+        self.debug_every = max(1, debug_every)
+        self.frame_index = -1
+        self.saved = 0
+
+    def wants_frame(self):
+        """
+        每帧调用一次，返回本帧是否需要绘制画面
+        窗口模式下每帧都绘制；无界面模式只在需要保存调试画面的帧绘制
+        """
+        self.frame_index += 1
+        if not self.headless:
+            return True
+        return self.debug_path is not None and self.frame_index % self.debug_every == 0
+
+    def show(self, frame):
+        """显示或保存绘制好的画面，返回 False 表示用户要求退出（按下 q）"""
+        if self.headless:
+            self._save(frame)
+            return True
+        cv2.imshow(self.window_name, frame)
+        return cv2.waitKey(1) & 0xFF != ord('q')
+
+    def _save(self, frame):
+        if '{' in self.debug_path:
+            cv2.imwrite(self.debug_path.format(self.frame_index), frame)
+        else:
+            # 先写临时文件再替换，查看程序不会读到写了一半的图片
+            root, ext = os.path.splitext(self.debug_path)
+            temp_path = f"{root}.tmp{ext}"
+            cv2.imwrite(temp_path, frame)
+            os.replace(temp_path, self.debug_path)
+        self.saved += 1
+
+    def close(self):
+        if not self.headless:
+            cv2.destroyAllWindows()
+        elif self.saved:
+            print(f"已保存 {self.saved} 帧调试画面到 {self.debug_path}")
+
+
+def add_preview_arguments(parser):
+    """为命令行解析器添加无界面运行相关的参数"""
+    parser.add_argument('--headless', action='store_true', help="无界面运行，不绘制、不显示画面（Ctrl+C 退出）")
+    parser.add_argument('--preview-path', help="无界面模式下保存调试画面的路径，包含 {} 时按帧序号保存多个文件")
+    parser.add_argument('--preview-every', type=int, default=30, help="每隔多少帧保存一次调试画面")
+
+
+def preview_from_args(window_name, args):
+    return FramePreview(window_name, headless=args.headless, debug_path=args.preview_path, debug_every=args.preview_every)
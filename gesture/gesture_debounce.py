@@ -0,0 +1,82 @@
+"""
+流式手势去抖：每帧 O(1) 更新，只在稳定手势发生变化时产生事件
+
+- 进入：同一手势连续出现 dwell 帧（可按手势分别配置）才成为稳定手势
+- 退出（迟滞）：稳定手势需要连续 exit_frames 帧没有出现才被释放，偶尔一两帧误判不会打断
+- 事件只在进入新的稳定手势时产生；可选按固定时间间隔重复发送当前稳定手势
+"""
+import time
+
+IDLE_GESTURE = 'None'
+# 保持手势时默认的重复间隔（秒）：30fps 下约每 9 帧一次，而不是每帧都产生事件
+DEFAULT_REPEAT_INTERVAL = 0.3
+
+
+class GestureDebouncer:
+    def __init__(self, dwell_frames=5, exit_frames=3, repeat_interval=None, gesture_dwell=None,
+                 idle_gestures=(IDLE_GESTURE,), clock=time.monotonic):
+        """
+        :param dwell_frames: 进入稳定手势所需的连续帧数
+        :param exit_frames: 释放稳定手势所需的连续不匹配帧数
+        :param repeat_interval: 稳定期间重复产生事件的间隔（秒），None 表示只在变化时产生
+        :param gesture_dwell: {手势名: 连续帧数}，覆盖个别手势的 dwell_frames
+        :param idle_gestures: 表示“没有手势”的标签，不会成为稳定手势
+        """
+        self.dwell_frames = dwell_frames
+        self.exit_frames = exit_frames
+        self.repeat_interval = repeat_interval
+        self.gesture_dwell = dict(gesture_dwell or {})
+        self.idle_gestures = frozenset(idle_gestures)
+        self.clock = clock
+        self.state = None        # 当前稳定手势
+        self.candidate = None    # 当前连续出现的手势
+        self.run_length = 0      # candidate 已连续出现的帧数
+        self.missed = 0          # 稳定手势已连续未出现的帧数
+        self._last_event = 0.0
+
+    def update(self, gesture):
+        """
+        输入一帧的识别结果
+        :return: 需要发送的手势名（进入新稳定手势或到达重复间隔），否则为 None
+        """
+        if gesture == self.candidate:
+            self.run_length += 1
+        else:
+            self.candidate = gesture
+            self.run_length = 1
+
+        if self.state is not None:
+            if gesture == self.state:
+                self.missed = 0
+                if self.repeat_interval is not None and self.clock() - self._last_event >= self.repeat_interval:
+                    return self._emit()
+                return None
+            self.missed += 1
+            if self.missed < self.exit_frames:
+                return None
+            self.state = None
+
+        if gesture not in self.idle_gestures and self.run_length >= self.gesture_dwell.get(gesture, self.dwell_frames):
+            self.state = gesture
+            self.missed = 0
+            return self._emit()
+        return None
+
+    def _emit(self):
+        self._last_event = self.clock()
+        return self.state
+
+    def reset(self):
+        self.state = self.candidate = None
+        self.run_length = self.missed = 0
+
+
+def parse_gesture_dwell(items):
+    """解析命令行的 ["Rotation=8", ...] 为 {手势名: 帧数}"""
+    gesture_dwell = {}
+    for item in items:
+        name, _, frames = item.partition('=')
+        if not frames:
+            raise ValueError(f"手势驻留帧数应为 手势名=帧数 的形式: {item}")
+        gesture_dwell[name] = int(frames)
+    return gesture_dwell
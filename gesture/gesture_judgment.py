@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 """
 计算两个点之间的距离：L2距离（欧式距离）
 """
@@ -26,339 +28,391 @@ def compute_angle(x0, y0, x1, y1, x2, y2, x3, y3):
     return theta
 
 
-"""
-检测所有手指状态（判断每根手指弯曲 or 伸直）
-大拇指只有弯曲和伸直两种状态，其他手指除了弯曲和伸直还包含第三种状态（手指没有伸直，但是也没有达到弯曲的标准），第三种状态是为了后续更新迭代用的，这里用不到
-"""
-def detect_all_finger_state(all_points):
-    finger_first_angle_bend_threshold = math.pi * 0.25  # 大拇指弯曲阈值
-    finger_other_angle_bend_threshold = math.pi * 0.5  # 其他手指弯曲阈值
-    finger_other_angle_straighten_threshold = math.pi * 0.2  # 其他手指伸直阈值
-
-    first_is_bend = False
-    first_is_straighten = False
-    second_is_bend = False
-    second_is_straighten = False
-    third_is_bend = False
-    third_is_straighten = False
-    fourth_is_bend = False
-    fourth_is_straighten = False
-    fifth_is_bend = False
-    fifth_is_straighten = False
-
-    finger_first_angle = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point1'][0], all_points['point1'][1],
-                                       all_points['point2'][0], all_points['point2'][1], all_points['point4'][0], all_points['point4'][1])
-    finger_second_angle = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point5'][0], all_points['point5'][1],
-                                        all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
-    finger_third_angle = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point9'][0], all_points['point9'][1],
-                                       all_points['point10'][0], all_points['point10'][1], all_points['point12'][0], all_points['point12'][1])
-    finger_fourth_angle = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point13'][0], all_points['point13'][1],
-                                        all_points['point14'][0], all_points['point14'][1], all_points['point16'][0], all_points['point16'][1])
-    finger_fifth_angle = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point17'][0], all_points['point17'][1],
-                                       all_points['point18'][0], all_points['point18'][1], all_points['point20'][0], all_points['point20'][1])
-
-    if finger_first_angle > finger_first_angle_bend_threshold:  # 判断大拇指是否弯曲
-        first_is_bend = True
-        first_is_straighten = False
-    else:
-        first_is_bend = False
-        first_is_straighten = True
-
-    if finger_second_angle > finger_other_angle_bend_threshold:  # 判断食指是否弯曲
-        second_is_bend = True
-    elif finger_second_angle < finger_other_angle_straighten_threshold:
-        second_is_straighten = True
-    else:
-        second_is_bend = False
-        second_is_straighten = False
-
-    if finger_third_angle > finger_other_angle_bend_threshold:  # 判断中指是否弯曲
-        third_is_bend = True
-    elif finger_third_angle < finger_other_angle_straighten_threshold:
-        third_is_straighten = True
-    else:
-        third_is_bend = False
-        third_is_straighten = False
-
-    if finger_fourth_angle > finger_other_angle_bend_threshold:  # 判断无名指是否弯曲
-        fourth_is_bend = True
-    elif finger_fourth_angle < finger_other_angle_straighten_threshold:
-        fourth_is_straighten = True
-    else:
-        fourth_is_bend = False
-        fourth_is_straighten = False
-
-    if finger_fifth_angle > finger_other_angle_bend_threshold:  # 判断小拇指是否弯曲
-        fifth_is_bend = True
-    elif finger_fifth_angle < finger_other_angle_straighten_threshold:
-        fifth_is_straighten = True
-    else:
-        fifth_is_bend = False
-        fifth_is_straighten = False
+# ==================== 特征引擎 ====================
+# 21 个关键点之外的虚拟参考点：(基准点, dx, dy)，用于计算与水平/竖直方向的夹角
+_REF_POINTS = (
+    (0, 10, 0),   # 21: point0 + (10, 0)，水平方向
+    (6, 10, 0),   # 22: point6 + (10, 0)
+    (18, 10, 0),  # 23: point18 + (10, 0)
+    (0, 0, 1),    # 24: point0 + (0, 1)，竖直向下方向
+)
+_REF_BASE = np.array([ref[0] for ref in _REF_POINTS])
+_REF_OFFSET = np.array([ref[1:] for ref in _REF_POINTS], dtype=np.float64)
+
+# 所有规则用到的夹角：线段 (a->b) 与线段 (c->d) 的夹角，下标即特征向量中的位置
+ANGLE_SEGMENTS = (
+    (0, 1, 2, 4),      # 大拇指弯曲角
+    (0, 5, 6, 8),      # 食指弯曲角
+    (0, 9, 10, 12),    # 中指弯曲角
+    (0, 13, 14, 16),   # 无名指弯曲角
+    (0, 17, 18, 20),   # 小拇指弯曲角
+    (5, 6, 6, 8),
+    (9, 10, 10, 12),
+    (13, 14, 14, 16),
+    (17, 18, 18, 20),
+    (18, 6, 18, 23),
+    (6, 18, 6, 22),
+    (0, 2, 0, 17),
+    (0, 6, 0, 4),
+    (0, 5, 0, 17),
+    (0, 21, 0, 4),
+    (2, 4, 2, 8),
+    (2, 3, 3, 4),
+    (2, 3, 2, 4),
+    (1, 2, 2, 4),
+    (0, 24, 0, 4),
+)
+ANGLE_FINGERS = slice(0, 5)
+ANGLE5_6_AND_6_8 = 5
+ANGLE9_10_AND_10_12 = 6
+ANGLE13_14_AND_14_16 = 7
+ANGLE17_18_AND_18_20 = 8
+ANGLE18_6_AND_18_18_ = 9
+ANGLE_6_18_AND_6_6_ = 10
+ANGLE_0_2_AND_0_17 = 11
+ANGLE0_6_AND_0_4 = 12
+ANGLE0_5_AND_0_17 = 13
+ANGLE0_0__AND_0_4 = 14
+ANGLE2_4_AND_2_8 = 15
+ANGLE2_3_AND_3_4 = 16
+ANGLE2_3_AND_2_4 = 17
+ANGLE1_2_AND_2_4 = 18
+ANGLE_VERTICAL_0_4 = 19
+
+# 所有规则用到的两点距离
+DISTANCE_PAIRS = (
+    (4, 8),
+    (2, 6),
+    (4, 6),
+    (0, 4),
+)
+DISTANCE4_AND_8 = 0
+DISTANCE2_AND_6 = 1
+DISTANCE4_AND_6 = 2
+DISTANCE0_AND_4 = 3
+
+# 所有夹角与距离涉及的线段去重后统一计算一次：每个夹角对应两条线段的下标，每个距离对应一条线段的下标
+_SEGMENTS = sorted({(a, b) for a, b, _, _ in ANGLE_SEGMENTS} | {(c, d) for _, _, c, d in ANGLE_SEGMENTS} | set(DISTANCE_PAIRS))
+_SEGMENT_START = np.array([segment[0] for segment in _SEGMENTS])
+_SEGMENT_END = np.array([segment[1] for segment in _SEGMENTS])
+_ANGLE_AB = np.array([_SEGMENTS.index((a, b)) for a, b, _, _ in ANGLE_SEGMENTS])
+_ANGLE_CD = np.array([_SEGMENTS.index((c, d)) for _, _, c, d in ANGLE_SEGMENTS])
+_DISTANCE_SEGMENT = np.array([_SEGMENTS.index(pair) for pair in DISTANCE_PAIRS])
+
+
+class HandFeatures:
+    """
+    一只手的特征向量：关键点坐标、规则所需的全部夹角与距离
+    points[i][0] / points[i][1] 为第 i 个关键点的 x / y，angles、distances 按上面的常量下标访问
+    """
+    __slots__ = ('points', 'angles', 'distances')
 
-    # 将手指的弯曲或伸直状态存在字典中，简化后续函数的参数
-    bend_states = {'first': first_is_bend, 'second': second_is_bend, 'third': third_is_bend, 'fourth': fourth_is_bend, 'fifth': fifth_is_bend}
-    straighten_states = {'first': first_is_straighten, 'second': second_is_straighten, 'third': third_is_straighten, 'fourth': fourth_is_straighten, 'fifth': fifth_is_straighten}
+    def __init__(self, points, angles, distances):
+        self.points = points
+        self.angles = angles
+        self.distances = distances
 
-    return bend_states, straighten_states
 
+def _compute_geometry(points):
+    """一次向量化计算全部线段，返回 (夹角, 距离)，形状分别为 (..., len(ANGLE_SEGMENTS))、(..., len(DISTANCE_PAIRS))"""
+    points = np.asarray(points, dtype=np.float64)
+    # 使用 take 而不是花式索引：单帧时 numpy 调用开销占大头，take 明显更快
+    ref = points.take(_REF_BASE, axis=-2) + _REF_OFFSET
+    extended = np.concatenate((points, ref), axis=-2)
+
+    segments = extended.take(_SEGMENT_END, axis=-2) - extended.take(_SEGMENT_START, axis=-2)
+    squared = segments * segments
+    lengths = np.sqrt(squared[..., 0] + squared[..., 1])
+
+    ab = segments.take(_ANGLE_AB, axis=-2)
+    cd = segments.take(_ANGLE_CD, axis=-2)
+    dot_product = ab[..., 0] * cd[..., 0] + ab[..., 1] * cd[..., 1]
+    # 与 compute_angle 一致，长度加 0.001 防止分母出现0（因此 |cos_theta| < 1，无需截断）
+    cos_theta = dot_product / ((lengths.take(_ANGLE_AB, axis=-1) + 0.001) * (lengths.take(_ANGLE_CD, axis=-1) + 0.001))
+
+    return np.arccos(cos_theta), lengths.take(_DISTANCE_SEGMENT, axis=-1)
 
-def judge_Palm_No_Thumb(all_points, bend_states, straighten_states):
+
+def compute_angles(points):
     """
-    判断是否为 Palm_No_Thumb 手势：大拇指弯曲，其他手指伸直
+    一次向量化计算 ANGLE_SEGMENTS 中的全部夹角
+    :param points: (..., 21, 2) 关键点坐标
+    :return: (..., len(ANGLE_SEGMENTS)) 弧度
     """
-    if bend_states['first'] and \
-       straighten_states['second'] and \
-       straighten_states['third'] and \
-       straighten_states['fourth'] and \
-       straighten_states['fifth']:
-        return 'Palm_No_Thumb'
-    else:
-        return False
+    return _compute_geometry(points)[0]
 
 
-"""
-判断是否为 OK 手势
-"""
-def judge_OK(all_points, bend_states, straighten_states):
-    angle5_6_and_6_8 = compute_angle(all_points['point5'][0], all_points['point5'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
+def compute_distances(points):
+    """
+    一次向量化计算 DISTANCE_PAIRS 中的全部两点距离
+    :param points: (..., 21, 2) 关键点坐标
+    :return: (..., len(DISTANCE_PAIRS))
+    """
+    return _compute_geometry(points)[1]
 
-    if angle5_6_and_6_8 > 0.1 * math.pi and straighten_states['third'] and straighten_states['fourth'] and straighten_states['fifth']:
-        distance4_and_8 = points_distance(all_points['point4'][0], all_points['point4'][1], all_points['point8'][0], all_points['point8'][1])
-        distance2_and_6 = points_distance(all_points['point2'][0], all_points['point2'][1], all_points['point6'][0], all_points['point6'][1])
-        distance4_and_6 = points_distance(all_points['point4'][0], all_points['point4'][1], all_points['point6'][0], all_points['point6'][1])
 
-        if distance4_and_8 < distance2_and_6 and distance4_and_6 > distance4_and_8 and all_points['point11'][1] < all_points['point10'][1]:
-            return 'OK'
-        else:
-            return False
-    else:
-        return False
+def points_from_dict(all_points):
+    """把 {'point0': (x, y), ...} 形式的关键点字典转换为 (21, 2) 数组"""
+    return np.array([all_points[f'point{i}'] for i in range(21)], dtype=np.float64)
 
 
-"""
-判断是否为 Return 手势
-"""
-def judge_Return(all_points, bend_states, straighten_states):
-    angle18_6_and_18_18_ = compute_angle(all_points['point18'][0], all_points['point18'][1], all_points['point6'][0], all_points['point6'][1],
-                                         all_points['point18'][0], all_points['point18'][1], all_points['point18'][0] + 10, all_points['point18'][1])
-    angle_6_18_and_6_6_ = compute_angle(all_points['point6'][0], all_points['point6'][1], all_points['point18'][0], all_points['point18'][1],
-                                         all_points['point6'][0], all_points['point6'][1], all_points['point6'][0] + 10, all_points['point6'][1])
-    angle_0_2_and_0_17 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point2'][0], all_points['point2'][1],
-                                       all_points['point0'][0], all_points['point0'][1], all_points['point17'][0], all_points['point17'][1])
-
-    if (bend_states['first'] and bend_states['second'] and bend_states['third'] and bend_states['fourth'] and bend_states['fifth'] and
-            angle_0_2_and_0_17 > 0.15 * math.pi and
-            all_points['point7'][1] > all_points['point6'][1] and all_points['point11'][1] > all_points['point10'][1] and
-            all_points['point15'][1] > all_points['point14'][1] and all_points['point19'][1] > all_points['point18'][1]):
-
-        if angle18_6_and_18_18_ < 0.1 * math.pi or angle_6_18_and_6_6_ < 0.1 * math.pi:
-            return 'Return'
-        else:
-            return False
-    else:
-        return False
+def compute_hand_features(points):
+    """
+    每帧只计算一次的特征：输入 (21, 2) 关键点数组（或旧的关键点字典），
+    输出 HandFeatures，后续所有 judge_* 直接读取其中的角度与距离
+    """
+    if isinstance(points, dict):
+        points = points_from_dict(points)
+    points = np.asarray(points, dtype=np.float64)
+    angles, distances = _compute_geometry(points)
+    # 转为 Python 列表：逐条规则做标量比较时比 numpy 标量快得多
+    return HandFeatures(points.tolist(), angles.tolist(), distances.tolist())
 
 
-"""
-判断是否为 Left 手势
-"""
-def judge_Left(all_points, bend_states, straighten_states):
-    angle5_6_and_6_8 = compute_angle(all_points['point5'][0], all_points['point5'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
-    angle9_10_and_10_12 = compute_angle(all_points['point9'][0], all_points['point9'][1], all_points['point10'][0], all_points['point10'][1],
-                                        all_points['point10'][0], all_points['point10'][1], all_points['point12'][0], all_points['point12'][1])
-    angle13_14_and_14_16 = compute_angle(all_points['point13'][0], all_points['point13'][1], all_points['point14'][0], all_points['point14'][1],
-                                         all_points['point14'][0], all_points['point14'][1], all_points['point16'][0], all_points['point16'][1])
-    angle17_18_and_18_20 = compute_angle(all_points['point17'][0], all_points['point17'][1], all_points['point18'][0], all_points['point18'][1],
-                                         all_points['point18'][0], all_points['point18'][1], all_points['point20'][0], all_points['point20'][1])
-    angle0_6_and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-    angle0_5_and_0_17 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point5'][0], all_points['point5'][1],
-                                      all_points['point0'][0], all_points['point0'][1], all_points['point17'][0], all_points['point17'][1])
-
-    if ((straighten_states['first'] and bend_states['second'] and bend_states['third'] and bend_states['fourth'] and bend_states['fifth']) or
-        (straighten_states['first'] and angle5_6_and_6_8 > 0.2 * math.pi and angle9_10_and_10_12 > 0.2 * math.pi and
-         angle13_14_and_14_16 > 0.2 * math.pi and angle17_18_and_18_20 > 0.2 * math.pi)):
-
-        angle0_0__and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point0'][0] + 10, all_points['point0'][1],
-                                          all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-
-        if (angle0_5_and_0_17 > 0.15 * math.pi and angle0_0__and_0_4 > 0.7 * math.pi and all_points['point3'][0] < all_points['point2'][0] and
-            angle0_6_and_0_4 > 0.1 * math.pi and all_points['point11'][1] > all_points['point10'][1] and all_points['point7'][1] > all_points['point6'][1] and
-            all_points['point15'][1] > all_points['point14'][1] and all_points['point19'][1] > all_points['point18'][1]):
-            return 'Left'
-        else:
-            return False
-    else:
-        return False
+def _as_features(features):
+    """兼容旧接口：传入关键点字典时现场计算特征"""
+    if isinstance(features, HandFeatures):
+        return features
+    return compute_hand_features(features)
 
 
-"""
-判断是否为 Right 手势
-"""
-def judge_Right(all_points, bend_states, straighten_states):
-    angle0_5_and_0_17 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point5'][0], all_points['point5'][1],
-                                      all_points['point0'][0], all_points['point0'][1], all_points['point17'][0], all_points['point17'][1])
-    angle5_6_and_6_8 = compute_angle(all_points['point5'][0], all_points['point5'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
-    angle9_10_and_10_12 = compute_angle(all_points['point9'][0], all_points['point9'][1], all_points['point10'][0], all_points['point10'][1],
-                                        all_points['point10'][0], all_points['point10'][1], all_points['point12'][0], all_points['point12'][1])
-    angle13_14_and_14_16 = compute_angle(all_points['point13'][0], all_points['point13'][1], all_points['point14'][0], all_points['point14'][1],
-                                         all_points['point14'][0], all_points['point14'][1], all_points['point16'][0], all_points['point16'][1])
-    angle17_18_and_18_20 = compute_angle(all_points['point17'][0], all_points['point17'][1], all_points['point18'][0], all_points['point18'][1],
-                                         all_points['point18'][0], all_points['point18'][1], all_points['point20'][0], all_points['point20'][1])
-    angle0_6_and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-
-    if ((straighten_states['first'] and bend_states['second'] and bend_states['third'] and bend_states['fourth'] and bend_states['fifth']) or
-        (straighten_states['first'] and angle5_6_and_6_8 > 0.2 * math.pi and angle9_10_and_10_12 > 0.2 * math.pi and
-         angle13_14_and_14_16 > 0.2 * math.pi and angle17_18_and_18_20 > 0.2 * math.pi)):
-
-        angle0_0__and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point0'][0] + 10, all_points['point0'][1],
-                                          all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-
-        if (angle0_5_and_0_17 > 0.15 * math.pi and angle0_0__and_0_4 < 0.25 * math.pi and all_points['point3'][0] > all_points['point2'][0] and
-            angle0_6_and_0_4 > 0.1 * math.pi and all_points['point11'][1] > all_points['point10'][1] and all_points['point7'][1] > all_points['point6'][1] and
-            all_points['point15'][1] > all_points['point14'][1] and all_points['point19'][1] > all_points['point18'][1]):
-            return 'Right'
-        else:
-            return False
-    else:
-        return False
+FINGER_NAMES = ('first', 'second', 'third', 'fourth', 'fifth')
+FINGER_FIRST_ANGLE_BEND_THRESHOLD = math.pi * 0.25  # 大拇指弯曲阈值
+FINGER_OTHER_ANGLE_BEND_THRESHOLD = math.pi * 0.5  # 其他手指弯曲阈值
+FINGER_OTHER_ANGLE_STRAIGHTEN_THRESHOLD = math.pi * 0.2  # 其他手指伸直阈值
 
 
 """
-判断是否为 Thumbs_up 手势
+检测所有手指状态（判断每根手指弯曲 or 伸直）
+大拇指只有弯曲和伸直两种状态，其他手指除了弯曲和伸直还包含第三种状态（手指没有伸直，但是也没有达到弯曲的标准），第三种状态是为了后续更新迭代用的，这里用不到
 """
-def judge_Thumbs_up(all_points, bend_states, straighten_states):
-    angle2_4_and_2_8 = compute_angle(all_points['point2'][0], all_points['point2'][1], all_points['point4'][0], all_points['point4'][1],
-                                     all_points['point2'][0], all_points['point2'][1], all_points['point8'][0], all_points['point8'][1])
-    angle2_3_and_3_4 = compute_angle(all_points['point2'][0], all_points['point2'][1], all_points['point3'][0], all_points['point3'][1],
-                                     all_points['point3'][0], all_points['point3'][1], all_points['point4'][0], all_points['point4'][1])
-    angle5_6_and_6_8 = compute_angle(all_points['point5'][0], all_points['point5'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
-    angle9_10_and_10_12 = compute_angle(all_points['point9'][0], all_points['point9'][1], all_points['point10'][0], all_points['point10'][1],
-                                        all_points['point10'][0], all_points['point10'][1], all_points['point12'][0], all_points['point12'][1])
-    angle13_14_and_14_16 = compute_angle(all_points['point13'][0], all_points['point13'][1], all_points['point14'][0], all_points['point14'][1],
-                                         all_points['point14'][0], all_points['point14'][1], all_points['point16'][0], all_points['point16'][1])
-    angle17_18_and_18_20 = compute_angle(all_points['point17'][0], all_points['point17'][1], all_points['point18'][0], all_points['point18'][1],
-                                         all_points['point18'][0], all_points['point18'][1], all_points['point20'][0], all_points['point20'][1])
-    angle0_6_and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point6'][0], all_points['point6'][1],
-                                     all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-
-    if (angle2_3_and_3_4 < 0.2 * math.pi and bend_states['second'] and bend_states['third'] and bend_states['fourth'] and bend_states['fifth']) or (
-            angle2_3_and_3_4 < 0.2 * math.pi and angle5_6_and_6_8 > 0.2 * math.pi and angle9_10_and_10_12 > 0.2 * math.pi and angle13_14_and_14_16 > 0.2 * math.pi and angle17_18_and_18_20 > 0.2 * math.pi):
-
-        angle0_0__and_0_4 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point0'][0] + 10, all_points['point0'][1],
-                                          all_points['point0'][0], all_points['point0'][1], all_points['point4'][0], all_points['point4'][1])
-
-        if angle0_0__and_0_4 > 0.25 * math.pi and angle0_0__and_0_4 < 0.75 * math.pi and all_points['point3'][1] > all_points['point4'][1] and all_points['point5'][1] < all_points['point9'][1] and all_points['point9'][1] < all_points['point13'][1] and all_points['point13'][1] < all_points['point17'][1] and all_points['point2'][1] < all_points['point5'][1] and angle0_6_and_0_4 > 0.1 * math.pi and angle2_4_and_2_8 > 0.1 * math.pi:
-            return 'Thumbs_up'
-        else:
-            return False
-    else:
-        return False
+def detect_all_finger_state(features):
+    features = _as_features(features)
+    finger_first_angle_bend_threshold = FINGER_FIRST_ANGLE_BEND_THRESHOLD
+    finger_other_angle_bend_threshold = FINGER_OTHER_ANGLE_BEND_THRESHOLD
+    finger_other_angle_straighten_threshold = FINGER_OTHER_ANGLE_STRAIGHTEN_THRESHOLD
+
+    finger_first_angle, finger_second_angle, finger_third_angle, finger_fourth_angle, finger_fifth_angle = \
+        features.angles[ANGLE_FINGERS]
+
+    # 大拇指只有弯曲/伸直两种状态
+    first_is_bend = finger_first_angle > finger_first_angle_bend_threshold
+    first_is_straighten = not first_is_bend
+
+    # 其他手指：超过弯曲阈值为弯曲，低于伸直阈值为伸直，其余两者皆否
+    second_is_bend = finger_second_angle > finger_other_angle_bend_threshold  # 食指
+    second_is_straighten = finger_second_angle < finger_other_angle_straighten_threshold
+    third_is_bend = finger_third_angle > finger_other_angle_bend_threshold  # 中指
+    third_is_straighten = finger_third_angle < finger_other_angle_straighten_threshold
+    fourth_is_bend = finger_fourth_angle > finger_other_angle_bend_threshold  # 无名指
+    fourth_is_straighten = finger_fourth_angle < finger_other_angle_straighten_threshold
+    fifth_is_bend = finger_fifth_angle > finger_other_angle_bend_threshold  # 小拇指
+    fifth_is_straighten = finger_fifth_angle < finger_other_angle_straighten_threshold
 
+    # 将手指的弯曲或伸直状态存在字典中，简化后续函数的参数
+    bend_states = {'first': first_is_bend, 'second': second_is_bend, 'third': third_is_bend, 'fourth': fourth_is_bend, 'fifth': fifth_is_bend}
+    straighten_states = {'first': first_is_straighten, 'second': second_is_straighten, 'third': third_is_straighten, 'fourth': fourth_is_straighten, 'fifth': fifth_is_straighten}
 
-"""
-判断是否为 Pause 手势
-"""
-# def judge_Pause(all_points, bend_states, straighten_states):
-def judge_Rotation(all_points, bend_states, straighten_states):
-    angle0_5_and_0_17 = compute_angle(all_points['point0'][0], all_points['point0'][1], all_points['point5'][0], all_points['point5'][1],
-                                      all_points['point0'][0], all_points['point0'][1], all_points['point17'][0], all_points['point17'][1])
-    angle2_3_and_2_4 = compute_angle(all_points['point2'][0], all_points['point2'][1], all_points['point3'][0], all_points['point3'][1],
-                                      all_points['point2'][0], all_points['point2'][1], all_points['point4'][0], all_points['point4'][1])
-    angle5_6_and_6_8 = compute_angle(all_points['point5'][0], all_points['point5'][1], all_points['point6'][0], all_points['point6'][1],
-                                      all_points['point6'][0], all_points['point6'][1], all_points['point8'][0], all_points['point8'][1])
-    angle9_10_and_10_12 = compute_angle(all_points['point9'][0], all_points['point9'][1], all_points['point10'][0], all_points['point10'][1],
-                                         all_points['point10'][0], all_points['point10'][1], all_points['point12'][0], all_points['point12'][1])
-    angle13_14_and_14_16 = compute_angle(all_points['point13'][0], all_points['point13'][1], all_points['point14'][0], all_points['point14'][1],
-                                         all_points['point14'][0], all_points['point14'][1], all_points['point16'][0], all_points['point16'][1])
-    angle17_18_and_18_20 = compute_angle(all_points['point17'][0], all_points['point17'][1], all_points['point18'][0], all_points['point18'][1],
-                                         all_points['point18'][0], all_points['point18'][1], all_points['point20'][0], all_points['point20'][1])
-    angle1_2_and_2_4 = compute_angle(all_points['point1'][0], all_points['point1'][1], all_points['point2'][0], all_points['point2'][1],
-                                     all_points['point2'][0], all_points['point2'][1], all_points['point4'][0], all_points['point4'][1])
-
-    if angle2_3_and_2_4 < 0.2 * math.pi and angle5_6_and_6_8 < 0.07 * math.pi and angle9_10_and_10_12 < 0.07 * math.pi and angle13_14_and_14_16 < 0.07 * math.pi and angle17_18_and_18_20 < 0.07 * math.pi and angle9_10_and_10_12 < 0.07 * math.pi and angle1_2_and_2_4 < 0.25 * math.pi:
-        if angle0_5_and_0_17 > 0.1 * math.pi and all_points['point3'][1] > all_points['point4'][1] and all_points['point6'][1] > all_points['point8'][1] and all_points['point10'][1] > all_points['point12'][1]:
-            # return 'Pause'
-            return 'Rotation'
-        else:
-            return False
-    else:
-        return False
-
-def judge_Thumbs_Down(all_points, bend_states, straighten_states):
-    # 检查拇指是否伸直
-    if not straighten_states['first']:
-        return False
-
-    # 检查其他手指是否弯曲（根据需求可选）
-    # if not (bend_states['second'] and bend_states['third'] and bend_states['fourth'] and bend_states['fifth']):
-    #     return False
-
-    # 计算垂直方向的角度（手腕到拇指尖与垂直向下方向的夹角）
-    vertical_angle = compute_angle(
-        all_points['point0'][0], all_points['point0'][1],  # 手腕点
-        all_points['point0'][0], all_points['point0'][1] + 1,  # 垂直向下方向
-        all_points['point0'][0], all_points['point0'][1],  # 手腕点
-        all_points['point4'][0], all_points['point4'][1]   # 拇指尖
-    )
-
-    # 角度阈值（30度）
-    if vertical_angle > math.pi/6:
-        return False
-
-    # 检查拇指尖在手腕下方（假设y轴向下增大）
-    if all_points['point4'][1] <= all_points['point0'][1]:
-        return False
-
-    # 检查拇指长度（防止误判小幅度动作）
-    thumb_length = points_distance(all_points['point0'][0], all_points['point0'][1],
-                                   all_points['point4'][0], all_points['point4'][1])
-    if thumb_length < 0.15:  # 根据实际场景调整阈值
-        return False
-
-    return 'Thumbs_Down'
+    return bend_states, straighten_states
+
+
+# ==================== 手势规则表 ====================
+# 所有手势共用的判定条件（谓词）：f 为 HandFeatures，b / s 为手指弯曲 / 伸直状态
+# 注意：谓词内部统一使用 & | 组合，使同一张规则表既能逐帧求值，也能直接作用于批量数组
+GESTURE_PREDICATES = {
+    # 手指状态
+    'thumb_bend': lambda f, b, s: b['first'],
+    'thumb_straight': lambda f, b, s: s['first'],
+    'all_fingers_bend': lambda f, b, s: b['first'] & b['second'] & b['third'] & b['fourth'] & b['fifth'],
+    'four_fingers_bend': lambda f, b, s: b['second'] & b['third'] & b['fourth'] & b['fifth'],
+    'four_fingers_straight': lambda f, b, s: s['second'] & s['third'] & s['fourth'] & s['fifth'],
+    'three_fingers_straight': lambda f, b, s: s['third'] & s['fourth'] & s['fifth'],
+    # 四指握起：弯曲状态成立，或四个指节角都大于 0.2π
+    'four_fingers_folded': lambda f, b, s: (b['second'] & b['third'] & b['fourth'] & b['fifth']) | (
+        (f.angles[ANGLE5_6_AND_6_8] > 0.2 * math.pi) & (f.angles[ANGLE9_10_AND_10_12] > 0.2 * math.pi) &
+        (f.angles[ANGLE13_14_AND_14_16] > 0.2 * math.pi) & (f.angles[ANGLE17_18_AND_18_20] > 0.2 * math.pi)),
+    # 四指完全伸直：四个指节角都小于 0.07π
+    'four_fingers_flat': lambda f, b, s: (
+        (f.angles[ANGLE5_6_AND_6_8] < 0.07 * math.pi) & (f.angles[ANGLE9_10_AND_10_12] < 0.07 * math.pi) &
+        (f.angles[ANGLE13_14_AND_14_16] < 0.07 * math.pi) & (f.angles[ANGLE17_18_AND_18_20] < 0.07 * math.pi)),
+    # 四指指尖第二节都在第一节下方
+    'fingertips_below_pip': lambda f, b, s: (
+        (f.points[7][1] > f.points[6][1]) & (f.points[11][1] > f.points[10][1]) &
+        (f.points[15][1] > f.points[14][1]) & (f.points[19][1] > f.points[18][1])),
+    # 夹角 / 距离条件
+    'index_joint_bent': lambda f, b, s: f.angles[ANGLE5_6_AND_6_8] > 0.1 * math.pi,
+    'thumb_index_pinch': lambda f, b, s: (
+        (f.distances[DISTANCE4_AND_8] < f.distances[DISTANCE2_AND_6]) &
+        (f.distances[DISTANCE4_AND_6] > f.distances[DISTANCE4_AND_8]) & (f.points[11][1] < f.points[10][1])),
+    'thumb_spread_0_2_17': lambda f, b, s: f.angles[ANGLE_0_2_AND_0_17] > 0.15 * math.pi,
+    'index_pinky_level': lambda f, b, s: (f.angles[ANGLE18_6_AND_18_18_] < 0.1 * math.pi) | (f.angles[ANGLE_6_18_AND_6_6_] < 0.1 * math.pi),
+    'palm_spread_0_5_17': lambda f, b, s: f.angles[ANGLE0_5_AND_0_17] > 0.15 * math.pi,
+    'palm_open_0_5_17': lambda f, b, s: f.angles[ANGLE0_5_AND_0_17] > 0.1 * math.pi,
+    'thumb_away_from_index': lambda f, b, s: f.angles[ANGLE0_6_AND_0_4] > 0.1 * math.pi,
+    'thumb_points_left': lambda f, b, s: (f.angles[ANGLE0_0__AND_0_4] > 0.7 * math.pi) & (f.points[3][0] < f.points[2][0]),
+    'thumb_points_right': lambda f, b, s: (f.angles[ANGLE0_0__AND_0_4] < 0.25 * math.pi) & (f.points[3][0] > f.points[2][0]),
+    'thumb_points_up': lambda f, b, s: (
+        (f.angles[ANGLE0_0__AND_0_4] > 0.25 * math.pi) & (f.angles[ANGLE0_0__AND_0_4] < 0.75 * math.pi) &
+        (f.points[3][1] > f.points[4][1])),
+    'thumb_tip_straight': lambda f, b, s: f.angles[ANGLE2_3_AND_3_4] < 0.2 * math.pi,
+    'thumb_away_from_index_tip': lambda f, b, s: f.angles[ANGLE2_4_AND_2_8] > 0.1 * math.pi,
+    'knuckles_stacked': lambda f, b, s: (
+        (f.points[5][1] < f.points[9][1]) & (f.points[9][1] < f.points[13][1]) &
+        (f.points[13][1] < f.points[17][1]) & (f.points[2][1] < f.points[5][1])),
+    'thumb_flat': lambda f, b, s: (f.angles[ANGLE2_3_AND_2_4] < 0.2 * math.pi) & (f.angles[ANGLE1_2_AND_2_4] < 0.25 * math.pi),
+    'fingers_point_up': lambda f, b, s: (
+        (f.points[3][1] > f.points[4][1]) & (f.points[6][1] > f.points[8][1]) & (f.points[10][1] > f.points[12][1])),
+    'thumb_points_down': lambda f, b, s: (
+        (f.angles[ANGLE_VERTICAL_0_4] <= math.pi / 6) & (f.points[4][1] > f.points[0][1])),  # 与竖直向下方向夹角不超过30度，拇指尖在手腕下方（y轴向下增大）
+    'thumb_long': lambda f, b, s: f.distances[DISTANCE0_AND_4] >= 0.15,  # 防止误判小幅度动作，根据实际场景调整阈值
+}
+
+# 手势规则：(优先级, 手势名, 需要同时满足的谓词)，优先级数值越小越先判断
+# 新增手势只需在此添加一行；命中靠前的手势后不会再计算后面的规则
+GESTURE_RULES = (
+    (0, 'OK', ('index_joint_bent', 'three_fingers_straight', 'thumb_index_pinch')),
+    (1, 'Return', ('all_fingers_bend', 'thumb_spread_0_2_17', 'fingertips_below_pip', 'index_pinky_level')),
+    (2, 'Left', ('thumb_straight', 'four_fingers_folded', 'palm_spread_0_5_17', 'thumb_points_left',
+                 'thumb_away_from_index', 'fingertips_below_pip')),
+    (3, 'Right', ('thumb_straight', 'four_fingers_folded', 'palm_spread_0_5_17', 'thumb_points_right',
+                  'thumb_away_from_index', 'fingertips_below_pip')),
+    (4, 'Thumbs_up', ('thumb_tip_straight', 'four_fingers_folded', 'thumb_points_up', 'knuckles_stacked',
+                      'thumb_away_from_index', 'thumb_away_from_index_tip')),
+    # (5, 'Pause', ...)
+    (5, 'Rotation', ('thumb_flat', 'four_fingers_flat', 'palm_open_0_5_17', 'fingers_point_up')),
+    (6, 'Thumbs_Down', ('thumb_straight', 'thumb_points_down', 'thumb_long')),
+    (7, 'Palm_No_Thumb', ('thumb_bend', 'four_fingers_straight')),
+)
+
+
+def compile_gesture_rules(rules, predicates=None):
+    """
+    把规则表编译成求值函数 evaluate(features, bend_states, straighten_states) -> 手势名
+    每个谓词在一帧内最多计算一次（多条规则共用时直接复用结果），并在第一个命中的手势处停止
+    """
+    if predicates is None:
+        predicates = GESTURE_PREDICATES
+
+    # 给每个用到的谓词分配一个槽位，规则中的谓词名替换为槽位号
+    slots = {}
+    plan = []
+    for _, label, names in sorted(rules, key=lambda rule: rule[0]):
+        plan.append((label, tuple(slots.setdefault(name, len(slots)) for name in names)))
+    functions = [None] * len(slots)
+    for name, slot in slots.items():
+        functions[slot] = predicates[name]
+    slot_count = len(functions)
+
+    def evaluate(features, bend_states, straighten_states):
+        cache = [None] * slot_count
+        for label, rule_slots in plan:
+            for slot in rule_slots:
+                value = cache[slot]
+                if value is None:
+                    value = cache[slot] = bool(functions[slot](features, bend_states, straighten_states))
+                if not value:
+                    break
+            else:
+                return label
+        return 'None'
+
+    return evaluate
+
+
+def _compile_judge(label):
+    """单个手势的判断函数：只求值该手势的规则，命中返回手势名，否则返回 False"""
+    evaluate = compile_gesture_rules([rule for rule in GESTURE_RULES if rule[1] == label])
+
+    def judge(features, bend_states, straighten_states):
+        return label if evaluate(features, bend_states, straighten_states) == label else False
+
+    judge.__name__ = f'judge_{label}'
+    return judge
+
+
+judge_OK = _compile_judge('OK')
+judge_Return = _compile_judge('Return')
+judge_Left = _compile_judge('Left')
+judge_Right = _compile_judge('Right')
+judge_Thumbs_up = _compile_judge('Thumbs_up')
+# judge_Pause = _compile_judge('Pause')
+judge_Rotation = _compile_judge('Rotation')
+judge_Thumbs_Down = _compile_judge('Thumbs_Down')
+judge_Palm_No_Thumb = _compile_judge('Palm_No_Thumb')
+
+_evaluate_gestures = compile_gesture_rules(GESTURE_RULES)
 
 
 """
-检测当前手势，返回当前手势
+检测当前手势，返回当前手势（按规则表优先级，命中第一个即返回）
 """
-def detect_hand_state(all_points, bend_states, straighten_states):
-    state_OK = judge_OK(all_points, bend_states, straighten_states)
-    state_Return = judge_Return(all_points, bend_states, straighten_states)
-    state_Left = judge_Left(all_points, bend_states, straighten_states)
-    state_Right = judge_Right(all_points, bend_states, straighten_states)
-    state_Thumbs_up = judge_Thumbs_up(all_points, bend_states, straighten_states)
-    # state_Pause = judge_Pause(all_points, bend_states, straighten_states)
-    state_Rotation = judge_Rotation(all_points, bend_states, straighten_states)
-    state_Thumbs_down =judge_Thumbs_Down(all_points, bend_states, straighten_states)
-    state_Palm_No_Thumb = judge_Palm_No_Thumb(all_points, bend_states, straighten_states)
-
-
-    if state_OK == 'OK':
-        return 'OK'
-    elif state_Return == 'Return':
-        return 'Return'
-    elif state_Left == 'Left':
-        return 'Left'
-    elif state_Right == 'Right':
-        return 'Right'
-    elif state_Thumbs_up == 'Thumbs_up':
-        return 'Thumbs_up'
-    # elif state_Pause == 'Pause':
-    elif state_Rotation == 'Rotation':
-        # return 'Pause'
-        return 'Rotation'
-    elif state_Thumbs_down == 'Thumbs_Down':
-        return 'Thumbs_Down'
-    elif state_Palm_No_Thumb == 'Palm_No_Thumb':
-        return 'Palm_No_Thumb'
-    else:
-        return 'None'
+def detect_hand_state(features, bend_states, straighten_states):
+    return _evaluate_gestures(_as_features(features), bend_states, straighten_states)
 
 
+# ==================== 多手 / 批量分类 ====================
+def classify_hands(landmarks):
+    """
+    同一帧中多只手的手势识别：几何量对所有手一次向量化计算，规则仍逐手短路求值
+    手数很少时比 classify_batch 快得多，耗时随手数近似线性增长
+    :param landmarks: (H, 21, 2) 关键点坐标
+    :return: 长度为 H 的手势名列表
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    angles, distances = _compute_geometry(landmarks)
+    labels = []
+    for points, hand_angles, hand_distances in zip(landmarks.tolist(), angles.tolist(), distances.tolist()):
+        features = HandFeatures(points, hand_angles, hand_distances)
+        bend_states, straighten_states = detect_all_finger_state(features)
+        labels.append(_evaluate_gestures(features, bend_states, straighten_states))
+    return labels
+
+
+
+def _evaluate_gestures_batch(features, bend_states, straighten_states, rules=GESTURE_RULES, predicates=None):
+    """规则表的批量版本：每个谓词对全部帧只计算一次，再按优先级为每帧选出第一个命中的手势"""
+    if predicates is None:
+        predicates = GESTURE_PREDICATES
+    frame_count = len(bend_states['first'])
+    values = {}
+    masks = []
+    labels = []
+    for _, label, names in sorted(rules, key=lambda rule: rule[0]):
+        mask = np.ones(frame_count, dtype=bool)
+        for name in names:
+            if name not in values:
+                values[name] = np.broadcast_to(predicates[name](features, bend_states, straighten_states), (frame_count,))
+            mask &= values[name]
+        masks.append(mask)
+        labels.append(label)
+    return np.select(masks, labels, default='None') if masks else np.full(frame_count, 'None')
+
+
+def classify_batch(landmarks):
+    """
+    批量检测手指状态与手势，结果与逐帧调用 detect_all_finger_state + detect_hand_state 一致
+    :param landmarks: (N, 21, 2) 关键点坐标
+    :return: bend_states (N, 5) bool, straighten_states (N, 5) bool, labels (N,) 手势名
+             手指顺序同 FINGER_NAMES
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (21, 2):
+        raise ValueError(f"landmarks 形状应为 (N, 21, 2)，实际为 {landmarks.shape}")
+
+    angles, distances = _compute_geometry(landmarks)
+
+    finger_angles = angles[:, ANGLE_FINGERS]
+    bend = np.empty(finger_angles.shape, dtype=bool)
+    straighten = np.empty(finger_angles.shape, dtype=bool)
+    bend[:, 0] = finger_angles[:, 0] > FINGER_FIRST_ANGLE_BEND_THRESHOLD
+    straighten[:, 0] = ~bend[:, 0]
+    bend[:, 1:] = finger_angles[:, 1:] > FINGER_OTHER_ANGLE_BEND_THRESHOLD
+    straighten[:, 1:] = finger_angles[:, 1:] < FINGER_OTHER_ANGLE_STRAIGHTEN_THRESHOLD
+
+    # 转置后 points[i][axis]、angles[k] 均为长度 N 的数组，规则谓词可直接逐元素求值
+    features = HandFeatures(landmarks.transpose(1, 2, 0), angles.T, distances.T)
+    bend_states = {name: bend[:, i] for i, name in enumerate(FINGER_NAMES)}
+    straighten_states = {name: straighten[:, i] for i, name in enumerate(FINGER_NAMES)}
+
+    labels = _evaluate_gestures_batch(features, bend_states, straighten_states)
+    return bend, straighten, labels
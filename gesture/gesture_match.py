@@ -1,141 +1,440 @@
+import argparse
+import queue
+import time
+
 import cv2
 import mediapipe as mp
-import time
+import numpy as np
 import Quadrotor_HTTP
 import Quadrotor_websocket
 
 # from Quadrotor_HTTP import action_Left, action_Right, action_Thumbs_Up, action_Thumbs_Down, action_Pause, \
 #     action_Forward, action_Backward
-from gesture_judgment import detect_all_finger_state, detect_hand_state
+from command_protocol import ACK_EACH, ACK_MODES, PROTOCOL_JSON, SUPPORTED_PROTOCOLS
+from frame_orientation import ROTATE_90_CLOCKWISE, FrameOrientation, draw_hand
+from frame_preview import FramePreview, add_preview_arguments, preview_from_args
+from gesture_debounce import DEFAULT_REPEAT_INTERVAL, GestureDebouncer, parse_gesture_dwell
+from gesture_judgment import classify_hands as classify_hands_batch
+from hand_roi import HandROI
+from hand_tracking import HandTracker
+from latency_trace import CAPTURE, CLASSIFY, INFERENCE, LatencyTracker
+from landmark_flow import LandmarkFlow
+from landmark_session import MAX_HANDS, SessionRecorder, SessionReplay, handedness_code, mediapipe_hands
+from pipeline import Pipeline
 
-# 1. 实例化
-ws_control = Quadrotor_websocket.WebSocketControl(ws_url='ws://192.168.24.136:5000')
-ws_control.init_ws_connection()
-time.sleep(2)
+WS_URL = 'ws://192.168.24.136:5000'
 
-# 初始化 Mediapipe Hands
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-mp_drawing = mp.solutions.drawing_utils
 
-# 存储最近 15 次的手势判断结果，用于稳定性检测
-recent_states = [''] * 5
 
-# 打开摄像头
-cap = cv2.VideoCapture(0)
+def classify_hands(hands, w, h):
+    """
+    对一帧中的所有手做手势识别（一次向量化计算）
+    :param hands: [(左右手编码, (21, 2) MediaPipe 归一化关键点), ...]
+    :return: 与 hands 对应的手势名列表
+    """
+    if not hands:
+        return []
+    # 转为像素坐标（与逐个 int(landmark.x * w) 相同的取整方式）
+    points = np.trunc(np.stack([normalized_points for _, normalized_points in hands]) * (w, h))
+    return classify_hands_batch(points)
+
+
+def dispatch_gesture(ws_control, gesture, hold=None):
+    """
+    模拟调用无人机控制接口
+    :param hold: 运动命令的持续时间（秒），None 表示使用各动作的默认值
+    """
+    timing = {} if hold is None else {'T': hold}
+    if gesture == "OK":
+        ws_control.action_Forward(**timing)
+        #Quadrotor_HTTP.action_Forward()
+        print("Drone action: Move forward")
+    elif gesture == "Return":
+        ws_control.action_Backward(**timing)
+        #Quadrotor_HTTP.action_Backward()
+        print("Drone action: Move backward")
+    elif gesture == "Left":
+        ws_control.action_Left(**timing)
+        #Quadrotor_HTTP.action_Left()
+        print("Move left")
+    elif gesture == "Right":
+        ws_control.action_Right(**timing)
+        #Quadrotor_HTTP.action_Right()
+        print("Move right")
+    elif gesture == "Thumbs_up":
+        ws_control.action_Thumbs_Up(**timing)
+        #Quadrotor_HTTP.action_Thumbs_Up()
+        print("Hover")
+    elif gesture == "Rotation":
+        # ws_control.action_Pause()
+        ws_control.action_Rotate(**timing)
+        #Quadrotor_HTTP.action_Pause()
+        print("Emergency stop")
+    elif gesture == "Thumbs_Down":
+        ws_control.action_Thumbs_Down(**timing)
+        #Quadrotor_HTTP.action_Thumbs_Down()
+        print("down")
+    elif gesture == "Palm_No_Thumb":
+        ws_control.action_Rotate(R=1.0, **timing)
+        # print("Gesture: Palm_No_Thumb detected — perform custom action")
+
+
+# 动作命令的默认持续时间（WebSocketControl.action_* 的默认 T），命令到期后无人机停止
+ACTION_HOLD_TIME = 0.05
+
+
+def repeat_hold_time(repeat_interval):
+    """
+    重复发送时每条命令的持续时间：至少为重复间隔的两倍，漏掉一次重复（或按帧率取整推迟）运动也不会中断
+    :return: 持续时间（秒），repeat_interval 为 None（只在变化时发送）时为 None，即使用动作的默认值
+    """
+    if repeat_interval is None:
+        return None
+    return max(2 * repeat_interval, ACTION_HOLD_TIME)
+
+
+class HandGestureController:
+    """
+    多手手势控制：每只手有自己的跟踪 ID 与去抖器
+    只有操控手（steer_hand 指定左右手，否则为最早出现的手）的手势事件会发送控制命令：
+    进入新的稳定手势时立即发送，保持期间按 repeat_interval 重复发送（每条命令持续 repeat_hold_time 秒，
+    运动连续而命令数只有逐帧发送的约十分之一），松开手势后最后一条命令到期、运动停止；
+    设置 confirm_gesture 时，还需要另一只手稳定地保持该确认手势才会发送
+    """
+
+    def __init__(self, ws_control, steer_hand=None, confirm_gesture=None, repeat_interval=DEFAULT_REPEAT_INTERVAL,
+                 **debounce_options):
+        """
+        :param repeat_interval: 保持手势时重复发送的间隔（秒），None 表示只在手势变化时发送（每次只运动 ACTION_HOLD_TIME 秒）
+        :param debounce_options: 传给 GestureDebouncer 的其他参数（dwell_frames、exit_frames、gesture_dwell）
+        """
+        self.ws_control = ws_control
+        self.steer_hand = steer_hand
+        self.confirm_gesture = confirm_gesture
+        self.debounce_options = dict(debounce_options, repeat_interval=repeat_interval)
+        self.hold = repeat_hold_time(repeat_interval)
+        self.tracker = HandTracker()
+        self.debouncers = {}
+        self.dispatched = 0
+
+    def update(self, hands, w, h, trace=None):
+        """
+        处理一帧中的所有手
+        :param trace: 延迟追踪上下文（{时间戳名: 时间}），识别完成时记录 CLASSIFY，并随发送的命令传给 ws_control
+        :return: [(跟踪 ID, 当前手势), ...]
+        """
+        tracks = self.tracker.update(hands)
+        for track_id in self.tracker.lost_ids:
+            self.debouncers.pop(track_id, None)
+        labels = classify_hands(hands, w, h)
+        if trace is not None:
+            trace[CLASSIFY] = time.time()
+
+        events = {}
+        for track, current_state in zip(tracks, labels):
+            debouncer = self.debouncers.get(track.track_id)
+            if debouncer is None:
+                debouncer = self.debouncers[track.track_id] = GestureDebouncer(**self.debounce_options)
+            gesture = debouncer.update(current_state)
+            if gesture is not None:
+                events[track.track_id] = gesture
 
-prev_time = 0
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame")
-        break
+        steer = self._steer_track(tracks)
+        if steer is not None and steer.track_id in events:
+            gesture = events[steer.track_id]
+            confirmed = self.confirm_gesture is None or any(
+                track.track_id != steer.track_id and self.debouncers[track.track_id].state == self.confirm_gesture
+                for track in tracks)
+            if confirmed:
+                print(f"Detected consistent hand state (hand {steer.track_id}):", gesture)
+                if trace is not None:
+                    with self.ws_control.traced(trace):
+                        dispatch_gesture(self.ws_control, gesture, self.hold)
+                else:
+                    dispatch_gesture(self.ws_control, gesture, self.hold)
+                self.dispatched += 1
 
-    # 先把画面顺时针旋转 90°
-    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+        return [(track.track_id, current_state) for track, current_state in zip(tracks, labels)]
 
-    frame = cv2.flip(frame, 1)  # 水平镜像翻转
+    def _steer_track(self, tracks):
+        candidates = tracks
+        if self.steer_hand is not None:
+            candidates = [track for track in tracks if track.handedness == self.steer_hand]
+        return min(candidates, key=lambda track: track.track_id, default=None)
+
+
+# 摄像头画面方向：先顺时针旋转 90°，再水平镜像翻转
+CAMERA_ORIENTATION = FrameOrientation(ROTATE_90_CLOCKWISE, 'mirror')
+
+
+class HandDetector:
+    """
+    摄像头画面 -> 手部关键点，可同时把关键点录制到文件
+    MediaPipe 直接处理摄像头原始方向的画面，旋转 / 镜像只作用在关键点坐标上，不再逐帧复制整幅图像
+    设置 roi_size 时启用裁剪推理：只处理上一帧手部周围缩放到 roi_size 的区域
+    设置 flow_every 时每隔 flow_every 帧运行一次 MediaPipe，中间的帧用光流传播关键点（漂移过大时提前检测）
+    """
+
+    def __init__(self, max_num_hands=1, recorder_path=None, orientation=CAMERA_ORIENTATION, roi_size=None,
+                 flow_every=None):
+        # 初始化 Mediapipe Hands
+        def create_hands():
+            return mp_hands.Hands(static_image_mode=False, max_num_hands=max_num_hands, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        self.hands = create_hands()
+        self.max_num_hands = max_num_hands
+        self.orientation = orientation
+        self.recorder_path = recorder_path
+        self.recorder = None
+        # 裁剪区域使用单独的 Hands 实例，两个实例的跟踪状态各自对应一种画面几何
+        self.roi = HandROI(create_hands(), roi_size, max_num_hands=max_num_hands) if roi_size else None
+        self.flow = LandmarkFlow(flow_every) if flow_every and flow_every > 1 else None
+
+    def process(self, frame):
+        """
+        :param frame: 摄像头原始方向的 BGR 画面
+        :return: ([(左右手编码, (21, 2) 显示方向的归一化关键点), ...], 显示方向的画面尺寸 (w, h))
+        """
+        h, w = frame.shape[:2]
+        if self.flow is not None:
+            detected_hands = self.flow.process(frame, lambda: self._detect(frame))
+        else:
+            detected_hands = self._detect(frame)
+        detected_hands = self.orientation.transform_hands(detected_hands)
+        w, h = self.orientation.oriented_size(w, h)
+
+        if self.recorder_path is not None:
+            if self.recorder is None:
+                self.recorder = SessionRecorder(self.recorder_path, w, h, max_hands=max(self.max_num_hands, MAX_HANDS))
+            self.recorder.write(detected_hands)
+
+        return detected_hands, (w, h)
+
+    def _detect(self, frame):
+        """在原始方向的画面上运行 MediaPipe，返回原始方向的归一化关键点"""
+        if self.roi is not None:
+            return self.roi.process(self.hands, frame, self.orientation.to_rgb)
+        return mediapipe_hands(self.hands.process(self.orientation.to_rgb(frame)))
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"已录制 {self.recorder.frame_count} 帧到 {self.recorder_path}")
+        if self.roi is not None:
+            print(f"裁剪推理 {self.roi.crop_frames} 次，整幅画面检测 {self.roi.detect_frames} 次")
+        if self.flow is not None:
+            print(f"检测 {self.flow.detect_frames} 帧，光流传播 {self.flow.flow_frames} 帧，漂移重新检测 {self.flow.redetects} 次")
+
+
+def draw_hands(frame, detected_hands, hand_states, show_ids=False):
+    """在显示方向的画面上绘制关键点（多手时同时标出跟踪 ID 与当前手势）"""
     h, w = frame.shape[:2]
-    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    keypoints = hands.process(image)
-
-    if keypoints.multi_hand_landmarks:
-        lm = keypoints.multi_hand_landmarks[0]
-        lmHand = mp_hands.HandLandmark
-
-        # 提取关键点坐标
-        landmark_list = [[] for _ in range(6)]
-        for index, landmark in enumerate(lm.landmark):
-            x = int(landmark.x * w)
-            y = int(landmark.y * h)
-            if index == lmHand.WRIST:
-                landmark_list[0].append((x, y))
-            elif 1 <= index <= 4:
-                landmark_list[1].append((x, y))
-            elif 5 <= index <= 8:
-                landmark_list[2].append((x, y))
-            elif 9 <= index <= 12:
-                landmark_list[3].append((x, y))
-            elif 13 <= index <= 16:
-                landmark_list[4].append((x, y))
-            elif 17 <= index <= 20:
-                landmark_list[5].append((x, y))
-
-        # 将所有关键点的坐标存储到一起，简化后续函数的参数
-        all_points = {
-            'point0': landmark_list[0][0],
-            'point1': landmark_list[1][0], 'point2': landmark_list[1][1], 'point3': landmark_list[1][2], 'point4': landmark_list[1][3],
-            'point5': landmark_list[2][0], 'point6': landmark_list[2][1], 'point7': landmark_list[2][2], 'point8': landmark_list[2][3],
-            'point9': landmark_list[3][0], 'point10': landmark_list[3][1], 'point11': landmark_list[3][2], 'point12': landmark_list[3][3],
-            'point13': landmark_list[4][0], 'point14': landmark_list[4][1], 'point15': landmark_list[4][2], 'point16': landmark_list[4][3],
-            'point17': landmark_list[5][0], 'point18': landmark_list[5][1], 'point19': landmark_list[5][2], 'point20': landmark_list[5][3]
-        }
-
-        # 调用函数，判断每根手指的弯曲或伸直状态
-        bend_states, straighten_states = detect_all_finger_state(all_points)
-
-        # 调用函数，检测当前手势
-        current_state = detect_hand_state(all_points, bend_states, straighten_states)
-
-        # 更新最近状态列表
-        recent_states.pop(0)
-        recent_states.append(current_state)
-
-        # 检查列表中的所有状态是否相同（连续 30 帧稳定）
-        if len(set(recent_states)) == 1:
-            gesture = recent_states[0]
-            print("Detected consistent hand state:", gesture)
-
-            # 模拟调用无人机控制接口
-            if gesture == "OK":
-                ws_control.action_Forward()
-                #Quadrotor_HTTP.action_Forward()
-                print("Drone action: Move forward")
-            elif gesture == "Return":
-                ws_control.action_Backward()
-                #Quadrotor_HTTP.action_Backward()
-                print("Drone action: Move backward")
-            elif gesture == "Left":
-                ws_control.action_Left()
-                #Quadrotor_HTTP.action_Left()
-                print("Move left")
-            elif gesture == "Right":
-                ws_control.action_Right()
-                #Quadrotor_HTTP.action_Right()
-                print("Move right")
-            elif gesture == "Thumbs_up":
-                ws_control.action_Thumbs_Up()
-                #Quadrotor_HTTP.action_Thumbs_Up()
-                print("Hover")
-            elif gesture == "Rotation":
-                # ws_control.action_Pause()
-                ws_control.action_Rotate()
-                #Quadrotor_HTTP.action_Pause()
-                print("Emergency stop")
-            elif gesture == "Thumbs_Down":
-                ws_control.action_Thumbs_Down()
-                #Quadrotor_HTTP.action_Thumbs_Down()
-                print("down")
-            elif gesture == "Palm_No_Thumb":
-                ws_control.action_Rotate(R=1.0)
-                # print("Gesture: Palm_No_Thumb detected — perform custom action")
-
-        # 绘制关键点
-        for hand_landmarks in keypoints.multi_hand_landmarks:
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                                      mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=4),
-                                      mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2))
-
-    # 计算帧率并显示
-    curr_time = time.time()
-    fps = 1 / (curr_time - prev_time) if prev_time != 0 else 0
-    prev_time = curr_time
-    cv2.putText(frame, f"FPS: {int(fps)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-
-    # 显示画面
-    cv2.imshow("Hand Detection", frame)
-    if cv2.waitKey(1) == ord("q"):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+    for (_, points), (track_id, current_state) in zip(detected_hands, hand_states):
+        draw_hand(frame, points)
+        if show_ids:
+            cv2.putText(frame, f"#{track_id} {current_state}", (int(points[0, 0] * w), int(points[0, 1] * h)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+
+def run_camera(controller, recorder_path=None, max_num_hands=1, preview=None, roi_size=None, flow_every=None):
+    """
+    摄像头实时识别：采集、推理、识别、显示依次在同一线程中进行
+    :param preview: FramePreview，无界面模式下只有需要保存调试画面的帧才绘制
+    """
+    preview = preview or FramePreview("Hand Detection")
+    detector = HandDetector(max_num_hands, recorder_path, roi_size=roi_size, flow_every=flow_every)
+
+    # 打开摄像头
+    cap = cv2.VideoCapture(0)
+
+    frame = None
+    prev_time = 0
+    try:
+        while True:
+            # 复用上一帧的缓冲区读取新画面
+            ret, frame = cap.read(frame)
+            if not ret:
+                print("Failed to grab frame")
+                break
+            trace = {CAPTURE: time.time()}
+
+            detected_hands, (w, h) = detector.process(frame)
+            trace[INFERENCE] = time.time()
+            hand_states = controller.update(detected_hands, w, h, trace)
+
+            # 计算帧率
+            curr_time = time.time()
+            fps = 1 / (curr_time - prev_time) if prev_time != 0 else 0
+            prev_time = curr_time
+
+            if not preview.wants_frame():
+                continue
+            # 显示用的画面才需要旋转 / 镜像
+            view = detector.orientation.apply_to_frame(frame)
+            draw_hands(view, detected_hands, hand_states, show_ids=max_num_hands > 1)
+            cv2.putText(view, f"FPS: {int(fps)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+
+            # 显示画面
+            if not preview.show(view):
+                break
+    except KeyboardInterrupt:
+        pass
+
+    detector.close()
+    cap.release()
+    preview.close()
+
+
+def run_pipeline(controller, recorder_path=None, max_num_hands=1, report_interval=2.0, preview=None, roi_size=None,
+                 flow_every=None):
+    """
+    流水线模式：采集、推理、识别与命令发送各在一个线程中，阶段之间的队列只保留最新一帧
+    采集线程持续读取摄像头，驱动缓冲区不会积压旧帧；推理总是处理最新的画面
+    显示在主线程中进行（OpenCV 窗口需要在主线程操作）
+    """
+    preview = preview or FramePreview("Hand Detection")
+    detector = HandDetector(max_num_hands, recorder_path, roi_size=roi_size, flow_every=flow_every)
+
+    # 打开摄像头
+    cap = cv2.VideoCapture(0)
+
+    def capture():
+        ret, frame = cap.read()
+        if not ret:
+            print("Failed to grab frame")
+            raise StopIteration
+        return frame, {CAPTURE: time.time()}
+
+    def inference(item):
+        frame, trace = item
+        detected_hands, size = detector.process(frame)
+        trace[INFERENCE] = time.time()
+        return frame, trace, detected_hands, size
+
+    def dispatch(item):
+        frame, trace, detected_hands, (w, h) = item
+        hand_states = controller.update(detected_hands, w, h, trace)
+        return frame, detected_hands, hand_states
+
+    pipeline = Pipeline()
+    pipeline.add_stage('capture', capture)
+    pipeline.add_stage('inference', inference)
+    display_queue = pipeline.add_stage('dispatch', dispatch)
+    pipeline.start()
+
+    last_report = time.perf_counter()
+    try:
+        while pipeline.running:
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                print(f"[PIPELINE] {pipeline.report()}")
+                if hasattr(controller.ws_control, 'stats'):
+                    print(f"[WS] {controller.ws_control.stats()}")
+                last_report = now
+
+            try:
+                frame, detected_hands, hand_states = display_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not preview.wants_frame():
+                continue
+            view = detector.orientation.apply_to_frame(frame)
+            draw_hands(view, detected_hands, hand_states, show_ids=max_num_hands > 1)
+
+            # 显示画面
+            if not preview.show(view):
+                break
+    except KeyboardInterrupt:
+        pass
+
+    pipeline.stop()
+    detector.close()
+    cap.release()
+    preview.close()
+
+
+def run_replay(controller, replay_path, speed=None):
+    """回放录制的关键点，经过相同的识别与控制流程；speed 为 None 时以最快速度回放并统计吞吐"""
+    replay = SessionReplay(replay_path)
+
+    start = time.perf_counter()
+    for frame in replay.frames(speed=speed):
+        controller.update(frame.hands, replay.width, replay.height)
+    elapsed = time.perf_counter() - start
+    print(f"回放 {len(replay)} 帧，发送 {controller.dispatched} 条命令，"
+          f"用时 {elapsed:.3f}s，{len(replay) / max(elapsed, 1e-9):.0f} frames/s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="手势识别控制无人机")
+    parser.add_argument('--ws-url', default=WS_URL, help="控制服务器地址")
+    parser.add_argument('--async-client', action='store_true', help="使用 asyncio 客户端（多连接共用一个事件循环）")
+    parser.add_argument('--ack-mode', choices=ACK_MODES, default=ACK_EACH,
+                        help="请求服务端的应答方式：each 逐条应答，cumulative 定期累计应答，none 不应答")
+    parser.add_argument('--protocol', choices=SUPPORTED_PROTOCOLS, default=PROTOCOL_JSON,
+                        help="命令格式：json 兼容所有服务端；bin1 连接后协商二进制帧，不支持握手的旧服务端每次连接会记录一条错误")
+    parser.add_argument('--drone', help="要控制的无人机编号（服务端控制多架无人机时，如 uav1）")
+    parser.add_argument('--record', help="把摄像头识别到的关键点录制到文件")
+    parser.add_argument('--replay', help="回放录制的关键点文件，代替摄像头")
+    parser.add_argument('--replay-speed', type=float, default=0.0, help="回放倍速，0 表示最快速度")
+    parser.add_argument('--max-hands', type=int, default=1, help="最多同时识别的手数")
+    parser.add_argument('--steer-hand', choices=('Left', 'Right'), help="操控手（MediaPipe 左右手标记），默认为最早出现的手")
+    parser.add_argument('--confirm-gesture', help="另一只手需要保持的确认手势，设置后操控手的命令需确认才发送")
+    parser.add_argument('--dwell-frames', type=int, default=5, help="手势连续出现多少帧才认为稳定")
+    parser.add_argument('--dwell', action='append', default=[], metavar='GESTURE=FRAMES',
+                        help="单个手势的稳定帧数，例如 Rotation=8，可重复指定")
+    parser.add_argument('--exit-frames', type=int, default=3, help="稳定手势连续消失多少帧才释放（迟滞）")
+    parser.add_argument('--repeat-interval', type=float, default=DEFAULT_REPEAT_INTERVAL,
+                        help="保持手势时重复发送命令的间隔（秒），每条命令持续两倍间隔；"
+                             f"0 表示只在手势变化时发送（每次只运动 {ACTION_HOLD_TIME}s）")
+    parser.add_argument('--pipeline', action='store_true', help="采集、推理、命令发送分别在独立线程中运行")
+    parser.add_argument('--roi-size', type=int, default=0,
+                        help="裁剪推理尺寸：只处理上一帧手部周围缩放到该边长的区域，0 表示处理整幅画面")
+    parser.add_argument('--flow-every', type=int, default=0,
+                        help="每隔多少帧运行一次 MediaPipe，中间帧用光流传播关键点，0 表示每帧检测")
+    parser.add_argument('--trace-latency', action='store_true',
+                        help="追踪每条命令从画面采集到服务端发布 /cmd_vel 的各阶段延迟，定期输出 p50/p95/p99")
+    parser.add_argument('--latency-interval', type=float, default=10.0, help="延迟统计输出间隔（秒）")
+    parser.add_argument('--latency-export', help="延迟统计定期写入的 JSON 文件")
+    add_preview_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # 1. 实例化
+    tracker = None
+    if args.trace_latency:
+        tracker = LatencyTracker(report_interval=args.latency_interval, export_path=args.latency_export)
+    if args.async_client:
+        # asyncio 客户端依赖 websockets 包，只在使用时导入
+        from async_control import SyncDroneClient
+        ws_control = SyncDroneClient(args.ws_url, protocol=args.protocol, ack_mode=args.ack_mode, drone=args.drone)
+    else:
+        ws_control = Quadrotor_websocket.WebSocketControl(ws_url=args.ws_url, protocol=args.protocol, tracker=tracker,
+                                                          ack_mode=args.ack_mode, drone=args.drone)
+    ws_control.init_ws_connection()
+    time.sleep(2)
+
+    controller = HandGestureController(
+        ws_control,
+        steer_hand=handedness_code(args.steer_hand) if args.steer_hand else None,
+        confirm_gesture=args.confirm_gesture,
+        dwell_frames=args.dwell_frames,
+        exit_frames=args.exit_frames,
+        repeat_interval=args.repeat_interval or None,
+        gesture_dwell=parse_gesture_dwell(args.dwell),
+    )
+    if args.replay:
+        run_replay(controller, args.replay, speed=args.replay_speed or None)
+    elif args.pipeline:
+        run_pipeline(controller, recorder_path=args.record, max_num_hands=args.max_hands,
+                     preview=preview_from_args("Hand Detection", args), roi_size=args.roi_size,
+                     flow_every=args.flow_every)
+    else:
+        run_camera(controller, recorder_path=args.record, max_num_hands=args.max_hands,
+                   preview=preview_from_args("Hand Detection", args), roi_size=args.roi_size,
+                   flow_every=args.flow_every)
+    if tracker is not None:
+        tracker.report()
@@ -1,54 +1,68 @@
+import argparse
+import time
+
 import cv2
 import mediapipe as mp
-import numpy as np
 
 import Quadrotor_websocket
-
-def init_gesture_detector():
-    """初始化手势检测模型"""
+from command_protocol import ACK_EACH, ACK_MODES, PROTOCOL_JSON, SUPPORTED_PROTOCOLS
+from continuous_control import ContinuousController
+from control_scheduler import PeriodicSender, RateGate
+from frame_orientation import ROTATE_90_COUNTERCLOCKWISE, FrameOrientation, draw_hand
+from frame_preview import FramePreview, add_preview_arguments, preview_from_args
+from hand_roi import HandROI
+from landmark_flow import LandmarkFlow
+from landmark_session import MAX_HANDS, SessionRecorder, SessionReplay, handedness_code, mediapipe_hands
+
+# 摄像头画面到控制画面的方向：先水平镜像（更符合直觉）再逆时针旋转 90°
+# 只作用在关键点坐标上，画面本身只在显示时才旋转
+SIMULATION_ORIENTATION = FrameOrientation('mirror', ROTATE_90_COUNTERCLOCKWISE)
+
+def create_hands(max_num_hands=1):
+    """创建视频模式的 MediaPipe Hands（跟踪状态与输入画面的几何对应，每种输入各用一个实例）"""
     mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        max_num_hands=1,
+    return mp_hands.Hands(
+        max_num_hands=max_num_hands,
         min_detection_confidence=0.7,
         min_tracking_confidence=0.5
     )
+
+
+def init_gesture_detector(max_num_hands=1):
+    """初始化手势检测模型"""
+    hands = create_hands(max_num_hands)
     mp_draw = mp.solutions.drawing_utils
     return hands, mp_draw
 
 
-# 全局变量用于低通滤波
-prev_throttle = 0
-prev_roll = 0
-prev_pitch = 0
-prev_throttle_x = 0
+def select_hand(detected_hands, steer_hand=None):
+    """
+    从一帧的所有手中选出用于控制的手
+    :param steer_hand: 操控手的左右手编码，None 表示取第一只手
+    :return: 在 detected_hands 中的下标，没有可用的手时为 None
+    """
+    for i, (handedness, _) in enumerate(detected_hands):
+        if steer_hand is None or handedness == steer_hand:
+            return i
+    return None
+
 
-def detect_gesture(frame, hands, mp_draw=None):
+def detect_gesture(frame, hands, controller, mp_draw=None, recorder=None, steer_hand=None,
+                   orientation=SIMULATION_ORIENTATION, render=True, roi=None, flow=None):
     """
     核心手势识别函数（完整修正版）
-    :param frame: BGR格式输入帧
+    :param frame: 摄像头原始方向的BGR格式输入帧
     :param hands: 初始化后的手势模型
-    :param mp_draw: 绘图工具（可选）
-    :return: 控制指令字典 + 绘制后的帧
+    :param controller: ContinuousController，保存本路控制的滤波状态
+    :param mp_draw: 绘图工具（可选，不为 None 时绘制关键点）
+    :param recorder: 关键点录制器（可选）
+    :param steer_hand: 多手时用于控制的手（左右手编码），None 表示第一只手
+    :param orientation: 原始画面到控制画面的方向变换
+    :param render: 为 False 时不生成显示帧（无界面运行）
+    :param roi: HandROI（可选），设置时只对上一帧手部周围的裁剪区域做推理
+    :param flow: LandmarkFlow（可选），设置时只在需要检测的帧运行模型，其余帧用光流传播关键点
+    :return: 控制指令字典 + 控制画面方向的显示帧（render 为 False 时为 None）
     """
-    global prev_throttle, prev_roll, prev_pitch,prev_throttle_x
-
-    # 默认控制指令
-    control = {
-        'throttle': 0,  # 垂直方向：-100~100
-        'throttle_x':0, # 水平位置：用来判断是否旋转
-        'roll': 0,  # 左右方向：-50~50
-        'pitch': 0,  # 前后方向：-50~50
-        'emergency_stop': False  # 急停标志
-    }
-
-    # ==================== 参数配置 ====================
-    THROTTLE_DEADZONE = 0.15  # 油门死区（原0.1→0.15）
-    DEADZONE_X = 0.15  # 新增：水平方向死区
-    ROLL_DEADZONE = 0.1  # 横滚死区（原0.05→0.1）
-    PITCH_DEADZONE = 0.1  # 俯仰死区（原0.05→0.1）
-    EMERGENCY_STOP_DISTANCE = 0.05  # 握拳急停阈值
-    SMOOTHING_FACTOR = 0.3  # 低通滤波系数（0~1，值越大越平滑）
-
     # ==================== 画面处理 ====================
     # 绘制参考线（中心±0.4窗口位置）
     # h, w = frame.shape[:2]
@@ -58,213 +72,241 @@ def detect_gesture(frame, hands, mp_draw=None):
     # cv2.line(frame, (0, int(h * 0.9)), (w, int(h * 0.9)), (0, 255, 0), 1)  # 下横线
 
     # ==================== 手势检测 ====================
-    # 转换颜色空间
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
-
-    if results.multi_hand_landmarks:
-        hand_landmarks = results.multi_hand_landmarks[0]
-        landmarks = hand_landmarks.landmark
-        h, w = frame.shape[:2]
-
+    # 转换颜色空间（写入复用的缓冲区），在原始方向的画面上检测
+    def detect():
+        if roi is not None:
+            return roi.process(hands, frame, orientation.to_rgb)
+        return mediapipe_hands(hands.process(orientation.to_rgb(frame)))
+
+    detected_hands = flow.process(frame, detect) if flow is not None else detect()
+    # 关键点坐标变换到控制画面方向
+    detected_hands = orientation.transform_hands(detected_hands)
+    if recorder is not None:
+        recorder.write(detected_hands)
+
+    vis_frame = orientation.apply_to_frame(frame) if render else None
+    index = select_hand(detected_hands, steer_hand)
+    if index is not None:
         # 绘制关键点（可选）
-        if mp_draw is not None:
-            mp_draw.draw_landmarks(
-                frame, hand_landmarks,
-                mp.solutions.hands.HAND_CONNECTIONS
-            )
-
-        # ==================== 油门控制 ====================
-        # 计算手掌中心水平位置
-        palm_center_x = np.mean([lm.x for lm in landmarks])
-        throttle_x_raw = (palm_center_x - 0.5) * 2  # [-1,1]
-        # 计算手掌中心垂直位置（归一化到0~1）
-        palm_center_y = np.mean([lm.y for lm in landmarks])
-        # 映射到[-1, 1]，中心为0，上移为正，下移为负
-        throttle_raw = (0.5 - palm_center_y) * 2
-
-        # ==================== 横滚控制 ====================
-        # 获取食指指尖和手腕坐标
-        index_tip = landmarks[mp.solutions.hands.HandLandmark.INDEX_FINGER_TIP]
-        wrist = landmarks[mp.solutions.hands.HandLandmark.WRIST]
-
-        # 计算食指相对于手腕的偏移量
-        dx = index_tip.x - wrist.x
-        dy = index_tip.y - wrist.y
-
-        # 计算倾斜角度并反转方向（修复左右反向问题）
-        angle = np.arctan2(dy, dx)
-        roll_raw = -np.sin(angle)  # 添加负号修复方向
-
-        # ==================== 俯仰控制 ====================
-        # 计算俯仰并反转方向（修复前后反向问题）
-        pitch_raw = -np.cos(angle)  # 添加负号修复方向
-
-        # ==================== 急停检测 ====================
-        # 计算拇指尖端与根部的距离（握拳检测）
-        thumb_tip = landmarks[mp.solutions.hands.HandLandmark.THUMB_TIP]
-        thumb_mcp = landmarks[mp.solutions.hands.HandLandmark.THUMB_MCP]
-        distance = np.hypot(
-            thumb_tip.x - thumb_mcp.x,
-            thumb_tip.y - thumb_mcp.y
-        )
-
-        # ==================== 控制逻辑 ====================
-        if distance < EMERGENCY_STOP_DISTANCE:
-            # 急停：所有控制量归零
-            control.update({
-                'throttle': 0,
-                'throttle_x':0,
-                'roll': 0,
-                'pitch': 0,
-                'emergency_stop': True
-            })
-        else:
-            # ------------ 油门处理 ------------
-            if abs(throttle_raw) > THROTTLE_DEADZONE:
-                control['throttle'] = int(throttle_raw * 100)
-            else:
-                control['throttle'] = 0  # 死区内归零
-
-            # -------------处理水平位置----------
-            if abs(throttle_x_raw) > DEADZONE_X:
-                control['throttle_x'] = int(throttle_x_raw * 100)
-            else:
-                control['throttle_x'] = 0
-
-            # ------------ 横滚处理 ------------
-            if abs(roll_raw) > ROLL_DEADZONE:
-                control['roll'] = int(roll_raw * 50)
-            else:
-                control['roll'] = 0
-
-            # ------------ 俯仰处理 ------------
-            if abs(pitch_raw) > PITCH_DEADZONE:
-                control['pitch'] = int(pitch_raw * 50)
-            else:
-                control['pitch'] = 0
-
-            # ====== 低通滤波（抑制微小扰动） ======
-            control['throttle'] = int(
-                prev_throttle * (1 - SMOOTHING_FACTOR) +
-                control['throttle'] * SMOOTHING_FACTOR
-            )
-            control['roll'] = int(
-                prev_roll * (1 - SMOOTHING_FACTOR) +
-                control['roll'] * SMOOTHING_FACTOR
-            )
-            control['pitch'] = int(
-                prev_pitch * (1 - SMOOTHING_FACTOR) +
-                control['pitch'] * SMOOTHING_FACTOR
-            )
-
-            control['throttle_x'] = int(
-                prev_throttle_x * (1 - SMOOTHING_FACTOR) +
-                control['throttle_x'] * SMOOTHING_FACTOR
-            )
-
-            # 更新历史值
-            prev_throttle = control['throttle']
-            prev_roll = control['roll']
-            prev_pitch = control['pitch']
-            prev_throttle_x = control['throttle_x']
-
-    return control, frame
+        if mp_draw is not None and vis_frame is not None:
+            draw_hand(vis_frame, detected_hands[index][1])
+
+        return controller.update(detected_hands[index][1]), vis_frame
+
+    return controller.update(None), vis_frame
+
+
+def control_to_command(control):
+    """把控制指令字典换算成速度命令 (x, y, z, r)"""
+    if (abs(control['roll']) < 20):
+        x = 0
+    else:
+        x = control['roll'] / 50 * 2.0
+    if (abs(control['pitch']) < 20):
+        y = 0
+    else:
+        y = control['pitch'] / 50 * 2.0
+    if abs(control['throttle']) < 15:
+        z = 0
+    else:
+        z = control['throttle'] / 100 * 2.0
+    if abs(control['throttle_x'])>15:
+        r=y/10
+    else:
+        r=0
+    return x, y, z, r
+
+
+def send_control(ws_control, control):
+    x, y, z, r = control_to_command(control)
+    print(x,y,z,r)
+    ws_control.action_palm(-x*5, -y*5, z*5, r*5)
+
+
+# 命令发送频率：定时器按该频率发送最新的控制估计，与摄像头帧率无关
+TARGET_FPS = 20  # 目标帧率(每秒发送20条命令)
+
+
+def draw_control_info(vis_frame, control):
+    """在画面叠加控制信息"""
+    cv2.putText(
+        vis_frame,
+        f"Throttle: {control['throttle']:.0f}",
+        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
+    )
+    cv2.putText(
+        vis_frame,
+        f"Roll: {control['roll']:.0f}",
+        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
+    )
+    cv2.putText(
+        vis_frame,
+        f"Pitch: {control['pitch']:.0f}",
+        (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
+    )
+    cv2.putText(
+        vis_frame,
+        "Emergency Stop: {}".format(control['emergency_stop']),
+        (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2
+    )
+    # 显示水平位置信息
+    cv2.putText(
+        vis_frame,
+        f"Horizontal: {control['throttle_x']:.0f}",
+        (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2
+    )
 
 
-# ==================== 测试主程序 ====================
-if __name__ == "__main__":
+def run_camera(ws_control, recorder_path=None, max_num_hands=1, steer_hand=None, preview=None, roi_size=None,
+               controller=None, send_rate=TARGET_FPS, inference_rate=None, flow_every=None):
+    """
+    摄像头循环只负责推理（按 inference_rate），命令由 PeriodicSender 按 send_rate 定时发送最新估计
+    :param preview: FramePreview，无界面模式下只有需要保存调试画面的帧才绘制
+    :param roi_size: 裁剪推理尺寸，None 表示处理整幅画面
+    :param controller: ContinuousController，默认使用默认滤波参数的新实例
+    :param inference_rate: 推理频率（Hz），None 表示与 send_rate 相同，0 表示每帧推理；
+                           不推理的帧只抓取（grab）不解码，摄像头帧率高于推理频率时不增加 CPU 占用
+    :param flow_every: 每隔多少个推理帧运行一次 MediaPipe，中间的推理帧用光流传播关键点，None 表示每次都检测
+    """
+    preview = preview or FramePreview('Gesture Control')
+    controller = controller or ContinuousController()
+    hands, mp_draw = init_gesture_detector(max_num_hands)
+    cap = cv2.VideoCapture(0)  # 打开默认摄像头
+    recorder = None
+    roi = HandROI(create_hands(max_num_hands), roi_size, max_num_hands=max_num_hands) if roi_size else None
+    flow = LandmarkFlow(flow_every) if flow_every and flow_every > 1 else None
+    inference_gate = RateGate(send_rate if inference_rate is None else inference_rate)
+    sender = PeriodicSender(lambda control: send_control(ws_control, control), send_rate)
+    sender.start()
+    captured = 0
+
+    frame = None
+    try:
+        while cap.isOpened():
+            if not inference_gate.ready(time.monotonic()):
+                # 未到推理时间：只从摄像头取走这一帧，不解码
+                if not cap.grab():
+                    break
+                captured += 1
+                continue
+            # 复用上一帧的缓冲区读取新画面
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            captured += 1
+
+            # 镜像、旋转不再作用于整帧画面，由 detect_gesture 对关键点做坐标变换
+            if recorder_path is not None and recorder is None:
+                w, h = SIMULATION_ORIENTATION.oriented_size(frame.shape[1], frame.shape[0])
+                recorder = SessionRecorder(recorder_path, w, h, max_hands=max(max_num_hands, MAX_HANDS))
+
+            # 调用手势识别函数（无界面且本帧不保存调试画面时不生成显示帧）
+            render = preview.wants_frame()
+            control, vis_frame = detect_gesture(frame, hands, controller, mp_draw, recorder, steer_hand,
+                                                render=render, roi=roi, flow=flow)
+            sender.update(control)
+
+            if vis_frame is not None:
+                draw_control_info(vis_frame, control)
+                # 显示画面
+                if not preview.show(vis_frame):
+                    break
+    except KeyboardInterrupt:
+        pass
 
-    ws_control = Quadrotor_websocket.WebSocketControl(ws_url='ws://192.168.24.136:5000')
-    ws_control.init_ws_connection()
+    # 释放资源
+    sender.stop()
+    print(f"采集 {captured} 帧，推理 {sender.updates} 帧，发送 {sender.sent} 条命令")
+    if flow is not None:
+        print(f"检测 {flow.detect_frames} 帧，光流传播 {flow.flow_frames} 帧，漂移重新检测 {flow.redetects} 次")
+    if recorder is not None:
+        recorder.close()
+    cap.release()
+    preview.close()
 
-    hands, mp_draw = init_gesture_detector()
-    cap = cv2.VideoCapture(0)  # 打开默认摄像头
 
-    # 新增帧率控制参数
-    TARGET_FPS = 20  # 目标帧率(每秒处理20帧)
-    PROCESS_INTERVAL = 1.0 / TARGET_FPS  # 处理间隔(秒)
-    last_process_time = 0  # 上次处理时间戳
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # 镜像画面（更符合直觉）
-        frame = cv2.flip(frame, 1)
-
-        # 先把画面顺时针旋转 90°
-        frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-
-        # 调用手势识别函数
-        control, vis_frame = detect_gesture(frame, hands, mp_draw)
-
-        # 在画面叠加控制信息
-        cv2.putText(
-            vis_frame,
-            f"Throttle: {control['throttle']}",
-            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
-        )
-        cv2.putText(
-            vis_frame,
-            f"Roll: {control['roll']}",
-            (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
-        )
-        cv2.putText(
-            vis_frame,
-            f"Pitch: {control['pitch']}",
-            (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
-        )
-        cv2.putText(
-            vis_frame,
-            "Emergency Stop: {}".format(control['emergency_stop']),
-            (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2
-        )
-        # 显示水平位置信息
-        cv2.putText(
-            vis_frame,
-            f"Horizontal: {control['throttle_x']}",
-            (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2
-        )
-
-        # 显示画面
-        cv2.imshow('Gesture Control', vis_frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-        if (abs(control['roll']) < 20):
-            x = 0
-        else:
-            x = control['roll'] / 50 * 2.0
-        if (abs(control['pitch']) < 20):
-            y = 0
-        else:
-            y = control['pitch'] / 50 * 2.0
-        if abs(control['throttle']) < 15:
-            z = 0
-        else:
-            z = control['throttle'] / 100 * 2.0
-        if abs(control['throttle_x'])>15:
-            r=y/10
-        else:
-            r=0
-        t = 0.05
-
-        # === 新增：时间戳控制 ===
-        current_time = cv2.getTickCount() / cv2.getTickFrequency()
-        if current_time - last_process_time < PROCESS_INTERVAL:
-            # 未到处理时间，跳过检测
-            cv2.imshow('Gesture Control', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+def run_replay(ws_control, replay_path, speed=None, steer_hand=None, controller=None, send_rate=TARGET_FPS,
+               inference_rate=0):
+    """
+    回放录制的关键点，经过相同的控制量计算与发送流程
+    推理与定时发送都按录制时间戳调度，因此最快速度回放时发送的命令序列与实时运行一致
+    :param inference_rate: 推理频率（Hz），0 表示每个录制帧都推理（录制的帧本身已是推理帧）
+    """
+    controller = controller or ContinuousController()
+    replay = SessionReplay(replay_path)
+    inference_gate = RateGate(inference_rate)
+    send_interval = 1.0 / send_rate
+    next_send = None
+    control = None
+    unsent = False  # 最新的估计还没有发送过
+    sent = 0
+
+    start = time.perf_counter()
+    for frame in replay.frames(speed=speed):
+        # 发送时刻早于本帧的命令使用此前最新的估计
+        while control is not None and next_send <= frame.timestamp:
+            send_control(ws_control, control)
+            sent += 1
+            unsent = False
+            next_send += send_interval
+        if not inference_gate.ready(frame.timestamp):
             continue
+        index = select_hand(frame.hands, steer_hand)
+        control = controller.update(frame.hands[index][1] if index is not None else None, frame.timestamp)
+        unsent = True
+        if next_send is None:
+            next_send = frame.timestamp
+    if unsent:
+        # 与 PeriodicSender.stop() 相同：最后一帧的估计在结束前补发一次
+        send_control(ws_control, control)
+        sent += 1
+    elapsed = time.perf_counter() - start
+    print(f"回放 {len(replay)} 帧，发送 {sent} 条命令，用时 {elapsed:.3f}s，{len(replay) / max(elapsed, 1e-9):.0f} frames/s")
 
-        last_process_time = current_time  # 更新处理时间
-        print(x,y,z,r)
-        ws_control.action_palm(-x*5, -y*5, z*5, r*5)
 
+# ==================== 测试主程序 ====================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="手掌位置连续控制无人机")
+    parser.add_argument('--ws-url', default='ws://192.168.24.136:5000', help="控制服务器地址")
+    parser.add_argument('--async-client', action='store_true', help="使用 asyncio 客户端（多连接共用一个事件循环）")
+    parser.add_argument('--ack-mode', choices=ACK_MODES, default=ACK_EACH,
+                        help="请求服务端的应答方式：each 逐条应答，cumulative 定期累计应答，none 不应答")
+    parser.add_argument('--protocol', choices=SUPPORTED_PROTOCOLS, default=PROTOCOL_JSON,
+                        help="命令格式：json 兼容所有服务端；bin1 连接后协商二进制帧，不支持握手的旧服务端每次连接会记录一条错误")
+    parser.add_argument('--drone', help="要控制的无人机编号（服务端控制多架无人机时，如 uav1）")
+    parser.add_argument('--record', help="把摄像头识别到的关键点录制到文件")
+    parser.add_argument('--replay', help="回放录制的关键点文件，代替摄像头")
+    parser.add_argument('--replay-speed', type=float, default=0.0, help="回放倍速，0 表示最快速度")
+    parser.add_argument('--max-hands', type=int, default=1, help="最多同时识别的手数")
+    parser.add_argument('--steer-hand', choices=('Left', 'Right'), help="用于控制的手（MediaPipe 左右手标记），默认为第一只手")
+    parser.add_argument('--roi-size', type=int, default=0,
+                        help="裁剪推理尺寸：只处理上一帧手部周围缩放到该边长的区域，0 表示处理整幅画面")
+    parser.add_argument('--min-cutoff', type=float, default=1.0,
+                        help="One-Euro 滤波静止时的截止频率（Hz），越小越平滑")
+    parser.add_argument('--beta', type=float, default=0.01, help="One-Euro 滤波速度系数，越大快速移动时滞后越小")
+    parser.add_argument('--send-rate', type=float, default=TARGET_FPS, help="命令发送频率（Hz）")
+    parser.add_argument('--inference-rate', type=float,
+                        help="推理频率（Hz），默认与发送频率相同，0 表示每帧推理")
+    parser.add_argument('--flow-every', type=int, default=0,
+                        help="每隔多少个推理帧运行一次 MediaPipe，中间帧用光流传播关键点，0 表示每次都检测")
+    add_preview_arguments(parser)
+    args = parser.parse_args()
+    controller = ContinuousController(min_cutoff=args.min_cutoff, beta=args.beta)
+    steer_hand = handedness_code(args.steer_hand) if args.steer_hand else None
+
+    if args.async_client:
+        # asyncio 客户端依赖 websockets 包，只在使用时导入
+        from async_control import SyncDroneClient
+        ws_control = SyncDroneClient(args.ws_url, protocol=args.protocol, ack_mode=args.ack_mode, drone=args.drone)
+    else:
+        ws_control = Quadrotor_websocket.WebSocketControl(ws_url=args.ws_url, protocol=args.protocol,
+                                                          ack_mode=args.ack_mode, drone=args.drone)
+    ws_control.init_ws_connection()
 
-    # 释放资源
-    cap.release()
-    cv2.destroyAllWindows()
\ No newline at end of file
+    if args.replay:
+        run_replay(ws_control, args.replay, speed=args.replay_speed or None, steer_hand=steer_hand,
+                   controller=controller, send_rate=args.send_rate, inference_rate=args.inference_rate or 0)
+    else:
+        run_camera(ws_control, recorder_path=args.record, max_num_hands=args.max_hands, steer_hand=steer_hand,
+                   preview=preview_from_args('Gesture Control', args), roi_size=args.roi_size, controller=controller,
+                   send_rate=args.send_rate, inference_rate=args.inference_rate, flow_every=args.flow_every)
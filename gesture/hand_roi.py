@@ -0,0 +1,108 @@
+"""
+跟踪模式的裁剪推理：找到手之后，只把上一帧关键点外扩后的正方形区域缩放到固定尺寸交给 MediaPipe，
+再把关键点映射回整幅画面的归一化坐标
+
+推理开销只取决于裁剪尺寸而不是摄像头分辨率；手丢失时在同一帧立即回退到整幅画面检测，
+整幅画面检测同样先缩小到不超过 detect_size，高分辨率摄像头也能保持帧率
+
+视频模式（static_image_mode=False）的 MediaPipe Hands 用上一帧的结果跟踪手的位置，
+裁剪区域与整幅画面交替输入同一个实例时，跟踪状态对应的是另一种画面几何；因此裁剪区域使用单独的实例 crop_hands
+"""
+import cv2
+import numpy as np
+
+from landmark_session import mediapipe_hands
+
+
+class HandROI:
+    def __init__(self, crop_hands, inference_size=256, padding=0.4, detect_size=640, max_num_hands=1,
+                 redetect_every=30):
+        """
+        :param crop_hands: 只用于裁剪区域的 MediaPipe Hands（不能与整幅画面检测共用）
+        :param inference_size: 裁剪区域缩放后的边长（像素）
+        :param padding: 关键点外接框每侧外扩的比例（相对于外接框的边长）
+        :param detect_size: 整幅画面检测时长边缩小到的尺寸
+        :param max_num_hands: 跟踪到的手少于该数量时，每隔 redetect_every 帧做一次整幅画面检测，以发现新出现的手
+        """
+        self.crop_hands = crop_hands
+        self.inference_size = inference_size
+        self.padding = padding
+        self.detect_size = detect_size
+        self.max_num_hands = max_num_hands
+        self.redetect_every = redetect_every
+        self.region = None  # (x0, y0, 边长)，原始画面像素坐标；None 表示整幅画面检测
+        self.tracked_hands = 0
+        self.frames_since_detect = 0
+        self._crop = np.empty((inference_size, inference_size, 3), dtype=np.uint8)
+        self._detect = None
+        self.crop_frames = 0
+        self.detect_frames = 0
+
+    def process(self, hands, frame, to_rgb=None):
+        """
+        对一帧做手部关键点检测
+        :param hands: 整幅画面检测用的 MediaPipe Hands
+        :param frame: 原始方向的 BGR 画面
+        :param to_rgb: 颜色转换函数（例如 FrameOrientation.to_rgb），默认 cv2.cvtColor
+        :return: [(左右手编码, (21, 2) 整幅画面的归一化关键点), ...]
+        """
+        to_rgb = to_rgb or (lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        h, w = frame.shape[:2]
+        self.frames_since_detect += 1
+        redetect = self.tracked_hands < self.max_num_hands and self.frames_since_detect >= self.redetect_every
+
+        detected_hands = []
+        if self.region is not None and not redetect:
+            x0, y0, side = self.region
+            image = self._resize(frame[y0:y0 + side, x0:x0 + side], self._crop)
+            self.crop_frames += 1
+            detected_hands = self._to_frame(mediapipe_hands(self.crop_hands.process(to_rgb(image))), (x0, y0), (side, side),
+                                          (w, h))
+
+        if not detected_hands:
+            # 手丢失（或需要发现新手）：回退到整幅画面检测
+            scale = min(1.0, self.detect_size / max(w, h))
+            if scale < 1.0:
+                size = (round(w * scale), round(h * scale))
+                if self._detect is None or self._detect.shape[1::-1] != size:
+                    self._detect = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                image = self._resize(frame, self._detect)
+            else:
+                image = frame
+            self.detect_frames += 1
+            self.frames_since_detect = 0
+            # 缩小不改变归一化坐标，无需映射
+            detected_hands = mediapipe_hands(hands.process(to_rgb(image)))
+
+        self._update_region(detected_hands, w, h)
+        return detected_hands
+
+    @staticmethod
+    def _resize(image, dst):
+        interpolation = cv2.INTER_AREA if image.shape[0] > dst.shape[0] else cv2.INTER_LINEAR
+        return cv2.resize(image, dst.shape[1::-1], dst=dst, interpolation=interpolation)
+
+    @staticmethod
+    def _to_frame(hands, origin, size, frame_size):
+        """裁剪区域内的归一化关键点 -> 整幅画面的归一化关键点"""
+        scale = np.asarray(size, dtype=np.float64) / frame_size
+        offset = np.asarray(origin, dtype=np.float64) / frame_size
+        return [(handedness, points * scale + offset) for handedness, points in hands]
+
+    def _update_region(self, detected_hands, w, h):
+        """由本帧所有手的关键点计算下一帧的裁剪区域（正方形，保持手的长宽比例）"""
+        self.tracked_hands = len(detected_hands)
+        if not detected_hands:
+            self.region = None
+            return
+        pixels = np.concatenate([points for _, points in detected_hands]) * (w, h)
+        (x_min, y_min), (x_max, y_max) = pixels.min(axis=0), pixels.max(axis=0)
+        side = int(max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding))
+        if side >= min(w, h):
+            # 手占据了大半个画面，裁剪没有收益
+            self.region = None
+            return
+        side = max(side, 1)
+        x0 = int(np.clip((x_min + x_max - side) / 2, 0, w - side))
+        y0 = int(np.clip((y_min + y_max - side) / 2, 0, h - side))
+        self.region = (x0, y0, side)
@@ -0,0 +1,94 @@
+"""
+多手跟踪：为每只检测到的手分配跨帧稳定的跟踪 ID
+
+按手掌中心（21 个关键点的均值）做最近邻关联，左右手标记不同的检测不会关联到同一条轨迹；
+轨迹连续 max_missed 帧没有匹配到检测时被移除
+"""
+import numpy as np
+
+from landmark_session import HANDEDNESS_UNKNOWN
+
+
+class HandTrack:
+    """一条手部轨迹"""
+    __slots__ = ('track_id', 'handedness', 'points', 'center', 'missed', 'age')
+
+    def __init__(self, track_id, handedness, points):
+        self.track_id = track_id
+        self.handedness = handedness
+        self.points = points
+        self.center = points.mean(axis=0)
+        self.missed = 0
+        self.age = 0
+
+
+class HandTracker:
+    def __init__(self, max_distance=0.25, max_missed=10):
+        """
+        :param max_distance: 关联时手掌中心允许的最大位移（归一化坐标）
+        :param max_missed: 轨迹允许连续丢失的帧数
+        """
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.tracks = []
+        self.lost_ids = []  # 最近一次 update 中被移除的轨迹 ID
+        self._next_id = 0
+
+    def update(self, hands):
+        """
+        :param hands: [(左右手编码, (21, 2) 归一化关键点), ...]
+        :return: 与 hands 一一对应的 HandTrack 列表
+        """
+        self.lost_ids = []
+        assigned = [None] * len(hands)
+
+        if hands and self.tracks:
+            centers = np.array([points.mean(axis=0) for _, points in hands])
+            track_centers = np.array([track.center for track in self.tracks])
+            distance = np.linalg.norm(track_centers[:, None, :] - centers[None, :, :], axis=-1)
+
+            # 左右手标记都已知且不同的，不允许关联
+            handedness = np.array([code for code, _ in hands])
+            track_handedness = np.array([track.handedness for track in self.tracks])
+            conflict = ((track_handedness[:, None] != handedness[None, :]) &
+                        (track_handedness[:, None] != HANDEDNESS_UNKNOWN) & (handedness[None, :] != HANDEDNESS_UNKNOWN))
+            distance[conflict] = np.inf
+
+            # 贪心匹配：按距离从小到大依次配对
+            used_tracks = set()
+            for flat in np.argsort(distance, axis=None):
+                t, h = divmod(int(flat), len(hands))
+                if distance[t, h] > self.max_distance:
+                    break
+                if t in used_tracks or assigned[h] is not None:
+                    continue
+                used_tracks.add(t)
+                assigned[h] = self.tracks[t]
+
+        matched = set()
+        for h, (code, points) in enumerate(hands):
+            track = assigned[h]
+            if track is None:
+                track = HandTrack(self._next_id, code, points)
+                self._next_id += 1
+                self.tracks.append(track)
+            else:
+                track.points = points
+                track.center = points.mean(axis=0)
+                track.missed = 0
+                if track.handedness == HANDEDNESS_UNKNOWN:
+                    track.handedness = code
+            track.age += 1
+            matched.add(track.track_id)
+            assigned[h] = track
+
+        remaining = []
+        for track in self.tracks:
+            if track.track_id not in matched:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    self.lost_ids.append(track.track_id)
+                    continue
+            remaining.append(track)
+        self.tracks = remaining
+        return assigned
@@ -0,0 +1,99 @@
+"""
+检测之间的关键点光流传播：MediaPipe 每 detect_every 帧运行一次，中间的帧用稀疏金字塔 Lucas-Kanade 光流
+把上一帧的 21 个关键点带到当前帧，CPU 上每帧只多一次灰度转换与两次 21 点的光流计算
+
+漂移检查：每个点做正反向光流（当前帧再追踪回上一帧），往返误差超过 max_fb_error 像素或追踪失败的点视为丢失；
+任意一只手可靠的点少于 min_tracked 时立即在当前帧重新检测。个别丢失的点按同一只手可靠点的中位位移移动，
+保持手的形状。输出与检测结果格式相同，识别与连续控制不需要区分关键点来自检测还是光流
+"""
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+class LandmarkFlow:
+    def __init__(self, detect_every=5, max_fb_error=2.0, min_tracked=0.8, win_size=21, max_level=3):
+        """
+        :param detect_every: 每隔多少帧运行一次检测（其余帧用光流传播），1 表示每帧检测
+        :param max_fb_error: 正反向光流往返误差上限（像素）
+        :param min_tracked: 每只手至少需要的可靠点比例，低于该比例时重新检测
+        :param win_size: 光流窗口边长（像素），max_level 为金字塔层数
+        """
+        self.detect_every = detect_every
+        self.max_fb_error = max_fb_error
+        self.min_tracked = min_tracked
+        self._lk = dict(winSize=(win_size, win_size), maxLevel=max_level,
+                        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self._handedness = []
+        self._points = None  # 上一帧所有手的关键点（像素坐标），(手数 * 21, 1, 2) float32
+        self._prev_gray = None
+        self._spare_gray = None  # 与 _prev_gray 交替使用的灰度缓冲区
+        self._scale = np.empty(2, dtype=np.float32)
+        self.frames_since_detect = 0
+        self.detect_frames = 0
+        self.flow_frames = 0
+        self.redetects = 0  # 漂移检查触发的提前检测次数
+
+    def process(self, frame, detect):
+        """
+        :param frame: 原始方向的 BGR 画面
+        :param detect: detect() 在当前帧运行检测，返回 [(左右手编码, (21, 2) 归一化关键点), ...]
+        :return: 与 detect() 相同格式的关键点
+        """
+        h, w = frame.shape[:2]
+        self._scale[:] = (w, h)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._spare_gray)
+
+        hands = None
+        if (self._points is not None and self.frames_since_detect + 1 < self.detect_every
+                and self._prev_gray is not None and self._prev_gray.shape == gray.shape):
+            hands = self._propagate(gray)
+            if hands is None:
+                self.redetects += 1
+        if hands is None:
+            hands = detect()
+            self._remember(hands)
+            self.frames_since_detect = 0
+            self.detect_frames += 1
+        else:
+            self.frames_since_detect += 1
+            self.flow_frames += 1
+
+        self._spare_gray, self._prev_gray = self._prev_gray, gray
+        return hands
+
+    def _remember(self, hands):
+        self._handedness = [handedness for handedness, _ in hands]
+        if not hands:
+            # 没有手可以传播，下一帧继续检测
+            self._points = None
+            return
+        points = np.concatenate([np.asarray(points, dtype=np.float32) for _, points in hands])
+        self._points = (points * self._scale).reshape(-1, 1, 2)
+
+    def _propagate(self, gray):
+        """:return: 传播后的关键点，漂移检查不通过时为 None"""
+        points = self._points
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **self._lk)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None, **self._lk)
+        fb_error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+
+        good = good.reshape(-1, NUM_LANDMARKS)
+        if (good.mean(axis=1) < self.min_tracked).any():
+            return None
+        moved = moved.reshape(-1, NUM_LANDMARKS, 2)
+        previous = points.reshape(-1, NUM_LANDMARKS, 2)
+        for hand_good, hand_moved, hand_previous in zip(good, moved, previous):
+            if not hand_good.all():
+                shift = np.median(hand_moved[hand_good] - hand_previous[hand_good], axis=0)
+                hand_moved[~hand_good] = hand_previous[~hand_good] + shift
+
+        self._points = moved.reshape(-1, 1, 2)
+        normalized = moved / self._scale
+        return list(zip(self._handedness, normalized))
+
+    def reset(self):
+        self._points = None
+        self._prev_gray = None
@@ -0,0 +1,193 @@
+"""
+手部关键点会话录制与回放
+
+录制文件为紧凑的追加写二进制格式：
+  文件头（HEADER_SIZE 字节）：魔数、版本、每帧最多手数、画面宽高
+  之后每帧一条定长记录（RECORD_DTYPE）：时间戳、手数、左右手标记、归一化关键点（float32）
+回放时用 np.memmap 直接映射记录区，不需要把整个文件读进内存；
+录制中途异常退出时，末尾不完整的记录会被忽略
+"""
+import os
+import struct
+import time
+
+import numpy as np
+
+SESSION_SUFFIX = '.lms'
+MAGIC = b'LMSESS\x00\x01'
+HEADER_FORMAT = '<8sHHII'   # 魔数, 版本, 每帧最多手数, 画面宽, 画面高
+HEADER_SIZE = 32
+VERSION = 1
+MAX_HANDS = 2
+
+# 左右手标记（MediaPipe multi_handedness 的 label）
+HANDEDNESS_UNKNOWN = 0
+HANDEDNESS_LEFT = 1
+HANDEDNESS_RIGHT = 2
+_HANDEDNESS_CODES = {'Left': HANDEDNESS_LEFT, 'Right': HANDEDNESS_RIGHT}
+
+
+def record_dtype(max_hands=MAX_HANDS):
+    """每帧记录的结构"""
+    return np.dtype([
+        ('timestamp', '<f8'),
+        ('hand_count', 'u1'),
+        ('handedness', 'u1', (max_hands,)),
+        ('landmarks', '<f4', (max_hands, 21, 2)),
+    ])
+
+
+RECORD_DTYPE = record_dtype()
+
+
+def handedness_code(label):
+    """MediaPipe 的 'Left' / 'Right' 转为记录中的编码"""
+    return _HANDEDNESS_CODES.get(label, HANDEDNESS_UNKNOWN)
+
+
+def mediapipe_hands(results):
+    """
+    从 hands.process 的结果中取出所有手：[(左右手编码, (21, 2) 归一化关键点), ...]
+    """
+    hands = []
+    if not results.multi_hand_landmarks:
+        return hands
+    handedness = results.multi_handedness or []
+    for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+        label = handedness[i].classification[0].label if i < len(handedness) else None
+        points = np.array([(landmark.x, landmark.y) for landmark in hand_landmarks.landmark])
+        hands.append((handedness_code(label), points))
+    return hands
+
+
+class SessionRecorder:
+    """
+    关键点录制器：每次 write() 追加一帧，文件已存在时在末尾继续追加（画面尺寸须一致）
+    """
+
+    def __init__(self, path, width, height, max_hands=MAX_HANDS):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.max_hands = max_hands
+        dtype = record_dtype(max_hands)
+        self._record = np.zeros(1, dtype=dtype)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            header = _read_header(path)
+            if header != (max_hands, width, height):
+                raise ValueError(f"{path}: 已有录制的参数 {header} 与当前 {(max_hands, width, height)} 不一致")
+            # 丢弃上次异常退出时残留的不完整记录，保证追加的记录对齐
+            count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+            os.truncate(path, HEADER_SIZE + count * dtype.itemsize)
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, max_hands, width, height).ljust(HEADER_SIZE, b'\0'))
+        self.frame_count = 0
+
+    def write(self, hands, timestamp=None):
+        """
+        追加一帧
+        :param hands: [(左右手编码, (21, 2) 归一化关键点), ...]，超过 max_hands 的部分被丢弃
+        :param timestamp: 时间戳（秒），默认取当前时间
+        """
+        record = self._record[0]
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        hands = hands[:self.max_hands]
+        record['hand_count'] = len(hands)
+        record['handedness'] = HANDEDNESS_UNKNOWN
+        record['landmarks'] = 0.0
+        for i, (handedness, points) in enumerate(hands):
+            record['handedness'][i] = handedness
+            record['landmarks'][i] = points
+        self._file.write(self._record.tobytes())
+        self.frame_count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path}: 文件头不完整")
+    magic, version, max_hands, width, height = struct.unpack_from(HEADER_FORMAT, header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: 不是关键点录制文件（或版本不支持）")
+    return max_hands, width, height
+
+
+class ReplayFrame:
+    """回放得到的一帧：时间戳与 [(左右手编码, (21, 2) 归一化关键点), ...]"""
+    __slots__ = ('index', 'timestamp', 'hands')
+
+    def __init__(self, index, timestamp, hands):
+        self.index = index
+        self.timestamp = timestamp
+        self.hands = hands
+
+
+class SessionReplay:
+    """
+    关键点回放源：内存映射录制文件，按录制时的节奏或以最快速度逐帧输出
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.max_hands, self.width, self.height = _read_header(path)
+        dtype = record_dtype(self.max_hands)
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+        count = (size - HEADER_SIZE) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records['timestamp']
+
+    def pixel_landmarks(self, hand=0):
+        """
+        所有含第 hand 只手的帧的像素坐标 (N, 21, 2)（取整方式与 gesture_match 一致），
+        以及这些帧在录制中的下标，可直接交给 classify_batch
+        """
+        index = np.flatnonzero(self.records['hand_count'] > hand)
+        landmarks = self.records['landmarks'][index, hand].astype(np.float64)
+        return np.trunc(landmarks * (self.width, self.height)), index
+
+    def frames(self, speed=None, start=0, stop=None):
+        """
+        逐帧输出 ReplayFrame
+        :param speed: None 或 0 为最快速度；1.0 为按录制节奏，2.0 为两倍速
+        """
+        records = self.records[start:stop]
+        wall_start = time.perf_counter()
+        first_timestamp = float(records['timestamp'][0]) if len(records) else 0.0
+        for offset, record in enumerate(records):
+            timestamp = float(record['timestamp'])
+            if speed:
+                delay = (timestamp - first_timestamp) / speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            hands = [(int(record['handedness'][i]), np.asarray(record['landmarks'][i], dtype=np.float64))
+                     for i in range(record['hand_count'])]
+            yield ReplayFrame(start + offset, timestamp, hands)
+
+    def __iter__(self):
+        return self.frames()
@@ -0,0 +1,107 @@
+"""
+端到端延迟追踪：画面采集 -> 推理 -> 手势识别 -> 客户端发送 -> 服务端接收 -> set_command -> 首次发布 /cmd_vel
+
+客户端各阶段的时间戳留在本地（按命令序号保存），线路上只带序号与追踪标志；
+服务端在命令首次发布后回传接收、set_command、发布三个时间戳。
+两端时钟不同步，因此网络单程延迟按“往返时间减去服务端处理时间”的一半估计，
+端到端延迟 = 客户端内部耗时 + 网络单程 + 服务端内部耗时，不受时钟偏差影响
+"""
+import collections
+import json
+import threading
+import time
+
+import numpy as np
+
+# 客户端时间戳
+CAPTURE = 'capture'
+INFERENCE = 'inference'
+CLASSIFY = 'classify'
+SEND = 'send'
+# 服务端时间戳
+SERVER_RECEIVE = 'server_receive'
+SET_COMMAND = 'set_command'
+PUBLISH = 'publish'
+
+SERVER_STAMPS = (SERVER_RECEIVE, SET_COMMAND, PUBLISH)
+
+# 统计的阶段：(阶段名, 起始时间戳, 结束时间戳)，同一台机器上的两个时间戳相减
+_LOCAL_STAGES = (
+    ('inference', CAPTURE, INFERENCE),
+    ('classify', INFERENCE, CLASSIFY),
+    ('queue', CLASSIFY, SEND),
+    ('server', SERVER_RECEIVE, SET_COMMAND),
+    ('publish', SET_COMMAND, PUBLISH),
+)
+STAGES = ('inference', 'classify', 'queue', 'network', 'server', 'publish', 'total')
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyTracker:
+    """
+    按阶段收集延迟样本（每个阶段保留最近 window 个），计算 p50 / p95 / p99，
+    每隔 report_interval 秒打印一次并写入 export_path（JSON）
+    """
+
+    def __init__(self, window=2048, report_interval=10.0, export_path=None, max_pending=256):
+        self.samples = {stage: collections.deque(maxlen=window) for stage in STAGES}
+        self.report_interval = report_interval
+        self.export_path = export_path
+        self.max_pending = max_pending
+        self._pending = collections.OrderedDict()  # 序号 -> 客户端时间戳
+        self._lock = threading.Lock()
+        self._last_report = time.monotonic()
+        self.completed = 0
+
+    def start(self, seq, stamps):
+        """命令发出时登记客户端时间戳（stamps 中应包含 SEND）"""
+        with self._lock:
+            self._pending[seq] = stamps
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def complete(self, seq, server_stamps, received=None):
+        """
+        收到服务端回传的时间戳
+        :param server_stamps: {SERVER_RECEIVE: ..., SET_COMMAND: ..., PUBLISH: ...}
+        :param received: 客户端收到回传的时间，默认当前时间
+        """
+        received = time.time() if received is None else received
+        with self._lock:
+            stamps = self._pending.pop(seq, None)
+        if stamps is None:
+            return
+        stamps = dict(stamps, **server_stamps)
+
+        for stage, begin, end in _LOCAL_STAGES:
+            if begin in stamps and end in stamps:
+                self.samples[stage].append(stamps[end] - stamps[begin])
+        server_time = stamps[PUBLISH] - stamps[SERVER_RECEIVE]
+        network = max(received - stamps[SEND] - server_time, 0.0) / 2
+        self.samples['network'].append(network)
+        client_start = stamps.get(CAPTURE, stamps[SEND])
+        self.samples['total'].append(stamps[SEND] - client_start + network + server_time)
+        self.completed += 1
+
+        if time.monotonic() - self._last_report >= self.report_interval:
+            self.report()
+
+    def summary(self):
+        """{阶段: {'count': 样本数, 'p50': 毫秒, 'p95': 毫秒, 'p99': 毫秒}}"""
+        result = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            p = np.percentile(np.fromiter(values, dtype=np.float64, count=len(values)), PERCENTILES) * 1000
+            result[stage] = {'count': len(values), **{f'p{q}': round(float(v), 3) for q, v in zip(PERCENTILES, p)}}
+        return result
+
+    def report(self):
+        self._last_report = time.monotonic()
+        summary = self.summary()
+        parts = [f"{stage} {s['p50']:.1f}/{s['p95']:.1f}/{s['p99']:.1f}" for stage, s in summary.items()]
+        print(f"[LATENCY] p50/p95/p99 ms: {' | '.join(parts)}")
+        if self.export_path is not None:
+            with open(self.export_path, 'w', encoding='utf-8') as f:
+                json.dump({'timestamp': time.time(), 'stages': summary}, f, indent=2)
+        return summary
@@ -0,0 +1,140 @@
+"""
+多线程流水线：每个阶段一个工作线程，阶段之间用有界队列连接
+
+队列满时丢弃最旧的数据，下游总是拿到最新的一帧，慢阶段不会让旧帧越积越多；
+每个阶段统计处理数量、丢弃数量与处理耗时，用于输出各阶段吞吐
+"""
+import collections
+import queue
+import threading
+import time
+
+
+class DropOldestQueue:
+    """有界队列：满时 put 丢弃最旧的元素"""
+
+    def __init__(self, maxsize=1):
+        self._items = collections.deque(maxlen=maxsize)
+        self._not_empty = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._not_empty:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._not_empty.notify()
+
+    def get(self, timeout=None):
+        """取出最旧的元素，超时抛出 queue.Empty"""
+        with self._not_empty:
+            if not self._items and not self._not_empty.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._items.popleft()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """单个阶段的统计（只由该阶段的线程写入）"""
+
+    def __init__(self):
+        self.processed = 0
+        self.busy_time = 0.0
+        self._last_processed = 0
+        self._last_time = time.perf_counter()
+
+    def rate(self):
+        """自上次调用以来的处理速率（items/s）"""
+        now = time.perf_counter()
+        processed = self.processed
+        rate = (processed - self._last_processed) / max(now - self._last_time, 1e-9)
+        self._last_processed, self._last_time = processed, now
+        return rate
+
+
+class PipelineStage(threading.Thread):
+    """
+    流水线阶段：从 input_queue 取数据交给 func，结果放入 output_queue
+    没有 input_queue 的阶段为数据源，反复调用 func() 产生数据；func 返回 None 表示本次没有输出，
+    抛出 StopIteration 表示数据源结束，整个流水线停止
+    """
+
+    def __init__(self, name, func, input_queue, output_queue, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.stats = StageStats()
+        self.error = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.input_queue is None:
+                args = ()
+            else:
+                try:
+                    args = (self.input_queue.get(timeout=0.1),)
+                except queue.Empty:
+                    continue
+            start = time.perf_counter()
+            try:
+                result = self.func(*args)
+            except StopIteration:
+                self.stop_event.set()
+                break
+            except Exception as e:
+                self.error = e
+                print(f"[PIPELINE] 阶段 {self.name} 出错: {e}")
+                self.stop_event.set()
+                break
+            self.stats.busy_time += time.perf_counter() - start
+            self.stats.processed += 1
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result)
+
+
+class Pipeline:
+    """按添加顺序串联的多阶段流水线"""
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.stages = []
+        self.queues = []
+        self._tail = None
+
+    def add_stage(self, name, func, queue_size=1):
+        """
+        添加一个阶段，其输出队列（长度为 queue_size）作为下一阶段的输入
+        :return: 该阶段的输出队列，最后一个阶段的输出可由调用方（例如主线程显示）读取
+        """
+        output_queue = DropOldestQueue(queue_size)
+        stage = PipelineStage(name, func, self._tail, output_queue, self.stop_event)
+        self.stages.append(stage)
+        self.queues.append(output_queue)
+        self._tail = output_queue
+        return output_queue
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    def report(self):
+        """各阶段自上次报告以来的吞吐、平均处理耗时与输出队列丢弃数"""
+        parts = []
+        for stage, output_queue in zip(self.stages, self.queues):
+            processed = stage.stats.processed
+            busy_ms = stage.stats.busy_time / processed * 1000 if processed else 0.0
+            parts.append(f"{stage.name} {stage.stats.rate():.1f}/s {busy_ms:.1f}ms 丢弃{output_queue.dropped}")
+        return " | ".join(parts)
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+
+websockets = pytest.importorskip('websockets')
+
+from async_control import AsyncDroneClient  # noqa: E402
+from command_protocol import ACK_EACH, ACK_NONE, PROTOCOL_JSON  # noqa: E402
+
+
+def slow_hello_server(ack_mode, delay):
+    """握手回复晚于客户端 hello_timeout 的服务端，之后按 ack_mode 应答 JSON 命令"""
+    async def handler(ws):
+        async for message in ws:
+            data = json.loads(message)
+            if 'hello' in data:
+                await asyncio.sleep(delay)
+                await ws.send(json.dumps({"status": "ok", "protocol": PROTOCOL_JSON, "ack": ack_mode}))
+            elif ack_mode == ACK_EACH:
+                await ws.send(json.dumps({"status": "ok", "x": data["x"]}))
+    return handler
+
+
+async def send_before_late_hello(ack_mode):
+    async with websockets.serve(slow_hello_server(ack_mode, 0.2), '127.0.0.1', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        # drone 使客户端发送握手
+        client = AsyncDroneClient(f"ws://127.0.0.1:{port}", hello_timeout=0.02, ack_mode=ack_mode, drone='')
+        await client.connect()
+        try:
+            first = await asyncio.wait_for(client.send_move(1, 0, 0, 0, 0.05), 2)
+            second = await asyncio.wait_for(client.send_move(2, 0, 0, 0, 0.05), 2)
+            return first, second, client.ack_mode
+        finally:
+            await client.close()
+
+
+def test_late_hello_reply_is_not_taken_as_command_ack():
+    first, second, ack_mode = asyncio.run(send_before_late_hello(ACK_EACH))
+    assert first == {"status": "ok", "x": 1}
+    assert second == {"status": "ok", "x": 2}
+    assert ack_mode == ACK_EACH
+
+
+def test_late_hello_reply_switches_ack_mode():
+    first, second, ack_mode = asyncio.run(send_before_late_hello(ACK_NONE))
+    # 服务端按握手不再应答：等待逐条应答的命令在握手回复到达时视为已发送
+    assert first["status"] == "sent" and second["status"] == "sent"
+    assert ack_mode == ACK_NONE
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from command_protocol import (ACK_CUMULATIVE, ACK_EACH, ACK_NONE, COMMAND_STRUCT, DEFAULT_ACK_INTERVAL, FLAG_CUMULATIVE,
+                              FLAG_TRACE, MSG_ACK, MSG_COMMAND, MSG_TRACE, PROTOCOL_BINARY, PROTOCOL_JSON,
+                              choose_ack, choose_protocol, command_drone_slot, decode_ack, decode_command, decode_trace,
+                              encode_ack, encode_command, encode_trace, hello_message, message_type)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_copies_are_identical():
+    # 客户端与服务端各有一份副本，必须保持一致
+    with open(os.path.join(HERE, '..', 'command_protocol.py'), 'rb') as f:
+        client = f.read()
+    with open(os.path.join(HERE, '..', '..', 'simulation', 'control', 'command_protocol.py'), 'rb') as f:
+        server = f.read()
+    assert client == server
+
+
+def test_command_round_trip():
+    frame = encode_command(7, 1234.5, 1.0, -2.0, 0.5, 0.25, 0.05, flags=FLAG_TRACE, drone_slot=3)
+    assert len(frame) == COMMAND_STRUCT.size == 36
+    assert message_type(frame) == MSG_COMMAND
+    seq, flags, timestamp, x, y, z, r, t = decode_command(frame)
+    assert (seq, flags, timestamp, x, y, z, r) == (7, FLAG_TRACE, 1234.5, 1.0, -2.0, 0.5, 0.25)
+    assert t == pytest.approx(0.05)
+    assert command_drone_slot(frame) == 3
+    assert command_drone_slot(encode_command(1, 0.0, 0, 0, 0, 0, 0)) == 0
+
+
+def test_sequence_wraps_to_32_bits():
+    assert decode_command(encode_command(2 ** 32 + 5, 0.0, 0, 0, 0, 0, 0))[0] == 5
+    assert decode_ack(encode_ack(2 ** 32 + 5, 0.0, 0.0))[0] == 5
+
+
+def test_ack_and_trace_round_trip():
+    ack = encode_ack(9, 1.5, 2.5, FLAG_CUMULATIVE)
+    assert message_type(ack) == MSG_ACK and ack[1] == FLAG_CUMULATIVE
+    assert decode_ack(ack) == (9, 1.5, 2.5)
+    trace = encode_trace(9, 1.0, 2.0, 3.0)
+    assert message_type(trace) == MSG_TRACE
+    assert decode_trace(trace) == (9, 1.0, 2.0, 3.0)
+
+
+@pytest.mark.parametrize('decode, frame', [
+    (decode_command, encode_ack(1, 0.0, 0.0)),
+    (decode_command, encode_command(1, 0.0, 0, 0, 0, 0, 0)[:-1]),
+    (decode_ack, encode_command(1, 0.0, 0, 0, 0, 0, 0)),
+    (decode_trace, encode_ack(1, 0.0, 0.0)),
+])
+def test_decode_rejects_wrong_frames(decode, frame):
+    with pytest.raises(ValueError):
+        decode(frame)
+
+
+def test_hello_message():
+    message = json.loads(hello_message())
+    # 非数字的 t 让不支持握手的旧服务端拒绝这条消息，而不是执行成零速度命令
+    assert message == {"hello": {"protocols": [PROTOCOL_BINARY, PROTOCOL_JSON]}, "t": "hello"}
+    message = json.loads(hello_message((PROTOCOL_JSON,), ACK_CUMULATIVE, 0.2, 'uav1', ['uav2']))
+    assert message["hello"] == {"protocols": [PROTOCOL_JSON], "ack": ACK_CUMULATIVE, "ack_interval": 0.2,
+                                "drone": "uav1", "drones": ["uav2"]}
+
+
+def test_choose_protocol_and_ack():
+    assert choose_protocol([PROTOCOL_BINARY, PROTOCOL_JSON]) == PROTOCOL_BINARY
+    assert choose_protocol(['bin9', PROTOCOL_JSON]) == PROTOCOL_JSON
+    assert choose_protocol([]) == PROTOCOL_JSON
+    assert choose_ack({}) == (ACK_EACH, DEFAULT_ACK_INTERVAL)
+    assert choose_ack({"ack": ACK_NONE}) == (ACK_NONE, DEFAULT_ACK_INTERVAL)
+    assert choose_ack({"ack": "sometimes", "ack_interval": 0}) == (ACK_EACH, 0.01)
@@ -0,0 +1,61 @@
+import pytest
+
+from gesture_debounce import DEFAULT_REPEAT_INTERVAL, GestureDebouncer, parse_gesture_dwell
+
+FPS = 30
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(debouncer, clock, labels):
+    """按 30fps 输入一串识别结果，返回 [(帧序号, 事件)]"""
+    events = []
+    for i, label in enumerate(labels):
+        clock.now = i / FPS
+        gesture = debouncer.update(label)
+        if gesture is not None:
+            events.append((i, gesture))
+    return events
+
+
+def test_held_gesture_default_repeat_sends_about_a_tenth_of_frames():
+    clock = FakeClock()
+    events = run(GestureDebouncer(repeat_interval=DEFAULT_REPEAT_INTERVAL, clock=clock), clock, ['Left'] * 300)
+    # 约为帧数的十分之一（重复时刻按帧取整，留出少量余量）
+    assert 0 < len(events) <= 300 * 0.12
+    # 每条命令持续两倍重复间隔，相邻事件的间隔不超过它，运动不会中断
+    gaps = [(b - a) / FPS for (a, _), (b, _) in zip(events, events[1:])]
+    assert max(gaps) < 2 * DEFAULT_REPEAT_INTERVAL
+
+
+def test_without_repeat_emits_once_per_stable_gesture():
+    clock = FakeClock()
+    events = run(GestureDebouncer(clock=clock), clock, ['Left'] * 100)
+    assert events == [(4, 'Left')]
+
+
+def test_dwell_and_hysteresis():
+    clock = FakeClock()
+    labels = ['Left'] * 3 + ['Right'] + ['Left'] * 10 + ['None'] * 2 + ['Left'] * 5 + ['None'] * 10 + ['Right'] * 5
+    events = run(GestureDebouncer(dwell_frames=5, exit_frames=3, clock=clock), clock, labels)
+    # 少于 exit_frames 帧的中断不会重新触发，连续消失后才释放并允许下一个手势
+    assert events == [(8, 'Left'), (35, 'Right')]
+
+
+def test_idle_gesture_never_becomes_stable():
+    clock = FakeClock()
+    assert run(GestureDebouncer(clock=clock), clock, ['None'] * 50) == []
+
+
+def test_per_gesture_dwell():
+    clock = FakeClock()
+    debouncer = GestureDebouncer(dwell_frames=5, gesture_dwell=parse_gesture_dwell(['Rotation=8']), clock=clock)
+    assert run(debouncer, clock, ['Rotation'] * 10) == [(7, 'Rotation')]
+    with pytest.raises(ValueError):
+        parse_gesture_dwell(['Rotation'])
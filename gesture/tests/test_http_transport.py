@@ -0,0 +1,148 @@
+import io
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from benchmark_http import StandInHandler
+from Quadrotor_HTTP import HTTPTransport
+
+PAUSE = {'x': 0, 'y': 0, 'z': 0, 't': 0}
+
+
+class RecordingHandler(StandInHandler):
+    """记录收到的每个请求；gate 未打开时阻塞处理，用来在发送端积压命令"""
+    received = None
+    gate = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.received.append((self.path, json.loads(body)))
+        self.gate.wait(5)
+        # 父类从 rfile 读取请求体；处理完换回原来的 rfile，保持连接上的下一个请求才能读到
+        rfile, self.rfile = self.rfile, io.BytesIO(body)
+        try:
+            super().do_POST()
+        finally:
+            self.rfile = rfile
+
+
+@pytest.fixture
+def server():
+    handler = type('Handler', (RecordingHandler,), {'received': [], 'gate': threading.Event()})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{httpd.server_address[1]}"
+    handler.gate.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def move(i):
+    return {'x': i, 'y': 0, 'z': 0, 't': 0.05}
+
+
+def block_first_request(transport, handler):
+    """发出第一条命令并等它进入服务端，之后的命令都留在发送端队列里"""
+    transport.send_move(**move(-1))
+    for _ in range(500):
+        if handler.received:
+            return
+        time.sleep(0.01)
+    raise AssertionError("第一条命令没有送达")
+
+
+def sent_moves(handler):
+    moves = []
+    for path, data in handler.received:
+        moves.extend(data['setpoints'] if path == '/move_batch' else [data])
+    return moves
+
+
+def test_serialize_sends_every_command_in_order(server):
+    handler, url = server
+    handler.gate.set()
+    transport = HTTPTransport(url, verbose=False, max_age=None)
+    for i in range(20):
+        transport.send_move(**move(i))
+    assert transport.flush(5)
+    transport.close()
+    assert sent_moves(handler) == [move(i) for i in range(20)]
+    assert transport.commands == transport.requests == 20
+
+
+def test_coalesce_keeps_only_latest(server):
+    handler, url = server
+    transport = HTTPTransport(url, mode='coalesce', verbose=False, max_age=None)
+    block_first_request(transport, handler)
+    for i in range(10):
+        transport.send_move(**move(i))
+    handler.gate.set()
+    assert transport.flush(5)
+    transport.close()
+    assert sent_moves(handler) == [move(-1), move(9)]
+    assert transport.replaced == 9
+
+
+def test_batch_merges_backlog(server):
+    handler, url = server
+    transport = HTTPTransport(url, batch=True, max_batch=4, verbose=False, max_age=None)
+    block_first_request(transport, handler)
+    for i in range(10):
+        transport.send_move(**move(i))
+    handler.gate.set()
+    assert transport.flush(5)
+    transport.close()
+    assert [path for path, _ in handler.received] == ['/move'] + ['/move_batch'] * 3
+    assert sent_moves(handler) == [move(-1)] + [move(i) for i in range(10)]
+    assert transport.requests == 4 and transport.commands == 11
+
+
+def test_must_deliver_jumps_queue_and_drops_older_commands(server):
+    handler, url = server
+    transport = HTTPTransport(url, verbose=False, max_age=None)
+    block_first_request(transport, handler)
+    for i in range(5):
+        transport.send_move(**move(i))
+    transport.send_move(**PAUSE, must_deliver=True)
+    transport.send_move(**move(5))
+    handler.gate.set()
+    assert transport.flush(5)
+    transport.close()
+    # 急停之前排队的普通命令被丢弃，急停之后的命令照常发送
+    assert sent_moves(handler) == [move(-1), PAUSE, move(5)]
+    assert transport.replaced == 5
+
+
+def test_must_deliver_never_pushed_out(server):
+    handler, url = server
+    transport = HTTPTransport(url, max_pending=4, verbose=False, max_age=None)
+    block_first_request(transport, handler)
+    pauses = [{'x': 0, 'y': 0, 'z': 0, 't': i} for i in range(100)]
+    for pause in pauses:
+        transport.send_move(**pause, must_deliver=True)
+        transport.send_move(**move(0))
+    assert transport.pending() == 101
+    handler.gate.set()
+    assert transport.flush(5)
+    transport.close()
+    assert sent_moves(handler)[1:-1] == pauses
+    assert transport.failed == 0
+
+
+def test_stale_commands_expire_but_must_deliver_does_not(server):
+    handler, url = server
+    transport = HTTPTransport(url, verbose=False, max_age=0.05)
+    block_first_request(transport, handler)
+    transport.send_move(**PAUSE, must_deliver=True)
+    for i in range(3):
+        transport.send_move(**move(i))
+    time.sleep(0.2)
+    handler.gate.set()
+    assert transport.flush(5)
+    transport.close()
+    assert sent_moves(handler) == [move(-1), PAUSE]
+    assert transport.expired == 3
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+WebSocket 控制服务压测：打开 N 个并发客户端，每个以指定速率（或不限速）发送命令，输出
+  - 客户端实际发送的命令数/s
+  - 应答往返时间（发送到收到应答）的 p50 / p95 / p99
+  - 错误数（错误回复、连接失败、断线）
+  - 服务端 set_command 速率（通过 {"stats": {}} 查询压测前后的命令数）
+不指定 --url 时在本机启动 standin_server 替身服务；指定时压测已运行的 control_new 节点
+
+用法：
+  python benchmark_ws.py --clients 1 4 16 --duration 5
+  python benchmark_ws.py --url ws://192.168.24.136:5000 --clients 4 --rate 50 --ack-mode cumulative
+"""
+import argparse
+import asyncio
+import collections
+import json
+import statistics
+import sys
+import time
+
+import websockets
+
+from command_protocol import (ACK_EACH, ACK_MODES, ACK_NONE, MSG_ACK, PROTOCOL_BINARY, PROTOCOL_JSON,
+                              SUPPORTED_PROTOCOLS, decode_ack, encode_command, hello_message, message_type)
+
+
+class LoadClient:
+    """一个压测客户端：发送任务按速率发出命令，接收任务按序号计算应答往返时间"""
+
+    def __init__(self, url, protocol, ack_mode, drone=None, window=0):
+        """:param window: 最多未应答的命令数，达到时等待应答再发送（0 表示不限制）"""
+        self.url = url
+        self.preferred_protocol = protocol
+        self.protocol = PROTOCOL_JSON
+        self.requested_ack = ack_mode
+        self.ack_mode = ACK_EACH
+        self.drone = drone
+        self.window = window
+        self._acked_event = asyncio.Event()
+        self.ws = None
+        self._sent_at = collections.OrderedDict()  # 序号 -> 发送时间，按发送顺序
+        self.rtts = []
+        self.sent = 0
+        self.acked = 0
+        self.errors = 0
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_queue=None)
+        if self.preferred_protocol != PROTOCOL_JSON or self.requested_ack != ACK_EACH or self.drone is not None:
+            await self.ws.send(hello_message((self.preferred_protocol, PROTOCOL_JSON), self.requested_ack,
+                                             drone=self.drone))
+            reply = json.loads(await asyncio.wait_for(self.ws.recv(), 2.0))
+            if 'error' in reply and reply.get('hello'):
+                # 不带 hello 的错误来自不支持握手的旧服务端，继续使用 JSON
+                raise ConnectionError(reply['error'])
+            self.protocol = reply.get('protocol', PROTOCOL_JSON)
+            self.ack_mode = reply.get('ack', ACK_EACH)
+
+    async def send_loop(self, rate, deadline):
+        """以 rate 条/s（0 表示不限速）发送到 deadline（time.perf_counter）"""
+        interval = 1.0 / rate if rate > 0 else 0.0
+        start = time.perf_counter()
+        seq = 0
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if interval:
+                delay = start + seq * interval - now
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # 让出事件循环，及时处理应答
+            while self.window and self.ack_mode != ACK_NONE and len(self._sent_at) >= self.window:
+                self._acked_event.clear()
+                try:
+                    await asyncio.wait_for(self._acked_event.wait(), max(deadline - time.perf_counter(), 0.0))
+                except asyncio.TimeoutError:
+                    return
+            seq += 1
+            x = (seq % 100) * 0.01
+            if self.ack_mode != ACK_NONE:
+                self._sent_at[seq] = time.perf_counter()
+            if self.protocol == PROTOCOL_BINARY:
+                await self.ws.send(encode_command(seq, time.time(), x, 0.0, 0.0, 0.0, 0.05))
+            else:
+                await self.ws.send(json.dumps({"x": x, "y": 0.0, "z": 0.0, "r": 0.0, "t": 0.05, "seq": seq}))
+            self.sent += 1
+
+    async def receive_loop(self):
+        async for message in self.ws:
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                if message_type(message) == MSG_ACK:
+                    self._ack_through(decode_ack(message)[0], now)
+                continue
+            data = json.loads(message)
+            if 'error' in data:
+                self.errors += 1
+                self._sent_at.pop(data.get('seq', next(iter(self._sent_at), None)), None)
+                self._acked_event.set()
+            elif isinstance(data.get('ack'), dict):
+                self._ack_through(data['ack']['seq'], now)
+            elif 'status' in data and self._sent_at:
+                # JSON 逐条应答不带序号，按顺序对应
+                self._record(self._sent_at.popitem(last=False)[1], now)
+
+    def _ack_through(self, seq, now):
+        while self._sent_at and next(iter(self._sent_at)) <= seq:
+            self._record(self._sent_at.popitem(last=False)[1], now)
+
+    def _record(self, sent_at, now):
+        self.acked += 1
+        self.rtts.append(now - sent_at)
+        self._acked_event.set()
+
+    @property
+    def unacked(self):
+        return len(self._sent_at)
+
+
+async def query_stats(url):
+    """
+    先握手确认服务端支持 {"stats": {}} 查询（握手回复的 "queries" 中有 stats）再查询：
+    不支持查询的旧服务端会把查询当作一条零速度命令执行，让正在压测或飞行的无人机停下
+    :return: (服务端各无人机命令数之和, 查询时间)；服务端不支持查询时命令数为 None
+    """
+    reply = {}
+    async with websockets.connect(url) as ws:
+        try:
+            await ws.send(hello_message((PROTOCOL_JSON,)))
+            hello = json.loads(await asyncio.wait_for(ws.recv(), 2.0))
+            if 'stats' in hello.get('queries', ()):
+                await ws.send(json.dumps({"stats": {}}))
+                reply = json.loads(await asyncio.wait_for(ws.recv(), 2.0))
+        except asyncio.TimeoutError:
+            pass
+    stats = reply.get('stats')
+    return (sum(stats.values()) if isinstance(stats, dict) else None), time.perf_counter()
+
+
+async def run_load(url, clients, rate, duration, protocol, ack_mode, drones=None, window=0, drain=1.0):
+    """运行一轮压测，返回统计结果"""
+    before, _ = await query_stats(url)
+    workers = [LoadClient(url, protocol, ack_mode, drones[i % len(drones)] if drones else None, window)
+               for i in range(clients)]
+    connect_errors = 0
+    for result in await asyncio.gather(*(worker.connect() for worker in workers), return_exceptions=True):
+        if isinstance(result, BaseException):
+            connect_errors += 1
+    workers = [worker for worker in workers if worker.ws is not None]
+
+    receivers = [asyncio.ensure_future(worker.receive_loop()) for worker in workers]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(worker.send_loop(rate, start + duration) for worker in workers),
+                                   return_exceptions=True)
+    send_errors = sum(isinstance(result, BaseException) for result in results)
+    elapsed = time.perf_counter() - start
+    # 等待剩余应答（累计应答至少等一个应答间隔）
+    drain_deadline = time.perf_counter() + drain
+    while any(worker.unacked for worker in workers) and time.perf_counter() < drain_deadline:
+        await asyncio.sleep(0.01)
+    after, _ = await query_stats(url)
+    for worker in workers:
+        await worker.ws.close()
+    for receiver in receivers:
+        receiver.cancel()
+
+    sent = sum(worker.sent for worker in workers)
+    rtts = sorted(rtt for worker in workers for rtt in worker.rtts)
+    result = {
+        'clients': clients,
+        'protocol': workers[0].protocol if workers else protocol,
+        'ack_mode': workers[0].ack_mode if workers else ack_mode,
+        'elapsed_s': round(elapsed, 3),
+        'sent': sent,
+        'acked': sum(worker.acked for worker in workers),
+        'unacked': sum(worker.unacked for worker in workers),
+        'errors': connect_errors + send_errors + sum(worker.errors for worker in workers),
+        'commands_per_s': round(sent / elapsed, 1),
+        'server_commands_per_s': None if before is None or after is None else round((after - before) / elapsed, 1),
+    }
+    if len(rtts) >= 2:
+        cuts = statistics.quantiles(rtts, n=100, method='inclusive')
+        result.update(rtt_p50_ms=round(cuts[49] * 1000, 3), rtt_p95_ms=round(cuts[94] * 1000, 3),
+                      rtt_p99_ms=round(cuts[98] * 1000, 3))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebSocket 控制服务压测")
+    parser.add_argument('--url', help="压测已运行的服务（如 ws://host:5000），不指定时在本机启动替身服务")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16], help="并发客户端数，给出多个时依次压测")
+    parser.add_argument('--rate', type=float, default=0.0, help="每个客户端的发送速率（条/s），0 表示不限速")
+    parser.add_argument('--duration', type=float, default=5.0, help="每轮发送时长（秒）")
+    parser.add_argument('--protocol', choices=SUPPORTED_PROTOCOLS, default=PROTOCOL_BINARY)
+    parser.add_argument('--ack-mode', choices=ACK_MODES, default=ACK_EACH)
+    parser.add_argument('--window', type=int, default=0,
+                        help="每个客户端最多未应答的命令数（0 表示不限制；累计应答或不应答时设为 0）")
+    parser.add_argument('--drones', nargs='+', help="客户端轮流选择的无人机编号")
+    parser.add_argument('--tick-rate', type=float, default=100.0, help="替身服务的积分频率（Hz）")
+    parser.add_argument('--output', help="结果写入的 JSON 文件")
+    args = parser.parse_args(argv)
+
+    stop = None
+    url = args.url
+    if url is None:
+        from standin_server import start_standin_server
+        _, url, stop = start_standin_server(tick_rate=args.tick_rate)
+
+    results = []
+    try:
+        for clients in args.clients:
+            result = asyncio.run(run_load(url, clients, args.rate, args.duration, args.protocol, args.ack_mode,
+                                          args.drones, args.window))
+            results.append(result)
+            rtt = (f"p50 {result['rtt_p50_ms']:>7.2f}ms  p95 {result['rtt_p95_ms']:>7.2f}ms  "
+                   f"p99 {result['rtt_p99_ms']:>7.2f}ms" if 'rtt_p50_ms' in result else "无应答")
+            server = result['server_commands_per_s']
+            print(f"{clients:>3} 客户端 {result['commands_per_s']:>9.1f} cmd/s  服务端 "
+                  f"{'-' if server is None else f'{server:.1f}':>9} cmd/s  错误 {result['errors']:>4}  {rtt}")
+    finally:
+        if stop is not None:
+            stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'url': args.url or 'standin', 'rate': args.rate, 'duration': args.duration,
+                       'results': results}, f, indent=2)
+        print(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
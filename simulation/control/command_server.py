@@ -0,0 +1,237 @@
+"""
+控制服务与 ROS 无关的部分，由 control_new（ROS 节点）与 standin_server（无 ROS 的运动学替身）共用：
+  - Setpoint / ramp：不可变的命令快照与按加速度上限逐步靠近目标
+  - DroneRegistry：无人机编号 -> 控制器
+  - serve_client：一条 WebSocket 连接的协议处理（JSON / 二进制命令、握手、应答方式、延迟追踪、多机选择）
+控制器只需提供 namespace、commands（已执行的命令数）属性与 set_command(x, y, z, r, t, on_publish) 方法
+"""
+import asyncio
+import collections
+import json
+import math
+import re
+import threading
+import time
+
+import websockets
+
+from command_protocol import (ACK_CUMULATIVE, ACK_EACH, FLAG_CUMULATIVE, FLAG_TRACE, choose_ack, choose_protocol,
+                              command_drone_slot, decode_command, encode_ack, encode_trace)
+
+# 一次 set_command 设置的目标：创建后不再修改，发布线程读到的总是完整的一条命令
+Setpoint = collections.namedtuple('Setpoint', 'x y z r end_time applied on_publish')
+
+IDLE_SETPOINT = Setpoint(0.0, 0.0, 0.0, 0.0, None, 0.0, None)
+
+# 无人机编号即 ROS 命名空间（去掉首尾的 /）：字母开头，由字母、数字、下划线组成，可用 / 分层
+DRONE_ID_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9_]*(/[A-Za-z][A-Za-z0-9_]*)*')
+DEFAULT_MAX_DRONES = 16
+
+
+def ramp(current, target, max_step):
+    """current 向 target 靠近，变化量（向量长度）不超过 max_step"""
+    delta = [b - a for a, b in zip(current, target)]
+    norm = math.sqrt(sum(d * d for d in delta))
+    if norm <= max_step:
+        return tuple(target)
+    scale = max_step / norm
+    return tuple(a + d * scale for a, d in zip(current, delta))
+
+
+class DroneRegistry:
+    """
+    无人机编号 -> 控制器（control_new 中为 QuadrotorController，替身服务中为 KinematicQuadrotor）
+    给出 drones 时只接受这些无人机（白名单）；否则第一次用到某个编号时创建对应的控制器，
+    最多 max_drones 架，编号须是合法的 ROS 命名空间，任何客户端都不能无限制地创建控制器与发布者
+    编号 '' 对应根命名空间的 /cmd_vel（单机时的行为）
+    拒绝的编号抛出 ValueError，serve_client 以错误应答回复客户端
+    """
+
+    def __init__(self, create, drones=None, loginfo=print, max_drones=DEFAULT_MAX_DRONES):
+        """
+        :param create: create(编号) 创建对应的控制器（需有 namespace 属性与 set_command 方法）
+        :param max_drones: 未给出 drones 时最多创建的无人机数（含默认的根命名空间），None 表示不限制
+        """
+        self.create = create
+        self.loginfo = loginfo
+        self.max_drones = max_drones
+        self.fixed = False
+        self.default = str(drones[0]).strip('/') if drones else ''
+        self._controllers = {}
+        self._lock = threading.Lock()
+        for drone in drones or ():
+            self.get(drone)
+        self.fixed = bool(drones)
+
+    def get(self, drone=None):
+        """:return: 编号对应的控制器，drone 为 None 时为默认无人机"""
+        drone = self.default if drone is None else str(drone).strip('/')
+        controller = self._controllers.get(drone)
+        if controller is not None:
+            return controller
+        with self._lock:
+            if drone not in self._controllers:
+                if self.fixed:
+                    raise ValueError(f"未知的无人机: {drone}")
+                if drone and not DRONE_ID_PATTERN.fullmatch(drone):
+                    raise ValueError(f"无效的无人机编号: {drone}")
+                if self.max_drones is not None and len(self._controllers) >= self.max_drones:
+                    raise ValueError(f"无人机数量已达上限 {self.max_drones}，拒绝新的编号: {drone}")
+                self.loginfo(f"[REGISTRY] 添加无人机：{drone or '/'}")
+                self._controllers[drone] = self.create(drone)
+            return self._controllers[drone]
+
+    def drones(self):
+        return list(self._controllers)
+
+
+async def _send_quietly(websocket, message):
+    try:
+        await websocket.send(message)
+    except websockets.ConnectionClosed:
+        pass
+
+
+def _publish_callback(websocket, make_reply):
+    """首次发布 /cmd_vel 后把 make_reply(命令生效时间, 发布时间) 的结果发回客户端（从发布线程切回事件循环发送）"""
+    loop = asyncio.get_running_loop()
+
+    def on_publish(applied, published):
+        reply = make_reply(applied, published)
+        loop.call_soon_threadsafe(lambda: asyncio.ensure_future(_send_quietly(websocket, reply)))
+    return on_publish
+
+
+class CumulativeAcker:
+    """累计应答：记录连接上最后一条已执行命令，每隔 interval 秒（有新命令时）回复一次"""
+
+    def __init__(self, websocket, interval):
+        self.websocket = websocket
+        self.interval = interval
+        self.seq = None
+        self.client_timestamp = 0.0
+        self.binary = False
+        self.count = 0
+
+    def applied(self, seq, client_timestamp=0.0, binary=False):
+        self.seq = seq
+        self.client_timestamp = client_timestamp
+        self.binary = binary
+        self.count += 1
+
+    async def flush(self):
+        if not self.count:
+            return
+        if self.binary:
+            reply = encode_ack(self.seq, self.client_timestamp, time.time(), FLAG_CUMULATIVE)
+        else:
+            reply = json.dumps({"ack": {"seq": self.seq, "count": self.count}})
+        self.count = 0
+        await _send_quietly(self.websocket, reply)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+async def serve_client(websocket, registry, loginfo=print, logerr=print):
+    """
+    接收客户端发送的 JSON 格式控制命令: {"x": float, "y": float, "z": float, "r": float, "t": float}
+    r: 角速度，r<0 逆时针，r>0 顺时针
+    也接受 command_protocol 定义的二进制命令帧（客户端通过 {"hello": ...} 握手协商），以二进制应答帧回复
+    握手中可以关闭逐条应答或改为定期的累计应答（见 command_protocol），不必每条命令都等一次发送
+    握手中的 "drone" 选择本连接控制的无人机，命令中的 "drone"（JSON）或槽位（二进制）临时指定其他无人机
+    {"stats": {}} 查询各无人机已执行的命令数，回复 {"stats": {编号: 命令数}, "timestamp": 服务端时间}（压测用）；
+    握手回复中的 "queries": ["stats"] 表示支持该查询（旧服务端会把查询当作一条零速度命令执行，客户端需先确认）
+    :param registry: DroneRegistry
+    :param loginfo: 日志函数（control_new 中为 rospy.loginfo）
+    """
+    client_ip = websocket.remote_address[0]
+    loginfo(f"[WebSocket] 客户端已连接：{client_ip}")
+    controller = registry.get()
+    slots = [controller]  # 二进制命令的无人机槽位，0 为本连接选中的无人机
+    ack_mode = ACK_EACH
+    acker = None
+    acker_task = None
+
+    try:
+        async for message in websocket:
+            data = None
+            try:
+                received = time.time()
+                if isinstance(message, bytes):
+                    seq, flags, client_timestamp, x, y, z, r, t = decode_command(message)
+                    on_publish = None
+                    if flags & FLAG_TRACE:
+                        on_publish = _publish_callback(websocket, lambda applied, published, seq=seq, received=received:
+                                                       encode_trace(seq, received, applied, published))
+                    slot = command_drone_slot(message)
+                    if slot >= len(slots):
+                        raise ValueError(f"未分配的无人机槽位: {slot}")
+                    slots[slot].set_command(x, y, z, r, t, on_publish)
+                    if ack_mode == ACK_EACH:
+                        await websocket.send(encode_ack(seq, client_timestamp, received))
+                    elif acker is not None:
+                        acker.applied(seq, client_timestamp, binary=True)
+                    continue
+                data = json.loads(message)
+                if "stats" in data:
+                    counts = {drone or '/': registry.get(drone).commands for drone in registry.drones()}
+                    await websocket.send(json.dumps({"stats": counts, "timestamp": time.time()}))
+                    continue
+                if "hello" in data:
+                    hello = data["hello"]
+                    # 先检查无人机编号，未知编号时回复错误、保持原来的选择
+                    selected = registry.get(hello.get("drone"))
+                    named = [registry.get(drone) for drone in hello.get("drones", ())]
+                    controller, slots = selected, [selected] + named
+                    protocol = choose_protocol(hello.get("protocols", ()))
+                    ack_mode, ack_interval = choose_ack(hello)
+                    if ack_mode == ACK_CUMULATIVE and acker is None:
+                        acker = CumulativeAcker(websocket, ack_interval)
+                        acker_task = asyncio.ensure_future(acker.run())
+                    drone = controller.namespace.strip('/')
+                    loginfo(f"[WebSocket] 客户端 {client_ip} 使用协议：{protocol}，应答方式：{ack_mode}，"
+                                  f"无人机：{drone or '/'}")
+                    reply = {"status": "ok", "protocol": protocol, "ack": ack_mode, "drone": drone,
+                             "queries": ["stats"]}
+                    if named:
+                        reply["drones"] = {c.namespace.strip('/'): slot for slot, c in enumerate(named, 1)}
+                    await websocket.send(json.dumps(reply))
+                    continue
+                x = float(data.get("x", 0.0))
+                y = float(data.get("y", 0.0))
+                z = float(data.get("z", 0.0))
+                r = float(data.get("r", 0.0))
+                t = float(data.get("t", 0.0))
+                on_publish = None
+                if data.get("trace"):
+                    on_publish = _publish_callback(websocket, lambda applied, published, seq=data.get("seq"), received=received:
+                                                   json.dumps({"trace": {"seq": seq, "server_receive": received,
+                                                                         "set_command": applied, "publish": published}}))
+                target = registry.get(data["drone"]) if "drone" in data else controller
+                target.set_command(x, y, z, r, t, on_publish)
+                if ack_mode == ACK_EACH:
+                    # 回传已设置的命令状态
+                    await websocket.send(json.dumps({
+                        "status": "ok", "x": x, "y": y, "z": z, "r": r, "t": t
+                    }))
+                elif acker is not None:
+                    acker.applied(data.get("seq"))
+            except websockets.ConnectionClosed:
+                raise
+            except Exception as e:
+                logerr(f"[WebSocket] 指令解析或执行失败: {e}")
+                error = {"error": str(e)}
+                if isinstance(data, dict) and "hello" in data:
+                    # 与旧服务端对握手的错误回复区分：客户端收到后不再回退到 JSON，而是报告握手失败
+                    error["hello"] = True
+                elif ack_mode != ACK_EACH and isinstance(data, dict) and "seq" in data:
+                    # 不逐条应答时客户端按序号对应错误
+                    error["seq"] = data["seq"]
+                await websocket.send(json.dumps(error))
+    finally:
+        if acker_task is not None:
+            acker_task.cancel()
+            await acker.flush()
@@ -1,79 +1,119 @@
 #!/usr/bin/env python3
 """
 ROS Python 节点：通过标准 WebSocket 接收线速度、角速度与持续时间，并通过 /cmd_vel 控制 Hector Quadrotor
+一个进程、一个端口可以控制多架无人机：每架无人机（编号即 ROS 命名空间，如 uav1 -> /uav1/cmd_vel）
+有自己的 QuadrotorController，客户端在握手时或在每条命令中选择无人机
 """
 import asyncio
-import json
 import threading
+import time
 import rospy
 from geometry_msgs.msg import Twist
 import websockets
 
-controller = None
+from command_server import DEFAULT_MAX_DRONES, IDLE_SETPOINT, DroneRegistry, Setpoint, ramp, serve_client
+
+registry = None
 
 class QuadrotorController:
-    def __init__(self):
-        rospy.init_node('quadrotor_controller_ws')
-        self.pub = rospy.Publisher('/cmd_vel', Twist, queue_size=1)
-        self.rate = rospy.Rate(20)
-        self.lock = threading.Lock()
-        self.current_cmd = Twist()
-        self.end_time = rospy.Time.now()
-        thread = threading.Thread(target=self._publish_loop)
+    def __init__(self, namespace='', log_interval=1.0, publish_rate=None, max_linear_accel=None,
+                 max_angular_accel=None):
+        """
+        需先调用 rospy.init_node，同一节点中可以有多个实例（每架无人机一个）
+        :param namespace: 无人机的 ROS 命名空间，发布到 {namespace}/cmd_vel
+        :param log_interval: set_command 日志的最短间隔（秒），间隔内的命令只计数，在下一条日志中给出条数；
+                             为 0 时每条命令都记录
+        :param publish_rate: /cmd_vel 发布频率（Hz），默认读取参数 ~publish_rate（20）
+        :param max_linear_accel: 线加速度上限（m/s²），设置后输出速度按上限逐步靠近目标（包括停止），
+                                 默认读取参数 ~max_linear_accel（不限制）；max_angular_accel 同理（rad/s²）
+        """
+        if publish_rate is None:
+            publish_rate = rospy.get_param('~publish_rate', 20)
+        if max_linear_accel is None:
+            max_linear_accel = rospy.get_param('~max_linear_accel', None)
+        if max_angular_accel is None:
+            max_angular_accel = rospy.get_param('~max_angular_accel', None)
+        self.namespace = namespace.rstrip('/')
+        self.pub = rospy.Publisher(f'{self.namespace}/cmd_vel', Twist, queue_size=1)
+        self.publish_rate = publish_rate
+        self.rate = rospy.Rate(publish_rate)
+        self.max_linear_accel = max_linear_accel
+        self.max_angular_accel = max_angular_accel
+        # 命令槽：set_command 整体替换为新的 Setpoint（单次属性赋值），发布线程只读，两边都不加锁
+        self._setpoint = IDLE_SETPOINT
+        self.log_interval = log_interval
+        self._last_log = 0.0
+        self._unlogged = 0
+        self.commands = 0  # 已执行的 set_command 次数（{"stats": {}} 查询）
+        thread = threading.Thread(target=self._publish_loop, name=f'publish{self.namespace or "/"}')
         thread.daemon = True
         thread.start()
 
     def _publish_loop(self):
+        linear = (0.0, 0.0, 0.0)
+        angular = 0.0
+        notified = None  # 已调用过 on_publish 的 Setpoint
+        last = rospy.Time.now()
         while not rospy.is_shutdown():
-            with self.lock:
-                now = rospy.Time.now()
-                # 如果当前时间早于结束时间，则发布命令，否则发布零速度命令
-                cmd = self.current_cmd if now < self.end_time else Twist()
-                self.pub.publish(cmd)
+            setpoint = self._setpoint
+            # 加速度限制与 end_time、rospy.Rate 使用同一个时钟（ROS 时间，use_sim_time 时为仿真时间）
+            now = rospy.Time.now()
+            dt, last = min(max((now - last).to_sec(), 0.0), 0.1), now
+            # 如果当前时间早于结束时间，则发布命令，否则发布零速度命令
+            if setpoint.end_time is not None and now < setpoint.end_time:
+                target_linear, target_angular = (setpoint.x, setpoint.y, setpoint.z), setpoint.r
+            else:
+                target_linear, target_angular = (0.0, 0.0, 0.0), 0.0
+            if self.max_linear_accel:
+                linear = ramp(linear, target_linear, self.max_linear_accel * dt)
+            else:
+                linear = target_linear
+            if self.max_angular_accel:
+                angular = ramp((angular,), (target_angular,), self.max_angular_accel * dt)[0]
+            else:
+                angular = target_angular
+
+            cmd = Twist()
+            cmd.linear.x, cmd.linear.y, cmd.linear.z = linear
+            # 角速度（绕 Z 轴）
+            cmd.angular.z = angular
+            self.pub.publish(cmd)
+            if setpoint.on_publish is not None and setpoint is not notified:
+                notified = setpoint
+                setpoint.on_publish(setpoint.applied, time.time())
             self.rate.sleep()
 
-    def set_command(self, x=0.0, y=0.0, z=0.0, r=0.0, t=0.0):
+    def set_command(self, x=0.0, y=0.0, z=0.0, r=0.0, t=0.0, on_publish=None):
         """
         设置线速度 (x,y,z)、角速度 r（绕 Z 轴，r<0 逆时针，r>0 顺时针）
         并持续 t 秒
+        :param on_publish: 设置后首次发布 /cmd_vel 时以 (命令生效时间, 发布时间) 调用（在发布线程中），
+                           被更新的命令覆盖时不再调用
+        :return: 命令生效的时间戳
         """
-        with self.lock:
-            # 线速度
-            self.current_cmd.linear.x = x
-            self.current_cmd.linear.y = y
-            self.current_cmd.linear.z = z
-            # 角速度（绕 Z 轴）
-            self.current_cmd.angular.z = r
-            # 设置结束时间
-            self.end_time = rospy.Time.now() + rospy.Duration(t)
-            rospy.loginfo(
-                f"[COMMAND] 设置速度 x={x}, y={y}, z={z}, r={r}, 持续 {t}s, 截止 {self.end_time.to_sec():.2f}"
-            )
+        end_time = rospy.Time.now() + rospy.Duration(t)
+        applied = time.time()
+        self._setpoint = Setpoint(x, y, z, r, end_time, applied, on_publish)
+        self.commands += 1
+        # 日志限速：高频命令下逐条格式化与输出日志的开销会限制服务端吞吐
+        if applied - self._last_log < self.log_interval:
+            self._unlogged += 1
+            return applied
+        skipped, self._unlogged, self._last_log = self._unlogged, 0, applied
+        rospy.loginfo(
+            f"[COMMAND] {self.namespace or '/'} 设置速度 x={x}, y={y}, z={z}, r={r}, 持续 {t}s, 截止 {end_time.to_sec():.2f}"
+            + (f"（期间另有 {skipped} 条命令未记录）" if skipped else "")
+        )
+        return applied
+
 
-async def handle_client(websocket, path):
+async def handle_client(websocket, path=None):
     """
     接收客户端发送的 JSON 格式控制命令: {"x": float, "y": float, "z": float, "r": float, "t": float}
     r: 角速度，r<0 逆时针，r>0 顺时针
+    协议细节（二进制命令、握手、应答方式、多机选择）见 command_server.serve_client
     """
-    client_ip = websocket.remote_address[0]
-    rospy.loginfo(f"[WebSocket] 客户端已连接：{client_ip}")
-
-    async for message in websocket:
-        try:
-            data = json.loads(message)
-            x = float(data.get("x", 0.0))
-            y = float(data.get("y", 0.0))
-            z = float(data.get("z", 0.0))
-            r = float(data.get("r", 0.0))
-            t = float(data.get("t", 0.0))
-            controller.set_command(x, y, z, r, t)
-            # 回传已设置的命令状态
-            await websocket.send(json.dumps({
-                "status": "ok", "x": x, "y": y, "z": z, "r": r, "t": t
-            }))
-        except Exception as e:
-            rospy.logerr(f"[WebSocket] 指令解析或执行失败: {e}")
-            await websocket.send(json.dumps({"error": str(e)}))
+    await serve_client(websocket, registry, rospy.loginfo, rospy.logerr)
 
 
 def start_websocket_server():
@@ -87,7 +127,11 @@ def start_websocket_server():
 
 if __name__ == '__main__':
     try:
-        controller = QuadrotorController()
+        rospy.init_node('quadrotor_controller_ws')
+        # ~drones：无人机编号列表（如 [uav1, uav2]），不设置时按客户端请求的编号创建，最多 ~max_drones 架
+        registry = DroneRegistry(lambda drone: QuadrotorController(f'/{drone}' if drone else ''),
+                                 rospy.get_param('~drones', None), rospy.loginfo,
+                                 rospy.get_param('~max_drones', DEFAULT_MAX_DRONES))
         server_thread = threading.Thread(target=start_websocket_server)
         server_thread.daemon = True
         server_thread.start()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+不依赖 ROS 的四旋翼替身服务：与 control_new 使用同一套 WebSocket 协议（command_server.serve_client），
+命令保持语义与 QuadrotorController 相同（命令持续 t 秒，之后速度归零），
+按固定频率对一个简单的运动学模型积分（机体坐标系速度 + 偏航角速度），记录轨迹与每条命令的延迟，
+用于在没有 ROS / Hector Quadrotor 的机器上对客户端（WebSocketControl、手势循环）做压测与回归测试
+
+用法：
+  python standin_server.py --port 5000 --tick-rate 100
+  python standin_server.py --drones uav1 uav2 --max-linear-accel 2 --trajectory traj.json
+"""
+import argparse
+import asyncio
+import collections
+import json
+import math
+import statistics
+import threading
+import time
+
+import websockets
+
+from command_server import DEFAULT_MAX_DRONES, IDLE_SETPOINT, DroneRegistry, Setpoint, ramp, serve_client
+
+
+class KinematicQuadrotor:
+    """
+    与 QuadrotorController 接口相同的运动学替身：每个周期取当前命令快照，
+    在 end_time 之前输出命令速度，之后输出零速度（可选加速度限制），并积分出位置与偏航角
+    速度 x/y 为机体坐标系（随偏航旋转），z 为竖直方向，高度不低于 0（地面）
+    """
+
+    def __init__(self, namespace='', tick_rate=100.0, max_linear_accel=None, max_angular_accel=None,
+                 trajectory_size=100000, latency_size=10000):
+        self.namespace = namespace.rstrip('/')
+        self.tick_rate = tick_rate
+        self.max_linear_accel = max_linear_accel
+        self.max_angular_accel = max_angular_accel
+        self._setpoint = IDLE_SETPOINT
+        # 状态：位置、偏航角与当前输出速度
+        self.position = (0.0, 0.0, 0.0)
+        self.yaw = 0.0
+        self.linear = (0.0, 0.0, 0.0)
+        self.angular = 0.0
+        # 轨迹：(时间, x, y, z, 偏航角, vx, vy, vz, 偏航角速度)
+        self.trajectory = collections.deque(maxlen=trajectory_size)
+        # 每条命令从 set_command 到首次输出的延迟（秒）
+        self.latencies = collections.deque(maxlen=latency_size)
+        self.commands = 0
+        self.overwritten = 0  # 还没输出就被新命令覆盖的命令数
+        self._published = IDLE_SETPOINT  # 最近一次输出的命令快照
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._tick_loop, name=f'kinematic{self.namespace or "/"}', daemon=True)
+        self._thread.start()
+
+    def set_command(self, x=0.0, y=0.0, z=0.0, r=0.0, t=0.0, on_publish=None):
+        """与 QuadrotorController.set_command 相同：设置速度并持续 t 秒，返回命令生效的时间戳"""
+        applied = time.time()
+        previous, self._setpoint = self._setpoint, Setpoint(x, y, z, r, applied + t, applied, on_publish)
+        self.commands += 1
+        if previous is not IDLE_SETPOINT and previous is not self._published:
+            self.overwritten += 1
+        return applied
+
+    def _tick_loop(self):
+        period = 1.0 / self.tick_rate
+        next_tick = last = time.monotonic()
+        while not self._stopped.is_set():
+            setpoint = self._setpoint
+            now = time.monotonic()
+            dt, last = now - last, now
+            wall = time.time()
+            if setpoint.end_time is not None and wall < setpoint.end_time:
+                target_linear, target_angular = (setpoint.x, setpoint.y, setpoint.z), setpoint.r
+            else:
+                target_linear, target_angular = (0.0, 0.0, 0.0), 0.0
+            if self.max_linear_accel:
+                self.linear = ramp(self.linear, target_linear, self.max_linear_accel * dt)
+            else:
+                self.linear = target_linear
+            if self.max_angular_accel:
+                self.angular = ramp((self.angular,), (target_angular,), self.max_angular_accel * dt)[0]
+            else:
+                self.angular = target_angular
+            self._integrate(dt)
+            self.trajectory.append((wall, *self.position, self.yaw, *self.linear, self.angular))
+
+            if setpoint is not self._published:
+                self._published = setpoint
+                if setpoint is not IDLE_SETPOINT:
+                    self.latencies.append(wall - setpoint.applied)
+                    if setpoint.on_publish is not None:
+                        setpoint.on_publish(setpoint.applied, wall)
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stopped.wait(delay)
+            else:
+                next_tick = time.monotonic()  # 落后时不追赶，避免连续补发
+
+    def _integrate(self, dt):
+        vx, vy, vz = self.linear
+        cos_yaw, sin_yaw = math.cos(self.yaw), math.sin(self.yaw)
+        x, y, z = self.position
+        self.position = (x + (vx * cos_yaw - vy * sin_yaw) * dt,
+                         y + (vx * sin_yaw + vy * cos_yaw) * dt,
+                         max(z + vz * dt, 0.0))
+        self.yaw = (self.yaw + self.angular * dt + math.pi) % (2 * math.pi) - math.pi
+
+    def stats(self):
+        """命令数、被覆盖数与命令延迟（毫秒）的 p50 / p95 / 最大值"""
+        result = {'commands': self.commands, 'overwritten': self.overwritten, 'position': self.position,
+                  'yaw': self.yaw}
+        latencies = sorted(self.latencies)
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+            result.update(latency_p50_ms=round(cuts[49] * 1000, 3), latency_p95_ms=round(cuts[94] * 1000, 3),
+                          latency_max_ms=round(latencies[-1] * 1000, 3))
+        return result
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join(1.0)
+
+
+def start_standin_server(host='127.0.0.1', port=0, drones=None, verbose=False, max_drones=DEFAULT_MAX_DRONES,
+                         **vehicle_options):
+    """
+    在后台线程启动替身服务，监听失败时抛出对应的异常（例如端口已被占用时的 OSError）
+    :return: (registry, url, stop)，stop() 关闭服务与所有替身
+    """
+    loginfo = print if verbose else (lambda message: None)
+    registry = DroneRegistry(lambda drone: KinematicQuadrotor(f'/{drone}' if drone else '', **vehicle_options),
+                             drones, loginfo, max_drones)
+    started = threading.Event()
+    state = {}
+
+    async def handler(websocket, path=None):
+        await serve_client(websocket, registry, loginfo, print)
+
+    async def serve():
+        state['stop'] = asyncio.get_running_loop().create_future()
+        async with websockets.serve(handler, host, port) as server:
+            state['port'] = next(iter(server.sockets)).getsockname()[1]
+            started.set()
+            await state['stop']
+
+    def run():
+        state['loop'] = loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(serve())
+        except Exception as e:
+            # 启动失败（例如端口已被占用）：交给调用方抛出
+            state['error'] = e
+            started.set()
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, name='standin-server', daemon=True)
+    thread.start()
+    if not started.wait(5.0):
+        raise TimeoutError("替身服务启动超时")
+    if 'error' in state:
+        for drone in registry.drones():
+            registry.get(drone).close()
+        raise state['error']
+
+    def stop():
+        state['loop'].call_soon_threadsafe(state['stop'].set_result, None)
+        thread.join(5.0)
+        for drone in registry.drones():
+            registry.get(drone).close()
+
+    return registry, f"ws://{host}:{state['port']}", stop
+
+
+def export_trajectories(registry, path):
+    """所有替身的轨迹与统计写入 JSON"""
+    fields = ('time', 'x', 'y', 'z', 'yaw', 'vx', 'vy', 'vz', 'yaw_rate')
+    result = {}
+    for drone in registry.drones():
+        vehicle = registry.get(drone)
+        result[drone or '/'] = {'stats': vehicle.stats(), 'fields': fields,
+                                'trajectory': [list(sample) for sample in vehicle.trajectory]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="不依赖 ROS 的四旋翼替身服务（control_new 协议）")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--tick-rate', type=float, default=100.0, help="积分与输出频率（Hz）")
+    parser.add_argument('--drones', nargs='+', help="只接受这些无人机编号，不设置时按客户端请求创建")
+    parser.add_argument('--max-drones', type=int, default=DEFAULT_MAX_DRONES,
+                        help="未指定 --drones 时最多按客户端请求创建的无人机数")
+    parser.add_argument('--max-linear-accel', type=float, help="线加速度上限（m/s²）")
+    parser.add_argument('--max-angular-accel', type=float, help="偏航角加速度上限（rad/s²）")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="统计打印间隔（秒）")
+    parser.add_argument('--trajectory', help="退出时把轨迹与统计写入的 JSON 文件")
+    args = parser.parse_args()
+
+    registry, url, stop = start_standin_server(args.host, args.port, args.drones, verbose=True,
+                                               max_drones=args.max_drones, tick_rate=args.tick_rate,
+                                               max_linear_accel=args.max_linear_accel,
+                                               max_angular_accel=args.max_angular_accel)
+    print(f"[STARTUP] 替身服务已启动：{url}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(args.report_interval)
+            for drone in registry.drones():
+                print(f"[STANDIN] {drone or '/'}: {registry.get(drone).stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.trajectory:
+            export_trajectories(registry, args.trajectory)
+            print(f"轨迹已写入 {args.trajectory}")
+        stop()
+
+
+if __name__ == '__main__':
+    main()
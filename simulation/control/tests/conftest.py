@@ -0,0 +1,5 @@
+import os
+import sys
+
+# simulation/control/ 下的脚本以同目录模块的方式互相导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+import math
+import time
+
+import pytest
+
+from command_server import ramp
+from standin_server import KinematicQuadrotor
+
+
+def test_ramp_reaches_target_within_step():
+    assert ramp((0.0, 0.0, 0.0), (0.1, 0.0, 0.0), 0.5) == (0.1, 0.0, 0.0)
+    assert ramp((1.0,), (1.0,), 0.0) == (1.0,)
+
+
+def test_ramp_limits_vector_length():
+    step = ramp((0.0, 0.0, 0.0), (3.0, 4.0, 0.0), 1.0)
+    # 沿目标方向前进，整个向量的变化量不超过 max_step（而不是每个分量各走 max_step）
+    assert step == pytest.approx((0.6, 0.8, 0.0))
+    assert math.dist(step, (0.0, 0.0, 0.0)) == pytest.approx(1.0)
+
+
+def test_ramp_converges_when_stopping():
+    current = (2.0, -1.0, 0.5)
+    for _ in range(100):
+        current = ramp(current, (0.0, 0.0, 0.0), 0.1)
+    assert current == (0.0, 0.0, 0.0)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_command_lasts_t_seconds_then_stops():
+    drone = KinematicQuadrotor(tick_rate=200.0)
+    try:
+        drone.set_command(1.0, 0.0, 0.0, 0.0, 0.2)
+        assert wait_for(lambda: drone.linear == (1.0, 0.0, 0.0))
+        assert wait_for(lambda: drone.linear == (0.0, 0.0, 0.0))
+        assert drone.commands == 1
+        assert drone.position[0] == pytest.approx(0.2, abs=0.05)
+    finally:
+        drone.close()
+
+
+def test_acceleration_limit_ramps_output():
+    drone = KinematicQuadrotor(tick_rate=200.0, max_linear_accel=2.0)
+    try:
+        drone.set_command(1.0, 0.0, 0.0, 0.0, 5.0)
+        time.sleep(0.1)
+        # 加速度 2 m/s² 下约 0.5s 才达到 1 m/s
+        assert 0.0 < drone.linear[0] < 0.5
+        assert wait_for(lambda: drone.linear[0] == 1.0)
+    finally:
+        drone.close()
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from command_server import DroneRegistry
+
+
+def make_registry(drones=None, max_drones=4):
+    created = []
+
+    def create(drone):
+        created.append(drone)
+        return SimpleNamespace(namespace=f'/{drone}' if drone else '')
+    return DroneRegistry(create, drones, loginfo=lambda message: None, max_drones=max_drones), created
+
+
+def test_default_is_root_namespace():
+    registry, created = make_registry()
+    assert registry.get().namespace == ''
+    assert registry.get('') is registry.get() is registry.get('/')
+    assert created == ['']
+
+
+def test_creates_on_first_use_and_reuses():
+    registry, created = make_registry()
+    uav1 = registry.get('uav1')
+    assert registry.get('/uav1/') is uav1
+    assert registry.get('team_a/uav2').namespace == '/team_a/uav2'
+    assert created == ['uav1', 'team_a/uav2']
+
+
+@pytest.mark.parametrize('drone', ['1uav', 'uav-1', 'uav 1', 'uav1//x', '../uav1', 'uav1$'])
+def test_rejects_invalid_ids(drone):
+    registry, created = make_registry()
+    with pytest.raises(ValueError):
+        registry.get(drone)
+    assert created == []
+
+
+def test_caps_number_of_drones():
+    registry, created = make_registry(max_drones=2)
+    registry.get('uav1')
+    registry.get('uav2')
+    with pytest.raises(ValueError, match='上限'):
+        registry.get('uav3')
+    # 已有的编号不受上限影响
+    assert registry.get('uav1').namespace == '/uav1'
+    assert registry.drones() == ['uav1', 'uav2']
+
+
+def test_unlimited_when_max_drones_is_none():
+    registry, _ = make_registry(max_drones=None)
+    for i in range(50):
+        registry.get(f'uav{i}')
+    assert len(registry.drones()) == 50
+
+
+def test_fixed_allow_list():
+    registry, created = make_registry(['/uav1', 'uav2'])
+    assert registry.get().namespace == '/uav1'
+    assert registry.get('uav2').namespace == '/uav2'
+    with pytest.raises(ValueError, match='未知'):
+        registry.get('uav3')
+    with pytest.raises(ValueError):
+        registry.get('')
+    assert created == ['uav1', 'uav2']
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+from websockets.sync.client import connect
+
+from command_protocol import (ACK_CUMULATIVE, ACK_EACH, ACK_NONE, ACK_STRUCT, FLAG_CUMULATIVE, MSG_ACK,
+                              PROTOCOL_BINARY, PROTOCOL_JSON, decode_ack, encode_command, hello_message, message_type)
+from standin_server import start_standin_server
+
+
+@pytest.fixture
+def standin():
+    registry, url, stop = start_standin_server(max_drones=4, tick_rate=200.0)
+    yield registry, url
+    stop()
+
+
+@pytest.fixture
+def fixed_standin():
+    registry, url, stop = start_standin_server(drones=['uav1', 'uav2'], tick_rate=200.0)
+    yield registry, url
+    stop()
+
+
+def recv_json(ws):
+    message = ws.recv(timeout=2)
+    assert isinstance(message, str), message
+    return json.loads(message)
+
+
+def hello(ws, **options):
+    ws.send(hello_message(**options))
+    return recv_json(ws)
+
+
+def test_json_command_without_hello(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        ws.send(json.dumps({"x": 1, "y": 2, "z": 3, "r": 0.5, "t": 0.1}))
+        assert recv_json(ws) == {"status": "ok", "x": 1.0, "y": 2.0, "z": 3.0, "r": 0.5, "t": 0.1}
+    assert registry.get().commands == 1
+
+
+def test_binary_each_acks_every_command(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        reply = hello(ws)
+        assert reply == {"status": "ok", "protocol": PROTOCOL_BINARY, "ack": ACK_EACH, "drone": "",
+                         "queries": ["stats"]}
+        for seq in range(1, 6):
+            ws.send(encode_command(seq, 100.0 + seq, 0.5, 0, 0, 0, 0.05))
+            ack = ws.recv(timeout=2)
+            assert message_type(ack) == MSG_ACK and len(ack) == ACK_STRUCT.size
+            assert decode_ack(ack)[:2] == (seq, 100.0 + seq)
+    assert registry.get().commands == 5
+
+
+def test_binary_cumulative_ack_covers_last_command(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        assert hello(ws, ack=ACK_CUMULATIVE, ack_interval=0.02)["ack"] == ACK_CUMULATIVE
+        for seq in range(1, 21):
+            ws.send(encode_command(seq, 0.0, 0.5, 0, 0, 0, 0.05))
+        acks = []
+        while not acks or decode_ack(acks[-1])[0] != 20:
+            acks.append(ws.recv(timeout=2))
+        # 每个累计应答带 FLAG_CUMULATIVE，间隔内的多条命令只回复一次
+        assert all(ack[1] & FLAG_CUMULATIVE for ack in acks)
+        assert len(acks) < 20
+    assert registry.get().commands == 20
+
+
+def test_json_cumulative_ack_counts_commands(standin):
+    _, url = standin
+    with connect(url) as ws:
+        hello(ws, protocols=(PROTOCOL_JSON,), ack=ACK_CUMULATIVE, ack_interval=0.02)
+        for seq in range(1, 11):
+            ws.send(json.dumps({"x": 0.5, "t": 0.05, "seq": seq}))
+        count, last = 0, None
+        while last != 10:
+            ack = recv_json(ws)["ack"]
+            count, last = count + ack["count"], ack["seq"]
+        assert count == 10
+
+
+def test_ack_none_replies_only_to_queries_and_errors(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        reply = hello(ws, ack=ACK_NONE)
+        assert reply["ack"] == ACK_NONE and "stats" in reply["queries"]
+        for seq in range(1, 4):
+            ws.send(encode_command(seq, 0.0, 0.5, 0, 0, 0, 0.05))
+        ws.send(json.dumps({"x": "fast", "seq": 4}))
+        # 不逐条应答时错误回复带序号，客户端据此对应到命令
+        assert recv_json(ws)["seq"] == 4
+        ws.send(json.dumps({"stats": {}}))
+        assert recv_json(ws)["stats"] == {"/": 3}
+    assert registry.get().commands == 3
+
+
+def test_drone_selection_and_slots(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        reply = hello(ws, drone='uav1', drones=['uav2'])
+        assert reply["drone"] == "uav1" and reply["drones"] == {"uav2": 1}
+        ws.send(encode_command(1, 0.0, 0.5, 0, 0, 0, 0.05))
+        ws.send(encode_command(2, 0.0, 0.5, 0, 0, 0, 0.05, drone_slot=1))
+        assert [decode_ack(ws.recv(timeout=2))[0] for _ in range(2)] == [1, 2]
+        ws.send(json.dumps({"x": 0.5, "t": 0.05, "drone": "uav2"}))
+        assert recv_json(ws)["status"] == "ok"
+        ws.send(encode_command(3, 0.0, 0.5, 0, 0, 0, 0.05, drone_slot=2))
+        assert "槽位" in recv_json(ws)["error"]
+    assert registry.get('uav1').commands == 1
+    assert registry.get('uav2').commands == 2
+
+
+def test_rejected_hello_keeps_previous_drone(fixed_standin):
+    registry, url = fixed_standin
+    with connect(url) as ws:
+        reply = hello(ws, drone='uav9')
+        # 带 hello 的错误回复：客户端报告握手失败，而不是当作旧服务端回退到 JSON
+        assert reply["hello"] is True and "uav9" in reply["error"]
+        ws.send(json.dumps({"x": 0.5, "t": 0.05}))
+        assert recv_json(ws)["status"] == "ok"
+    assert registry.get('uav1').commands == 1
+    assert registry.drones() == ['uav1', 'uav2']
+
+
+def test_invalid_and_excess_drones_rejected(standin):
+    registry, url = standin
+    with connect(url) as ws:
+        assert hello(ws, drone='../etc')["hello"] is True
+        for i in range(3):
+            assert hello(ws, drone=f'uav{i}')["drone"] == f'uav{i}'
+        # 默认无人机与 3 架新无人机已达 max_drones=4
+        reply = hello(ws, drone='uav3')
+        assert reply["hello"] is True and "上限" in reply["error"]
+    assert len(registry.drones()) == 4
+